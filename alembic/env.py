@@ -21,6 +21,7 @@ from foodie.db.models import (  # noqa
     UserFoodPackageFeedback,
     FoodCategory,
     FoodPackage,
+    FoodPackageItem,
     ContactInformation,
     OpenInformation,
 )
@@ -42,6 +43,15 @@ config.set_main_option("sqlalchemy.url", str(DATABASE_URL))
 target_metadata = Base.metadata
 
 
+# indexes created by raw DDL (see foodie/db/search.py and locations.py) that
+# are not declared on the models, autogenerate should leave them alone
+UNMANAGED_INDEXES = {"ix_food_packages_search_vector", "ix_vendors_location"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "index" and name in UNMANAGED_INDEXES)
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -67,6 +77,7 @@ def run_migrations_offline():
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -91,6 +102,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,121 @@
+"""food package items table
+
+Revision ID: 1cc1aaf6efb6
+Revises: 4cb79fd4c237
+Create Date: 2026-10-18 12:20:05.931472
+
+Moves food_packages.items, a comma joined string, into food_package_items
+with one row per item. Item lookups then go through the (key,
+food_package_id) index instead of a LIKE scan over every package.
+
+Existing values are split on commas in chunks of BACKFILL_CHUNK_SIZE
+packages, each chunk committed on its own. A chunk replaces whatever items
+its packages already have, so a run that stopped partway can be run again.
+Item names that contained a comma were already split apart when they were
+saved, that cannot be recovered here.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy_utils import UUIDType
+
+# revision identifiers, used by Alembic.
+revision = "1cc1aaf6efb6"
+down_revision = "4cb79fd4c237"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def backfill_items(connection):
+    last_id = None
+    while True:
+        query = (
+            "SELECT id, items AS item_names FROM food_packages "
+            "WHERE items IS NOT NULL"
+        )
+        params = {"limit": BACKFILL_CHUNK_SIZE}
+        if last_id is not None:
+            query += " AND id > :last_id"
+            params["last_id"] = last_id
+        rows = connection.execute(
+            sa.text(f"{query} ORDER BY id LIMIT :limit"), params
+        ).fetchall()
+        if not rows:
+            return
+        # left by an earlier run that stopped partway
+        connection.execute(
+            sa.text(
+                "DELETE FROM food_package_items WHERE food_package_id IN :ids"
+            ).bindparams(sa.bindparam("ids", expanding=True)),
+            {"ids": [row.id for row in rows]},
+        )
+        entries = [
+            {"food_package_id": row.id, "position": position, "name": name, "key": key}
+            for row in rows
+            for position, (name, key) in enumerate(
+                (name.strip(), normalize(name))
+                for name in row.item_names.split(",")
+                if name.strip()
+            )
+        ]
+        if entries:
+            connection.execute(
+                sa.text(
+                    "INSERT INTO food_package_items "
+                    "(food_package_id, position, name, key) "
+                    "VALUES (:food_package_id, :position, :name, :key)"
+                ),
+                entries,
+            )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    # created by an earlier run that stopped in the backfill, the backfill's
+    # autocommit block committed them
+    if not sa.inspect(op.get_bind()).has_table("food_package_items"):
+        op.create_table(
+            "food_package_items",
+            sa.Column("food_package_id", UUIDType(binary=False), nullable=False),
+            sa.Column("position", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("key", sa.String(), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["food_package_id"], ["food_packages.id"], ondelete="CASCADE"
+            ),
+            sa.PrimaryKeyConstraint("food_package_id", "position"),
+        )
+        op.create_index(
+            "ix_food_package_items_key_food_package_id",
+            "food_package_items",
+            ["key", "food_package_id"],
+        )
+    with op.get_context().autocommit_block():
+        backfill_items(op.get_bind())
+    with op.batch_alter_table("food_packages") as batch_op:
+        batch_op.drop_column("items")
+
+
+def downgrade():
+    op.add_column("food_packages", sa.Column("items", sa.Unicode(), nullable=True))
+    op.execute(
+        "UPDATE food_packages SET items = ("
+        "SELECT string_agg(name, ',' ORDER BY position) FROM food_package_items "
+        "WHERE food_package_id = food_packages.id)"
+        if op.get_bind().dialect.name == "postgresql"
+        else "UPDATE food_packages SET items = ("
+        "SELECT group_concat(name, ',') FROM ("
+        "SELECT name FROM food_package_items "
+        "WHERE food_package_id = food_packages.id ORDER BY position))"
+    )
+    op.drop_index(
+        "ix_food_package_items_key_food_package_id", table_name="food_package_items"
+    )
+    op.drop_table("food_package_items")
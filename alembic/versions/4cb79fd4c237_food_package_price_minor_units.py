@@ -0,0 +1,164 @@
+"""food package price in minor units
+
+Revision ID: 4cb79fd4c237
+Revises: e5b404dc2067
+Create Date: 2026-10-18 11:02:17.480561
+
+Replaces the free text food_packages.price with an integer amount in the
+currency's minor unit (kobo, cents) and a currency code.
+
+Existing prices are parsed and written in chunks of BACKFILL_CHUNK_SIZE rows,
+each chunk committed on its own so no long running transaction holds locks
+on the table. A price that cannot be parsed aborts the migration and is
+reported with its row id, fix it and run the migration again, rows that
+were already converted are skipped.
+
+"""
+import re
+import unicodedata
+from decimal import Decimal, ROUND_HALF_UP
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "4cb79fd4c237"
+down_revision = "e5b404dc2067"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_CHUNK_SIZE = 1000
+
+DEFAULT_CURRENCY = "NGN"
+
+# every currency this has been used with so far has two decimal places
+MINOR_UNITS = 100
+
+PRICE_PATTERN = re.compile(r"\d+(\.\d+)?", re.ASCII)
+
+
+def parse_price(value: str) -> int:
+    """
+    '₦1,500.50' -> 150050, '1 500' -> 150000. Currency symbols, commas and
+    spaces, no-break ones included, are dropped and the rest must be a
+    number of at least 0, anything else, negative prices too, raises ValueError.
+    """
+    amount = "".join(
+        char
+        for char in value or ""
+        if char != "," and not char.isspace() and unicodedata.category(char) != "Sc"
+    )
+    if PRICE_PATTERN.fullmatch(amount) is None:
+        raise ValueError(value)
+    return int(
+        (Decimal(amount) * MINOR_UNITS).to_integral_value(rounding=ROUND_HALF_UP)
+    )
+
+
+def backfill_prices(connection):
+    last_id = None
+    while True:
+        query = "SELECT id, price FROM food_packages WHERE price_minor IS NULL"
+        params = {"limit": BACKFILL_CHUNK_SIZE}
+        if last_id is not None:
+            query += " AND id > :last_id"
+            params["last_id"] = last_id
+        rows = connection.execute(
+            sa.text(f"{query} ORDER BY id LIMIT :limit"), params
+        ).fetchall()
+        if not rows:
+            return
+        updates = []
+        for row in rows:
+            try:
+                updates.append({"id": row.id, "price_minor": parse_price(row.price)})
+            except ValueError:
+                raise RuntimeError(
+                    f"food package {row.id} has an unreadable price {row.price!r}"
+                )
+        connection.execute(
+            sa.text(
+                "UPDATE food_packages SET price_minor = :price_minor WHERE id = :id"
+            ),
+            updates,
+        )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    # added by an earlier run that stopped on an unreadable price, the
+    # backfill's autocommit block committed them
+    columns = {
+        column["name"]
+        for column in sa.inspect(op.get_bind()).get_columns("food_packages")
+    }
+    if "price_minor" not in columns:
+        op.add_column(
+            "food_packages", sa.Column("price_minor", sa.BigInteger(), nullable=True)
+        )
+    if "currency" not in columns:
+        op.add_column(
+            "food_packages",
+            sa.Column(
+                "currency",
+                sa.String(length=3),
+                nullable=False,
+                server_default=DEFAULT_CURRENCY,
+            ),
+        )
+    with op.get_context().autocommit_block():
+        backfill_prices(op.get_bind())
+    with op.batch_alter_table("food_packages") as batch_op:
+        batch_op.drop_column("price")
+        batch_op.alter_column(
+            "price_minor",
+            new_column_name="price",
+            existing_type=sa.BigInteger(),
+            nullable=False,
+        )
+        batch_op.alter_column(
+            "currency", existing_type=sa.String(length=3), server_default=None
+        )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_food_packages_vendor_id_is_available_price",
+            "food_packages",
+            ["vendor_id", "is_available", "price"],
+            postgresql_concurrently=True,
+        )
+        # vendor_id lookups are served by the leading column of the new index
+        op.drop_index(
+            "ix_food_packages_vendor_id",
+            table_name="food_packages",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_food_packages_vendor_id",
+            "food_packages",
+            ["vendor_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_food_packages_vendor_id_is_available_price",
+            table_name="food_packages",
+            postgresql_concurrently=True,
+        )
+    op.add_column("food_packages", sa.Column("price_text", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE food_packages SET price_text = "
+        f"CAST(price / {MINOR_UNITS} AS VARCHAR) || '.' || "
+        f"SUBSTR(CAST({MINOR_UNITS} + price % {MINOR_UNITS} AS VARCHAR), 2)"
+    )
+    with op.batch_alter_table("food_packages") as batch_op:
+        batch_op.drop_column("currency")
+        batch_op.drop_column("price")
+        batch_op.alter_column(
+            "price_text",
+            new_column_name="price",
+            existing_type=sa.String(),
+            nullable=False,
+        )
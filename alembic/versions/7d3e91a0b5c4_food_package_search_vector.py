@@ -0,0 +1,91 @@
+"""food package search vector
+
+Revision ID: 7d3e91a0b5c4
+Revises: 1cc1aaf6efb6
+Create Date: 2026-10-18 13:02:41.118205
+
+Adds food_packages.search_vector for full text search over a package's name,
+items, category names and description. On Postgres it is a tsvector kept up
+to date by triggers on food_packages, food_package_items, food_categories and
+the category association, searched through a GIN index.
+
+Existing packages are backfilled in chunks of BACKFILL_CHUNK_SIZE, each chunk
+committed on its own, and the index is built concurrently afterwards. Other
+databases only get the column, they search with the in-process index.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from foodie.db.search import (
+    SEARCH_VECTOR_FUNCTIONS,
+    SEARCH_VECTOR_TRIGGERS,
+    SearchVectorType,
+)
+
+# revision identifiers, used by Alembic.
+revision = "7d3e91a0b5c4"
+down_revision = "1cc1aaf6efb6"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_CHUNK_SIZE = 1000
+
+TRIGGERS = {
+    "food_packages_search_vector": "food_packages",
+    "food_package_items_search_vector": "food_package_items",
+    "food_packages_categories_search_vector": (
+        "food_packages_food_categories_association"
+    ),
+    "food_categories_search_vector": "food_categories",
+}
+
+
+def backfill_search_vectors(connection):
+    last_id = None
+    while True:
+        query = "SELECT id FROM food_packages"
+        params = {"limit": BACKFILL_CHUNK_SIZE}
+        if last_id is not None:
+            query += " WHERE id > :last_id"
+            params["last_id"] = last_id
+        rows = connection.execute(
+            sa.text(
+                "SELECT chunk.id, refresh_food_package_search_vector(chunk.id) "
+                f"FROM ({query} ORDER BY id LIMIT :limit) AS chunk ORDER BY chunk.id"
+            ),
+            params,
+        ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1].id
+
+
+def upgrade():
+    op.add_column(
+        "food_packages", sa.Column("search_vector", SearchVectorType(), nullable=True)
+    )
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(SEARCH_VECTOR_FUNCTIONS)
+    op.execute(SEARCH_VECTOR_TRIGGERS)
+    with op.get_context().autocommit_block():
+        backfill_search_vectors(op.get_bind())
+        op.create_index(
+            "ix_food_packages_search_vector",
+            "food_packages",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_food_packages_search_vector", table_name="food_packages")
+        for trigger, table in TRIGGERS.items():
+            op.execute(f"DROP TRIGGER {trigger} ON {table}")
+        op.execute("DROP FUNCTION food_package_search_vector_trigger()")
+        op.execute("DROP FUNCTION refresh_food_package_search_vector(uuid)")
+    with op.batch_alter_table("food_packages") as batch_op:
+        batch_op.drop_column("search_vector")
@@ -0,0 +1,37 @@
+"""principal token epochs
+
+Revision ID: 8c1f4b7e2a69
+Revises: d5b2e8f4a916
+Create Date: 2026-10-18 23:41:27.095513
+
+Adds token_epoch to every principal table. Access tokens carry the epoch of
+their principal and are rejected once it has been bumped, see
+foodie/revocation.py. Existing rows start at 0, the epoch of every token
+issued so far.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8c1f4b7e2a69"
+down_revision = "d5b2e8f4a916"
+branch_labels = None
+depends_on = None
+
+
+PRINCIPAL_TABLES = ("admins", "users", "vendor_users", "courier_users")
+
+
+def upgrade():
+    for table in PRINCIPAL_TABLES:
+        op.add_column(
+            table,
+            sa.Column("token_epoch", sa.Integer(), server_default="0", nullable=False),
+        )
+
+
+def downgrade():
+    for table in PRINCIPAL_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("token_epoch")
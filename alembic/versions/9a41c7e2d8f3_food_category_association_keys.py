@@ -0,0 +1,82 @@
+"""food category association keys
+
+Revision ID: 9a41c7e2d8f3
+Revises: 7d3e91a0b5c4
+Create Date: 2026-10-18 14:21:07.502316
+
+Gives food_packages_food_categories_association a (food_package_id,
+category_id) primary key and a (category_id, food_package_id) index, so
+lookups from either side no longer scan the table.
+
+Rows with a missing side and duplicate pairs are deleted first, neither can
+be part of the key. On Postgres both indexes are built CONCURRENTLY and the
+primary key is then attached to its already built unique index.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy_utils import UUIDType
+
+# revision identifiers, used by Alembic.
+revision = "9a41c7e2d8f3"
+down_revision = "7d3e91a0b5c4"
+branch_labels = None
+depends_on = None
+
+
+TABLE = "food_packages_food_categories_association"
+PRIMARY_KEY = "food_packages_food_categories_association_pkey"
+CATEGORY_INDEX = "ix_food_packages_food_categories_association_category_id"
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    op.execute(
+        f"DELETE FROM {TABLE} " "WHERE food_package_id IS NULL OR category_id IS NULL"
+    )
+    op.execute(
+        f"DELETE FROM {TABLE} AS duplicate USING {TABLE} AS kept "
+        "WHERE duplicate.ctid > kept.ctid "
+        "AND duplicate.food_package_id = kept.food_package_id "
+        "AND duplicate.category_id = kept.category_id"
+        if postgresql
+        else f"DELETE FROM {TABLE} WHERE rowid NOT IN ("
+        f"SELECT MIN(rowid) FROM {TABLE} GROUP BY food_package_id, category_id)"
+    )
+    if not postgresql:
+        with op.batch_alter_table(TABLE) as batch_op:
+            for column in ("food_package_id", "category_id"):
+                batch_op.alter_column(
+                    column, existing_type=UUIDType(binary=False), nullable=False
+                )
+            batch_op.create_primary_key(PRIMARY_KEY, ["food_package_id", "category_id"])
+        op.create_index(CATEGORY_INDEX, TABLE, ["category_id", "food_package_id"])
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(
+            PRIMARY_KEY,
+            TABLE,
+            ["food_package_id", "category_id"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            CATEGORY_INDEX,
+            TABLE,
+            ["category_id", "food_package_id"],
+            postgresql_concurrently=True,
+        )
+    op.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {PRIMARY_KEY} "
+        f"PRIMARY KEY USING INDEX {PRIMARY_KEY}"
+    )
+
+
+def downgrade():
+    op.drop_index(CATEGORY_INDEX, table_name=TABLE)
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.drop_constraint(PRIMARY_KEY, type_="primary")
+        for column in ("food_package_id", "category_id"):
+            batch_op.alter_column(
+                column, existing_type=UUIDType(binary=False), nullable=True
+            )
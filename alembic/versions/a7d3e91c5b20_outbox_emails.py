@@ -0,0 +1,48 @@
+"""outbox emails
+
+Revision ID: a7d3e91c5b20
+Revises: f18a6c3d92e4
+Create Date: 2026-10-18 21:14:52.307118
+
+Emails are written to outbox_emails in the transaction of the change they
+are about and sent afterwards by the dispatcher of foodie/outbox.py. The
+(status, next_attempt_at) index finds the pending emails that are due.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy_utils import UUIDType
+
+# revision identifiers, used by Alembic.
+revision = "a7d3e91c5b20"
+down_revision = "f18a6c3d92e4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "outbox_emails",
+        sa.Column("id", UUIDType(binary=False), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("recipient", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_outbox_emails_status_next_attempt_at",
+        "outbox_emails",
+        ["status", "next_attempt_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_outbox_emails_status_next_attempt_at", "outbox_emails")
+    op.drop_table("outbox_emails")
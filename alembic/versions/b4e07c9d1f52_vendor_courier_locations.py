@@ -0,0 +1,67 @@
+"""vendor and courier locations
+
+Revision ID: b4e07c9d1f52
+Revises: c2f85d1e6a37
+Create Date: 2026-10-18 17:21:06.530117
+
+Adds nullable latitude and longitude columns to vendors and couriers. On
+Postgres, vendors get a GiST index over point(longitude, latitude), built
+concurrently, which answers the bounding box filter of the nearby vendors
+query, see foodie/db/locations.py. Other databases find nearby vendors with
+the in-process grid index.
+
+Dropping the columns recreates the tables on SQLite, whose rating triggers
+refer to vendors and couriers and would fail the rename, so the downgrade
+drops them around the batch operation.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from foodie.db.ratings import drop_trigger_statements, trigger_statements
+
+# revision identifiers, used by Alembic.
+revision = "b4e07c9d1f52"
+down_revision = "c2f85d1e6a37"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ["vendors", "couriers"]
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("latitude", sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column("longitude", sa.Float(), nullable=True))
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_vendors_location",
+            "vendors",
+            [sa.text("point(longitude, latitude)")],
+            postgresql_using="gist",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                "ix_vendors_location",
+                table_name="vendors",
+                postgresql_concurrently=True,
+            )
+    if dialect == "sqlite":
+        for statement in drop_trigger_statements(dialect):
+            op.execute(statement)
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("longitude")
+            batch_op.drop_column("latitude")
+    if dialect == "sqlite":
+        for statement in trigger_statements(dialect):
+            op.execute(statement)
@@ -0,0 +1,93 @@
+"""rating aggregates
+
+Revision ID: c2f85d1e6a37
+Revises: 9a41c7e2d8f3
+Create Date: 2026-10-18 15:08:52.644102
+
+Adds rating_count, rating_sum and rating_1 to rating_5 to vendors, couriers
+and food_packages, and the triggers on the feedback tables that keep them up
+to date, see foodie/db/ratings.py.
+
+The triggers are created before the backfill so no rating is missed once
+the backfill has passed a row. Existing feedback is then counted in chunks
+of BACKFILL_CHUNK_SIZE rows, each chunk committed on its own. Feedback
+written while a chunk is being counted can be counted twice, run
+python -m foodie.db.ratings afterwards if the tables were written to during
+the migration.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from foodie.db.ratings import (
+    RATED_TABLES,
+    drop_trigger_statements,
+    star_sql,
+    trigger_statements,
+)
+
+# revision identifiers, used by Alembic.
+revision = "c2f85d1e6a37"
+down_revision = "9a41c7e2d8f3"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_CHUNK_SIZE = 1000
+
+COLUMNS = [("rating_count", sa.Integer()), ("rating_sum", sa.Float())] + [
+    (f"rating_{star}", sa.Integer()) for star in range(1, 6)
+]
+
+
+def backfill_ratings(connection, feedback: str, table: str, foreign_key: str):
+    counted = f"FROM {feedback} WHERE {feedback}.{foreign_key} = {table}.id"
+    assignments = [
+        f"rating_count = (SELECT COUNT(*) {counted})",
+        f"rating_sum = (SELECT COALESCE(SUM(rating), 0) {counted})",
+    ] + [
+        f"rating_{star} = (SELECT COUNT(*) {counted} AND {star_sql('rating', star)})"
+        for star in range(1, 6)
+    ]
+    last_id = None
+    while True:
+        query = f"SELECT id FROM {table}"
+        params = {"limit": BACKFILL_CHUNK_SIZE}
+        if last_id is not None:
+            query += " WHERE id > :last_id"
+            params["last_id"] = last_id
+        query += " ORDER BY id LIMIT :limit"
+        ids = connection.execute(sa.text(query), params).scalars().all()
+        if not ids:
+            return
+        connection.execute(
+            sa.text(
+                f"UPDATE {table} SET {', '.join(assignments)} "
+                f"WHERE id IN (SELECT id FROM ({query}) AS chunk)"
+            ),
+            params,
+        )
+        last_id = ids[-1]
+
+
+def upgrade():
+    for _, table, _ in RATED_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            for name, type_ in COLUMNS:
+                batch_op.add_column(
+                    sa.Column(name, type_, nullable=False, server_default="0")
+                )
+    dialect = op.get_bind().dialect.name
+    for statement in trigger_statements(dialect):
+        op.execute(statement)
+    with op.get_context().autocommit_block():
+        for feedback, table, foreign_key in RATED_TABLES:
+            backfill_ratings(op.get_bind(), feedback, table, foreign_key)
+
+
+def downgrade():
+    for statement in drop_trigger_statements(op.get_bind().dialect.name):
+        op.execute(statement)
+    for _, table, _ in RATED_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            for name, _ in COLUMNS:
+                batch_op.drop_column(name)
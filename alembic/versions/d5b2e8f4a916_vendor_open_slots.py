@@ -0,0 +1,97 @@
+"""vendor open slots
+
+Revision ID: d5b2e8f4a916
+Revises: a7d3e91c5b20
+Create Date: 2026-10-18 23:05:12.640318
+
+Stores every vendor's week of opening hours as bits in vendor_open_slots,
+see foodie/db/opening_hours.py, so open vendors are filtered in SQL instead
+of against an index kept in each process.
+
+Existing opening hours are converted BACKFILL_CHUNK_SIZE vendors at a time,
+with all of a vendor's days in the same chunk.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy_utils import UUIDType
+from foodie import enums
+from foodie.db.opening_hours import week_words
+from foodie.opening_hours import week_bits
+
+# revision identifiers, used by Alembic.
+revision = "d5b2e8f4a916"
+down_revision = "a7d3e91c5b20"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_CHUNK_SIZE = 1000
+
+open_informations = sa.table(
+    "open_informations",
+    sa.column("vendor_id", UUIDType(binary=False)),
+    sa.column("day", sa.String()),
+    sa.column("open_from", sa.Time()),
+    sa.column("open_to", sa.Time()),
+)
+
+vendor_open_slots = sa.table(
+    "vendor_open_slots",
+    sa.column("vendor_id", UUIDType(binary=False)),
+    sa.column("word", sa.Integer()),
+    sa.column("bits", sa.BigInteger()),
+)
+
+
+def backfill_open_slots(connection):
+    last_vendor_id = None
+    while True:
+        vendors = sa.select(open_informations.c.vendor_id).distinct()
+        if last_vendor_id is not None:
+            vendors = vendors.where(open_informations.c.vendor_id > last_vendor_id)
+        vendor_ids = (
+            connection.execute(
+                vendors.order_by(open_informations.c.vendor_id).limit(
+                    BACKFILL_CHUNK_SIZE
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not vendor_ids:
+            return
+        hours = {vendor_id: [] for vendor_id in vendor_ids}
+        for vendor_id, day, open_from, open_to in connection.execute(
+            sa.select(
+                open_informations.c.vendor_id,
+                open_informations.c.day,
+                open_informations.c.open_from,
+                open_informations.c.open_to,
+            ).where(open_informations.c.vendor_id.in_(vendor_ids))
+        ):
+            hours[vendor_id].append((enums.DaysOfTheWeek(day), open_from, open_to))
+        rows = [
+            {"vendor_id": vendor_id, "word": word, "bits": bits}
+            for vendor_id, vendor_hours in hours.items()
+            for word, bits in week_words(week_bits(vendor_hours)).items()
+        ]
+        if rows:
+            connection.execute(sa.insert(vendor_open_slots), rows)
+        last_vendor_id = vendor_ids[-1]
+
+
+def upgrade():
+    op.create_table(
+        "vendor_open_slots",
+        sa.Column("vendor_id", UUIDType(binary=False), nullable=False),
+        sa.Column("word", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("bits", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["vendor_id"], ["vendors.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("vendor_id", "word"),
+    )
+    backfill_open_slots(op.get_bind())
+
+
+def downgrade():
+    op.drop_table("vendor_open_slots")
@@ -0,0 +1,52 @@
+"""index hot lookup columns
+
+Revision ID: e5b404dc2067
+Revises: 2b357457c2a7
+Create Date: 2026-10-18 09:12:41.118203
+
+On Postgres the indexes are built CONCURRENTLY so logins and invites keep
+working while they build. CREATE INDEX CONCURRENTLY cannot run inside a
+transaction, so each statement runs in an autocommit block. A build that
+fails leaves an INVALID index behind, drop it before running this again.
+The unique indexes fail to build if duplicate (vendor_id, email) or
+(courier_id, email) rows already exist.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5b404dc2067"
+down_revision = "2b357457c2a7"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_vendor_users_email", "vendor_users", ["email"], False),
+    ("ix_vendor_users_vendor_id_email", "vendor_users", ["vendor_id", "email"], True),
+    ("ix_courier_users_email", "courier_users", ["email"], False),
+    (
+        "ix_courier_users_courier_id_email",
+        "courier_users",
+        ["courier_id", "email"],
+        True,
+    ),
+    ("ix_orders_user_id", "orders", ["user_id"], False),
+    ("ix_orders_vendor_id", "orders", ["vendor_id"], False),
+    ("ix_order_events_order_id", "order_events", ["order_id"], False),
+    ("ix_food_packages_vendor_id", "food_packages", ["vendor_id"], False),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name, table, columns, unique=unique, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,36 @@
+"""vendor and courier created_at indexes
+
+Revision ID: f18a6c3d92e4
+Revises: b4e07c9d1f52
+Create Date: 2026-10-18 19:02:37.415926
+
+(created_at, id) indexes answer the keyset pages of the admin vendor and
+courier lists, see foodie/db/keyset.py. On Postgres they are built
+CONCURRENTLY, each in an autocommit block.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f18a6c3d92e4"
+down_revision = "b4e07c9d1f52"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_vendors_created_at_id", "vendors", ["created_at", "id"]),
+    ("ix_couriers_created_at_id", "couriers", ["created_at", "id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
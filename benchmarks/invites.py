@@ -0,0 +1,150 @@
+"""
+Compare invitation lookup latency before and after db/invites.py.
+
+Before, token details and acceptance fetched the vendor by primary key and
+then looked for an existing vendor user with the invited email, two round
+trips. After, one select outer joins the vendor to its users on that
+email. Both are run for the same invitations, half of them to emails that
+already joined, and p50/p95/p99 latencies are reported. The full accept
+request adds the password hash and the insert, the same either way.
+
+Vendors and vendor users are inserted into DATABASE_URL's database and
+deleted afterwards.
+
+usage:
+    DATABASE_URL=postgresql://... SECRET_KEY=... ACTIVITY_TOKEN_SECRET_KEY=... \\
+    CLIENT_HOST=... SALT=... python benchmarks/invites.py \\
+        [--vendors 10000] [--users-per-vendor 5] [--repeat 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import Session
+from foodie import enums
+from foodie.config import DATABASE_URL
+from foodie.db import models
+from foodie.db.invites import INVITE_TARGETS, invite_query
+from foodie.ids import new_id
+
+
+def percentiles(samples: list) -> str:
+    quantiles = statistics.quantiles(samples, n=100)
+    return (
+        f"p50 {quantiles[49] * 1000:8.3f}ms  "
+        f"p95 {quantiles[94] * 1000:8.3f}ms  "
+        f"p99 {quantiles[98] * 1000:8.3f}ms"
+    )
+
+
+def seed(engine, vendors: int, users_per_vendor: int, batch: int = 5000) -> list:
+    vendor_ids = [new_id() for _ in range(vendors)]
+    vendor_rows = [
+        {
+            "id": vendor_id,
+            "name": f"benchmark vendor {vendor_id}",
+            "type": enums.VendorType.RESTAURANT,
+            "address": "benchmark",
+        }
+        for vendor_id in vendor_ids
+    ]
+    user_rows = [
+        {
+            "id": new_id(),
+            "vendor_id": vendor_id,
+            "first_name": "Benchmark",
+            "last_name": "User",
+            "phone_number": "08012345678",
+            "email": f"user{index}@benchmark.com",
+            "role": enums.VendorUserRole.STAFF,
+            "hashed_password": "benchmark",
+        }
+        for vendor_id in vendor_ids
+        for index in range(users_per_vendor)
+    ]
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        for start in range(0, len(vendor_rows), batch):
+            connection.execute(
+                insert(models.Vendor), vendor_rows[start : start + batch]
+            )
+        for start in range(0, len(user_rows), batch):
+            connection.execute(
+                insert(models.VendorUser), user_rows[start : start + batch]
+            )
+    elapsed = time.perf_counter() - started
+    print(f"inserted {vendors} vendors, {len(user_rows)} users in {elapsed:.1f}s")
+    return vendor_ids
+
+
+def teardown(engine, vendor_ids: list, batch: int = 5000):
+    with engine.begin() as connection:
+        for start in range(0, len(vendor_ids), batch):
+            ids = vendor_ids[start : start + batch]
+            connection.execute(
+                delete(models.VendorUser).where(models.VendorUser.vendor_id.in_(ids))
+            )
+            connection.execute(delete(models.Vendor).where(models.Vendor.id.in_(ids)))
+
+
+def two_queries(session: Session, vendor_id, email: str) -> bool:
+    vendor = session.get(models.Vendor, vendor_id)
+    if vendor is None:
+        return False
+    existing_vendor_user = session.execute(
+        select(models.VendorUser)
+        .where(models.VendorUser.vendor_id == vendor.id)
+        .where(models.VendorUser.email == email)
+    ).scalar_one_or_none()
+    return existing_vendor_user is None
+
+
+def one_query(session: Session, vendor_id, email: str) -> bool:
+    target = INVITE_TARGETS[enums.ActivityTokenType.VENDOR_USER_INVITE]
+    row = session.execute(invite_query(target, vendor_id, email)).one_or_none()
+    return row is not None and row[2] is None
+
+
+def measure(name: str, engine, lookup, invites: list) -> list:
+    samples, results = [], []
+    with Session(engine) as session:
+        for vendor_id, email in invites:
+            # a fresh identity map, as each request has
+            session.expunge_all()
+            started = time.perf_counter()
+            results.append(lookup(session, vendor_id, email))
+            samples.append(time.perf_counter() - started)
+    print(f"{name:<12}{percentiles(samples)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vendors", type=int, default=10_000)
+    parser.add_argument("--users-per-vendor", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    engine = create_engine(DATABASE_URL)
+    vendor_ids = seed(engine, args.vendors, args.users_per_vendor)
+    try:
+        invites = [
+            (
+                random.choice(vendor_ids),
+                f"user{random.randrange(args.users_per_vendor * 2)}@benchmark.com",
+            )
+            for _ in range(args.repeat)
+        ]
+        before = measure("two queries", engine, two_queries, invites)
+        after = measure("one query", engine, one_query, invites)
+        assert before == after
+        print(f"{sum(after)} of {len(after)} invitations still open")
+    finally:
+        teardown(engine, vendor_ids)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Measure nearby vendor latency with a hundred thousand vendors.
+
+Synthetic vendors are spread like a food app's would be: most of them
+clustered around a few cities, the rest scattered over the country, so
+city queries have hundreds of vendors within a few kilometres and rural
+ones a handful. Queries are run for several radii and p50/p95/p99
+latencies are reported, next to a scan of every vendor for comparison.
+
+The in-process grid index is always measured. When DATABASE_URL is a
+Postgres database the vendors are inserted too, the queries are run
+through the GiST index on vendors and the vendors are deleted afterwards.
+
+usage:
+    DATABASE_URL=postgresql://... SECRET_KEY=... ACTIVITY_TOKEN_SECRET_KEY=... \\
+    CLIENT_HOST=... SALT=... python benchmarks/nearby.py \\
+        [--vendors 100000] [--repeat 200] [--cell-degrees 0.01]
+"""
+import argparse
+import heapq
+import random
+import statistics
+import time
+import uuid
+from sqlalchemy import create_engine, select, text
+from foodie import enums
+from foodie.config import DATABASE_URL
+from foodie.db import models
+from foodie.db.locations import distance_km, within_bounding_boxes
+from foodie.geo import GridIndex, haversine_km
+
+
+# (latitude, longitude, spread in degrees, share of vendors)
+CITIES = [
+    (6.5244, 3.3792, 0.15, 0.45),  # Lagos
+    (9.0765, 7.3986, 0.1, 0.15),  # Abuja
+    (12.0022, 8.592, 0.08, 0.08),  # Kano
+    (4.8156, 7.0498, 0.08, 0.07),  # Port Harcourt
+    (7.3775, 3.947, 0.08, 0.05),  # Ibadan
+]
+# the rest anywhere in this box
+COUNTRY = (4.3, 2.7, 13.9, 14.6)
+
+SEARCHES = [(2, 20), (5, 20), (20, 20), (50, 100)]
+
+
+def generate_vendors(count: int):
+    for _ in range(count):
+        draw = random.random()
+        for latitude, longitude, spread, share in CITIES:
+            if draw < share:
+                point = (
+                    random.gauss(latitude, spread),
+                    random.gauss(longitude, spread),
+                )
+                break
+            draw -= share
+        else:
+            min_lat, min_lng, max_lat, max_lng = COUNTRY
+            point = (random.uniform(min_lat, max_lat), random.uniform(min_lng, max_lng))
+        yield {"id": uuid.uuid4(), "latitude": point[0], "longitude": point[1]}
+
+
+def generate_queries(count: int) -> list:
+    queries = []
+    for _ in range(count):
+        latitude, longitude, spread, _ = random.choice(CITIES)
+        if random.random() < 0.8:
+            queries.append(
+                (
+                    "city",
+                    random.gauss(latitude, spread),
+                    random.gauss(longitude, spread),
+                )
+            )
+        else:
+            min_lat, min_lng, max_lat, max_lng = COUNTRY
+            queries.append(
+                (
+                    "rural",
+                    random.uniform(min_lat, max_lat),
+                    random.uniform(min_lng, max_lng),
+                )
+            )
+    return queries
+
+
+def percentiles(samples: list) -> str:
+    quantiles = statistics.quantiles(samples, n=100)
+    return (
+        f"p50 {quantiles[49] * 1000:8.3f}ms  "
+        f"p95 {quantiles[94] * 1000:8.3f}ms  "
+        f"p99 {quantiles[98] * 1000:8.3f}ms"
+    )
+
+
+def measure(name: str, nearby, queries: list):
+    for radius_km, limit in SEARCHES:
+        for area in ("city", "rural"):
+            samples, found = [], []
+            for query_area, latitude, longitude in queries:
+                if query_area != area:
+                    continue
+                started = time.perf_counter()
+                results = nearby(latitude, longitude, radius_km, limit)
+                samples.append(time.perf_counter() - started)
+                found.append(len(results))
+            print(
+                f"{name:<8}{area:<6}{radius_km:>3}km limit {limit:<4}"
+                f"found {statistics.mean(found):6.1f}  {percentiles(samples)}"
+            )
+
+
+def run_memory(vendors: list, queries: list, cell_degrees: float):
+    index = GridIndex(cell_degrees)
+    started = time.perf_counter()
+    for vendor in vendors:
+        index.set(vendor["id"], vendor["latitude"], vendor["longitude"])
+    elapsed = time.perf_counter() - started
+    print(f"memory: indexed {len(vendors)} vendors in {elapsed:.2f}s")
+    measure("grid", index.nearest, queries)
+
+    def scan(latitude, longitude, radius_km, limit):
+        distances = (
+            (haversine_km(latitude, longitude, v["latitude"], v["longitude"]), v["id"])
+            for v in vendors
+        )
+        return heapq.nsmallest(
+            limit, (item for item in distances if item[0] <= radius_km)
+        )
+
+    measure("scan", scan, queries[: max(len(queries) // 20, 10)])
+
+
+def run_postgres(vendors: list, queries: list, batch: int = 10000):
+    engine = create_engine(DATABASE_URL)
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(vendors), batch):
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        "INSERT INTO vendors (id, name, type, address, latitude, "
+                        "longitude) VALUES (:id, :name, :type, 'benchmark', "
+                        ":latitude, :longitude)"
+                    ),
+                    [
+                        {
+                            **vendor,
+                            "name": f"benchmark vendor {vendor['id']}",
+                            "type": enums.VendorType.RESTAURANT.name,
+                        }
+                        for vendor in vendors[start : start + batch]
+                    ],
+                )
+        elapsed = time.perf_counter() - started
+        print(f"postgres: inserted {len(vendors)} vendors in {elapsed:.1f}s")
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE vendors"))
+
+        with engine.connect() as connection:
+
+            def nearby(latitude, longitude, radius_km, limit):
+                distance = distance_km(models.Vendor, latitude, longitude)
+                return connection.execute(
+                    select(models.Vendor.id, distance.label("distance"))
+                    .where(
+                        within_bounding_boxes(
+                            models.Vendor, latitude, longitude, radius_km
+                        ),
+                        distance <= radius_km,
+                    )
+                    .order_by(distance, models.Vendor.id)
+                    .limit(limit)
+                ).fetchall()
+
+            measure("postgres", nearby, queries)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text("DELETE FROM vendors WHERE id = ANY(:ids)"),
+                {"ids": [vendor["id"] for vendor in vendors]},
+            )
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vendors", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--cell-degrees", type=float, default=0.01)
+    args = parser.parse_args()
+
+    random.seed(0)
+    vendors = list(generate_vendors(args.vendors))
+    queries = generate_queries(args.repeat)
+    run_memory(vendors, queries, args.cell_degrees)
+    if DATABASE_URL.startswith("postgres"):
+        run_postgres(vendors, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Measure food package search latency with a million packages.
+
+Synthetic packages are built from a vocabulary of dish words plus a long tail
+of rarer words, so common queries match hundreds of thousands of packages
+and rare ones a handful. Every query is run unfiltered and filtered by vendor
+and availability, and p50/p95/p99 latencies are reported.
+
+The in-process index is always measured. When DATABASE_URL is a Postgres
+database the same packages are inserted under a throwaway vendor, the search
+triggers fill food_packages.search_vector, the queries are run through the
+GIN index and the vendor and its packages are deleted afterwards.
+
+usage:
+    DATABASE_URL=postgresql://... SECRET_KEY=... ACTIVITY_TOKEN_SECRET_KEY=... \\
+    CLIENT_HOST=... SALT=... python benchmarks/search.py \\
+        [--packages 1000000] [--vendors 5000] [--repeat 20]
+"""
+import argparse
+import random
+import resource
+import statistics
+import time
+import uuid
+from sqlalchemy import create_engine, text
+from foodie import enums
+from foodie.config import DATABASE_URL
+from foodie.inverted_index import InvertedIndex
+
+
+DISHES = """
+jollof rice fried pounded yam egusi soup suya wrap plantain chicken beef goat
+fish pepper stew beans moi akara amala ewedu efo riro ofada sauce noodles
+spaghetti shawarma burger pizza salad chips gizdodo
+""".split()
+
+QUERIES = [
+    "rice",
+    "jollof rice",
+    "chicken",
+    "pepper soup goat",
+    "egusi pounded yam",
+    "shawarma",
+    "ofada sauce",
+    "zzrare17",
+    "pizza chicken zzrare3",
+]
+
+
+def random_words(count: int) -> str:
+    return " ".join(
+        random.choice(DISHES)
+        if random.random() < 0.8
+        else f"zzrare{int(random.paretovariate(1.2))}"
+        for _ in range(count)
+    )
+
+
+def generate_packages(count: int, vendor_ids: list):
+    for _ in range(count):
+        yield {
+            "id": uuid.uuid4(),
+            "vendor_id": random.choice(vendor_ids),
+            "is_available": random.random() < 0.9,
+            "name": random_words(3).title(),
+            "items": [random_words(2) for _ in range(3)],
+            "description": random_words(10),
+        }
+
+
+def percentiles(samples: list) -> str:
+    quantiles = statistics.quantiles(samples, n=100)
+    return (
+        f"p50 {quantiles[49] * 1000:8.2f}ms  "
+        f"p95 {quantiles[94] * 1000:8.2f}ms  "
+        f"p99 {quantiles[98] * 1000:8.2f}ms"
+    )
+
+
+def measure(search, vendor_id, repeat: int):
+    for query in QUERIES:
+        for label, filters in [
+            ("", {}),
+            ("vendor", {"vendor_id": vendor_id}),
+            ("available", {"is_available": True}),
+        ]:
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                results = search(query, **filters)
+                samples.append(time.perf_counter() - started)
+            print(f"{query:<24}{label:<11}{len(results):>4} {percentiles(samples)}")
+
+
+def run_memory(packages: list, repeat: int):
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for package in packages:
+        index.upsert(
+            package["id"],
+            {
+                "name": package["name"],
+                "items": " ".join(package["items"]),
+                "description": package["description"],
+            },
+            vendor_id=package["vendor_id"],
+            is_available=package["is_available"],
+        )
+    elapsed = time.perf_counter() - started
+    print(
+        f"memory: indexed {len(packages)} packages in {elapsed:.1f}s, "
+        f"max rss {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MiB"
+    )
+    measure(index.search, packages[0]["vendor_id"], repeat)
+
+
+def run_postgres(packages: list, vendor_ids: list, repeat: int, batch: int = 10000):
+    engine = create_engine(DATABASE_URL)
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO vendors (id, name, type, address) "
+                    "VALUES (:id, :name, :type, 'benchmark')"
+                ),
+                [
+                    {
+                        "id": vendor_id,
+                        "name": f"benchmark vendor {vendor_id}",
+                        "type": enums.VendorType.RESTAURANT.name,
+                    }
+                    for vendor_id in vendor_ids
+                ],
+            )
+        started = time.perf_counter()
+        for start in range(0, len(packages), batch):
+            chunk = packages[start : start + batch]
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        "INSERT INTO food_packages (id, vendor_id, is_available, "
+                        "name, description, image_url, price, currency) VALUES "
+                        "(:id, :vendor_id, :is_available, :name, :description, "
+                        "'', 100000, 'NGN')"
+                    ),
+                    chunk,
+                )
+                connection.execute(
+                    text(
+                        "INSERT INTO food_package_items "
+                        "(food_package_id, position, name, key) "
+                        "VALUES (:food_package_id, :position, :name, :name)"
+                    ),
+                    [
+                        {
+                            "food_package_id": package["id"],
+                            "position": position,
+                            "name": name,
+                        }
+                        for package in chunk
+                        for position, name in enumerate(package["items"])
+                    ],
+                )
+        elapsed = time.perf_counter() - started
+        print(f"postgres: inserted {len(packages)} packages in {elapsed:.1f}s")
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE food_packages"))
+
+        with engine.connect() as connection:
+
+            def search(query, vendor_id=None, is_available=None, limit=20):
+                sql = (
+                    "SELECT id, ts_rank_cd(search_vector, query) AS rank "
+                    "FROM food_packages, plainto_tsquery('english', :q) AS query "
+                    "WHERE search_vector @@ query"
+                )
+                if vendor_id is not None:
+                    sql += " AND vendor_id = :vendor_id"
+                if is_available is not None:
+                    sql += " AND is_available = :is_available"
+                return connection.execute(
+                    text(f"{sql} ORDER BY rank DESC, id LIMIT :limit"),
+                    {
+                        "q": query,
+                        "vendor_id": vendor_id,
+                        "is_available": is_available,
+                        "limit": limit,
+                    },
+                ).fetchall()
+
+            measure(search, vendor_ids[0], repeat)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text("DELETE FROM food_packages WHERE vendor_id = ANY(:ids)"),
+                {"ids": vendor_ids},
+            )
+            connection.execute(
+                text("DELETE FROM vendors WHERE id = ANY(:ids)"), {"ids": vendor_ids}
+            )
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=1_000_000)
+    parser.add_argument("--vendors", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    vendor_ids = [uuid.uuid4() for _ in range(args.vendors)]
+    packages = list(generate_packages(args.packages, vendor_ids))
+    run_memory(packages, args.repeat)
+    if DATABASE_URL.startswith("postgres"):
+        run_postgres(packages, vendor_ids, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Compare requests per second of the async routes with DATABASE_ASYNC off
+(sync engine in the threadpool) and on (asyncio engine).
+
+Runs the app under uvicorn once per mode against the same database and
+hits the vendor listing and invitation details endpoints concurrently.
+
+usage:
+    DATABASE_URL=postgresql://... SECRET_KEY=... ACTIVITY_TOKEN_SECRET_KEY=... \\
+    CLIENT_HOST=... SALT=... python benchmarks/session_modes.py \\
+        [--requests 2000] [--concurrency 50] [--vendors 200]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+
+def seed(vendors: int):
+    from foodie import config, enums, util
+    from foodie.db import models
+    from foodie.db.base import Base, SessionLocal
+
+    session = SessionLocal()
+    Base.metadata.create_all(session.get_bind())
+    admin = models.Admin(
+        email="benchmark@admin.com",
+        hashed_password=util.hash_password("password"),
+        first_name="Benchmark",
+        last_name="Admin",
+    )
+    session.add(admin)
+    session.add_all(
+        models.Vendor(
+            name=f"Benchmark Vendor {i}",
+            type=enums.VendorType.RESTAURANT,
+            address="benchmark address",
+        )
+        for i in range(vendors)
+    )
+    session.commit()
+    vendor = session.query(models.Vendor).first()
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.ADMIN, admin.id, expires_delta=timedelta(hours=1)
+    )
+    invite_token = util.create_token(
+        {
+            "id": str(vendor.id),
+            "email": "benchmark_vendor_admin@test.com",
+            "token_type": enums.ActivityTokenType.VENDOR_ADMIN_INVITE,
+        },
+        config.ACTIVITY_TOKEN_SECRET_KEY,
+        timedelta(hours=1),
+    )
+    session.close()
+    return access_token, invite_token
+
+
+def teardown():
+    from foodie.db.base import Base, SessionLocal
+
+    session = SessionLocal()
+    Base.metadata.drop_all(session.get_bind())
+    session.close()
+
+
+def wait_for_server(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url)
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+def load(requests: list, concurrency: int) -> float:
+    def send(request):
+        with urllib.request.urlopen(request) as response:
+            response.read()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(send, requests))
+    return len(requests) / (time.perf_counter() - start)
+
+
+def run_mode(database_async: bool, port: int, args, access_token, invite_token):
+    env = {**os.environ, "DATABASE_ASYNC": str(database_async).lower()}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "foodie.main:app", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}/api"
+    try:
+        wait_for_server(f"{base_url}/docs")
+        vendors = urllib.request.Request(
+            f"{base_url}/admin/vendors/",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        details = urllib.request.Request(
+            f"{base_url}/invites/details?token={invite_token}"
+        )
+        return {
+            "fetch_vendors": load([vendors] * args.requests, args.concurrency),
+            "get_invitation_token_details": load(
+                [details] * args.requests, args.concurrency
+            ),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--vendors", type=int, default=200)
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    access_token, invite_token = seed(args.vendors)
+    try:
+        results = {
+            mode: run_mode(mode == "async", args.port, args, access_token, invite_token)
+            for mode in ("sync", "async")
+        }
+    finally:
+        teardown()
+    print(f"{'endpoint':<32}{'sync rps':>12}{'async rps':>12}")
+    for endpoint in results["sync"]:
+        print(
+            f"{endpoint:<32}"
+            f"{results['sync'][endpoint]:>12.1f}"
+            f"{results['async'][endpoint]:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Compare insert throughput and primary key index size of random UUIDv4 and
+time ordered UUIDv7 ids on a table shaped like order_events.
+
+Each id kind gets its own copy of the table, rows are inserted in batches and
+the time of every batch is recorded so slowdowns as the index grows show up.
+On SQLite each kind gets its own database file next to DATABASE_URL's and the
+index size comes from the dbstat table when available, on Postgres from
+pg_relation_size.
+
+usage:
+    DATABASE_URL=postgresql://... SECRET_KEY=... ACTIVITY_TOKEN_SECRET_KEY=... \\
+    CLIENT_HOST=... SALT=... python benchmarks/uuid_inserts.py \\
+        [--rows 2000000] [--batch 10000]
+"""
+import argparse
+import os
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, create_engine, text
+from sqlalchemy_utils import JSONType, UUIDType
+from foodie.config import DATABASE_URL
+from foodie.ids import uuid7
+
+
+ID_FACTORIES = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def get_table(metadata: MetaData, kind: str) -> Table:
+    return Table(
+        f"benchmark_order_events_{kind}",
+        metadata,
+        Column("id", UUIDType(binary=False), primary_key=True),
+        Column("created_at", DateTime, nullable=False),
+        Column("order_id", UUIDType(binary=False), nullable=False),
+        Column("event_type", String, nullable=False),
+        Column("payload", JSONType, nullable=False),
+    )
+
+
+def get_database_url(kind: str) -> str:
+    if not DATABASE_URL.startswith("sqlite"):
+        return DATABASE_URL
+    root, extension = os.path.splitext(DATABASE_URL)
+    return f"{root}_{kind}{extension or '.db'}"
+
+
+def index_size(connection, table: Table) -> int:
+    if connection.dialect.name == "postgresql":
+        return connection.execute(
+            text("SELECT pg_relation_size(:index)"), {"index": f"{table.name}_pkey"}
+        ).scalar()
+    try:
+        return connection.execute(
+            text(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = :table)"
+            ),
+            {"table": table.name},
+        ).scalar()
+    except Exception:
+        # dbstat is not compiled into every SQLite build, fall back to the
+        # size of the whole database file
+        return os.path.getsize(connection.engine.url.database)
+
+
+def run(kind: str, rows: int, batch: int) -> dict:
+    engine = create_engine(get_database_url(kind))
+    metadata = MetaData()
+    table = get_table(metadata, kind)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    new_id = ID_FACTORIES[kind]
+    order_ids = [uuid.uuid4() for _ in range(1000)]
+    batch_times = []
+    try:
+        with engine.connect() as connection:
+            for start in range(0, rows, batch):
+                values = [
+                    {
+                        "id": new_id(),
+                        "created_at": datetime.utcnow(),
+                        "order_id": order_ids[index % len(order_ids)],
+                        "event_type": "order_created",
+                        "payload": {"index": index},
+                    }
+                    for index in range(start, min(start + batch, rows))
+                ]
+                started = time.perf_counter()
+                with connection.begin():
+                    connection.execute(table.insert(), values)
+                batch_times.append(time.perf_counter() - started)
+            size = index_size(connection, table)
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+    total = sum(batch_times)
+    tail = batch_times[-max(1, len(batch_times) // 10) :]
+    return {
+        "rows/s": rows / total,
+        "last 10% rows/s": batch * len(tail) / sum(tail),
+        "index MiB": size / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = {kind: run(kind, args.rows, args.batch) for kind in ID_FACTORIES}
+    print(f"{'':<20}{'uuid4':>14}{'uuid7':>14}")
+    for metric in results["uuid4"]:
+        print(
+            f"{metric:<20}"
+            f"{results['uuid4'][metric]:>14.1f}"
+            f"{results['uuid7'][metric]:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
+from .admin_router import router as admin_auth_router
 from .router import router as auth_router
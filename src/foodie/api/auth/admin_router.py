@@ -0,0 +1,24 @@
+from uuid import UUID
+from fastapi import APIRouter
+from fastapi.param_functions import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from foodie import enums
+from foodie.api import deps, exceptions
+from foodie.revocation import PRINCIPAL_MODELS, revoke_tokens
+
+
+router = APIRouter()
+
+
+@router.post("/{principal_type}/{principal_id}/revoke")
+async def revoke_sessions(
+    principal_type: enums.PrincipalType,
+    principal_id: UUID,
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """Sign the principal out everywhere, rejecting every token issued so far"""
+    principal = await session.get(PRINCIPAL_MODELS[principal_type], principal_id)
+    if principal is None:
+        raise exceptions.principal_not_found_exception
+    revoke_tokens(principal)
+    await session.commit()
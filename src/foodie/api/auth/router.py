@@ -1,122 +1,167 @@
 from fastapi import APIRouter
 from fastapi.param_functions import Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm.session import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from foodie import util, enums
 from foodie.api import deps, exceptions
 from foodie.db import models
+from foodie.throttle import login_throttle
 from .schema import TokenSchema
 
 
 router = APIRouter()
 
 
+async def verify_login(session: AsyncSession, entity, password: str, login_key: str):
+    if entity is None:
+        login_throttle.record_failure(login_key)
+        raise exceptions.invalid_login_credentials_exception
+    is_match, new_hash = await util.verify_and_update_password_async(
+        password, entity.hashed_password
+    )
+    if not is_match:
+        login_throttle.record_failure(login_key)
+        raise exceptions.invalid_login_credentials_exception
+    login_throttle.record_success(login_key)
+    if new_hash is not None:
+        # the same password under new parameters, an update that bypasses the
+        # flush so the principal's tokens are not revoked
+        model = type(entity)
+        await session.execute(
+            update(model)
+            .where(model.id == entity.id)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+
 @router.post("/auth", response_model=TokenSchema)
-def authenticate(
+async def authenticate(
+    login_key: str = Depends(deps.check_login_attempt),
     data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(deps.get_session),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
     user: models.User = (
-        session.query(models.User)
-        .filter(models.User.email == data.username)
-        .one_or_none()
+        await session.execute(
+            select(models.User).where(models.User.email == data.username)
+        )
+    ).scalar_one_or_none()
+    await verify_login(session, user, data.password, login_key)
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.USER, user.id, epoch=user.token_epoch
     )
-    if not user:
-        raise exceptions.invalid_login_credentials_exception
-    if not util.password_is_match(data.password, user.hashed_password):
-        raise exceptions.invalid_login_credentials_exception
-    access_token = util.create_access_token({"sub": str(user.id)})
     return TokenSchema(access_token=access_token)
 
 
 @router.post("/auth/admin", response_model=TokenSchema)
-def authenticate_admin(
+async def authenticate_admin(
+    login_key: str = Depends(deps.check_login_attempt),
     data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(deps.get_session),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
     admin: models.Admin = (
-        session.query(models.Admin)
-        .filter(models.Admin.email == data.username)
-        .one_or_none()
+        await session.execute(
+            select(models.Admin).where(models.Admin.email == data.username)
+        )
+    ).scalar_one_or_none()
+    await verify_login(session, admin, data.password, login_key)
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.ADMIN, admin.id, epoch=admin.token_epoch
     )
-    if not admin:
-        raise exceptions.invalid_login_credentials_exception
-    if not util.password_is_match(data.password, admin.hashed_password):
-        raise exceptions.invalid_login_credentials_exception
-    access_token = util.create_access_token({"sub": str(admin.id)})
     return TokenSchema(access_token=access_token)
 
 
 @router.post("/auth/courier", response_model=TokenSchema)
-def authenticate_courier(
+async def authenticate_courier(
+    login_key: str = Depends(deps.check_login_attempt),
     data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(deps.get_session),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
     user: models.CourierUser = (
-        session.query(models.CourierUser)
-        .filter(models.CourierUser.email == data.username)
-        .filter(models.CourierUser.role == enums.CourierUserRole.ADMIN)
-        .one_or_none()
+        await session.execute(
+            select(models.CourierUser)
+            .where(models.CourierUser.email == data.username)
+            .where(models.CourierUser.role == enums.CourierUserRole.ADMIN)
+        )
+    ).scalar_one_or_none()
+    await verify_login(session, user, data.password, login_key)
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.COURIER_USER,
+        user.id,
+        role=user.role,
+        courier_id=user.courier_id,
+        epoch=user.token_epoch,
     )
-    if not user:
-        raise exceptions.invalid_login_credentials_exception
-    if not util.password_is_match(data.password, user.hashed_password):
-        raise exceptions.invalid_login_credentials_exception
-    access_token = util.create_access_token({"sub": str(user.id)})
     return TokenSchema(access_token=access_token)
 
 
 @router.post("/auth/vendor", response_model=TokenSchema)
-def authenticate_vendor(
+async def authenticate_vendor(
+    login_key: str = Depends(deps.check_login_attempt),
     data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(deps.get_session),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
     user: models.VendorUser = (
-        session.query(models.VendorUser)
-        .filter(models.VendorUser.email == data.username)
-        .one_or_none()
+        await session.execute(
+            select(models.VendorUser).where(models.VendorUser.email == data.username)
+        )
+    ).scalar_one_or_none()
+    await verify_login(session, user, data.password, login_key)
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        user.id,
+        role=user.role,
+        vendor_id=user.vendor_id,
+        epoch=user.token_epoch,
     )
-    if not user:
-        raise exceptions.invalid_login_credentials_exception
-    if not util.password_is_match(data.password, user.hashed_password):
-        raise exceptions.invalid_login_credentials_exception
-    access_token = util.create_access_token({"sub": str(user.id)})
     return TokenSchema(access_token=access_token)
 
 
 @router.post("/auth/courier-admin", response_model=TokenSchema)
-def authenticate_courier_admin(
+async def authenticate_courier_admin(
+    login_key: str = Depends(deps.check_login_attempt),
     data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(deps.get_session),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
     user: models.CourierUser = (
-        session.query(models.CourierUser)
-        .filter(models.CourierUser.email == data.username)
-        .filter(models.CourierUser.role == enums.CourierUserRole.ADMIN)
-        .one_or_none()
+        await session.execute(
+            select(models.CourierUser)
+            .where(models.CourierUser.email == data.username)
+            .where(models.CourierUser.role == enums.CourierUserRole.ADMIN)
+        )
+    ).scalar_one_or_none()
+    await verify_login(session, user, data.password, login_key)
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.COURIER_USER,
+        user.id,
+        role=user.role,
+        courier_id=user.courier_id,
+        epoch=user.token_epoch,
     )
-    if not user:
-        raise exceptions.invalid_login_credentials_exception
-    if not util.password_is_match(data.password, user.hashed_password):
-        raise exceptions.invalid_login_credentials_exception
-    access_token = util.create_access_token({"sub": str(user.id)})
     return TokenSchema(access_token=access_token)
 
 
 @router.post("/auth/vendor-admin", response_model=TokenSchema)
-def authenticate_vendor_admin(
+async def authenticate_vendor_admin(
+    login_key: str = Depends(deps.check_login_attempt),
     data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(deps.get_session),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
     user: models.VendorUser = (
-        session.query(models.VendorUser)
-        .filter(models.VendorUser.email == data.username)
-        .filter(models.VendorUser.role == enums.VendorUserRole.ADMIN)
-        .one_or_none()
+        await session.execute(
+            select(models.VendorUser)
+            .where(models.VendorUser.email == data.username)
+            .where(models.VendorUser.role == enums.VendorUserRole.ADMIN)
+        )
+    ).scalar_one_or_none()
+    await verify_login(session, user, data.password, login_key)
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        user.id,
+        role=user.role,
+        vendor_id=user.vendor_id,
+        epoch=user.token_epoch,
     )
-    if not user:
-        raise exceptions.invalid_login_credentials_exception
-    if not util.password_is_match(data.password, user.hashed_password):
-        raise exceptions.invalid_login_credentials_exception
-    access_token = util.create_access_token({"sub": str(user.id)})
     return TokenSchema(access_token=access_token)
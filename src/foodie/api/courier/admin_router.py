@@ -1,10 +1,14 @@
-from typing import List
+from typing import Optional
 from fastapi import APIRouter
 from fastapi.param_functions import Depends
-from sqlalchemy.orm.session import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.exceptions import HTTPException
+from foodie import enums
 from foodie.api import deps
-from foodie.db import models
+from foodie.api.pagination import CursorPagination
+from foodie.api.schema import CursorPageSchema
+from foodie.db import keyset, models
 from .schema import CourierSchema, CourierCreateSchema
 
 
@@ -12,22 +16,39 @@ router = APIRouter()
 
 
 @router.post("/", response_model=CourierSchema, status_code=201)
-def create_courier(
-    payload: CourierCreateSchema, session: Session = Depends(deps.get_session)
+async def create_courier(
+    payload: CourierCreateSchema,
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
     existing_courier = (
-        session.query(models.Courier)
-        .filter(models.Courier.name == payload.name)
-        .one_or_none()
-    )
+        await session.execute(
+            select(models.Courier).where(models.Courier.name == payload.name)
+        )
+    ).scalar_one_or_none()
     if existing_courier is not None:
         raise HTTPException(409, "Courier already exists")
     new_courier = models.Courier(**payload.dict(by_alias=False))
     session.add(new_courier)
-    session.commit()
+    await session.commit()
+    await session.refresh(new_courier)
     return new_courier
 
 
-@router.get("/", response_model=List[CourierSchema])
-def fetch_couriers(session: Session = Depends(deps.get_session)):
-    return session.query(models.Courier).all()
+@router.get("/", response_model=CursorPageSchema[CourierSchema])
+async def fetch_couriers(
+    sort: Optional[enums.RatingSort] = None,
+    name: Optional[str] = None,
+    pagination: CursorPagination = Depends(),
+    session: AsyncSession = Depends(deps.get_read_session),
+):
+    """A page of couriers, oldest first or by rating, with name in their name"""
+    query = select(models.Courier)
+    if name:
+        query = query.where(
+            func.lower(models.Courier.name).contains(name.lower(), autoescape=True)
+        )
+    if sort is None:
+        keys = keyset.created_keys(models.Courier)
+    else:
+        keys = models.Courier.rating_keys(sort == enums.RatingSort.RATING_DESC)
+    return await pagination.fetch(session, query, keys)
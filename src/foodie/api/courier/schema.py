@@ -1,10 +1,10 @@
-from foodie.api.schema import BaseSchema, OrmSchema
+from foodie.api.schema import LocationSchema, OrmSchema, RatingSchema
 
 
-class CourierCreateSchema(BaseSchema):
+class CourierCreateSchema(LocationSchema):
     name: str
     address: str
 
 
-class CourierSchema(OrmSchema, CourierCreateSchema):
+class CourierSchema(OrmSchema, RatingSchema, CourierCreateSchema):
     pass
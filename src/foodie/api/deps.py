@@ -1,11 +1,32 @@
+import hashlib
+import math
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
-from fastapi import Depends
-from fastapi.security import OAuth2PasswordBearer
+from jwt import PyJWTError
+from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
-from foodie import enums, util
+from starlette.concurrency import run_in_threadpool
+from foodie import enums, opening_hours, util
+from foodie.dataclasses import Principal
 from foodie.db import models
-from foodie.db.base import SessionLocal
+from foodie.db.base import (
+    AsyncSessionLocal,
+    SessionLocal,
+    replica_set,
+    threaded_session_slots,
+    write_tracker,
+)
+from foodie.db.replicas import Replica
+from foodie.db.session import SessionSlots, ThreadedAsyncSession
 from foodie.api import exceptions
+from foodie.revocation import revocation_table
+from foodie.throttle import login_throttle
 
 
 user_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth")
@@ -20,107 +41,222 @@ vendor_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/vendor")
 courier_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/courier")
 
 
-def get_session() -> Session:
+def get_client_key(request: Request) -> str:
+    """Identifies the caller, by a digest of its access token when it has one"""
+    authorization = request.headers.get("Authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host
+
+
+def get_session(request: Request) -> Session:
     session: Session = SessionLocal()
+    write_tracker.track(session, get_client_key(request))
     try:
         yield session
     finally:
         session.close()
 
 
-def get_current_user(
-    token: bytes = Depends(user_oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> models.User:
-    user_id: str = util.decode_access_token(token)
-    user: models.User = session.query(models.User).get(UUID(user_id))
-    if not user:
+@asynccontextmanager
+async def open_async_session(
+    session_factory: sessionmaker,
+    async_session_factory: Optional[sessionmaker],
+    session_slots: SessionSlots,
+    client_key: str,
+) -> AsyncSession:
+    if async_session_factory is not None:
+        async with async_session_factory() as session:
+            write_tracker.track(session.sync_session, client_key)
+            yield session
+    else:
+        async with session_slots:
+            session: Session = session_factory()
+            write_tracker.track(session, client_key)
+            try:
+                yield ThreadedAsyncSession(session)
+            finally:
+                await run_in_threadpool(session.close)
+
+
+async def get_async_session(request: Request) -> AsyncSession:
+    """
+    Session for async routes, an AsyncSession when DATABASE_ASYNC is enabled
+    otherwise a sync session whose round trips run in the threadpool.
+    """
+    async with open_async_session(
+        SessionLocal,
+        AsyncSessionLocal,
+        threaded_session_slots,
+        get_client_key(request),
+    ) as session:
+        yield session
+
+
+def choose_replica(client_key: str) -> Optional[Replica]:
+    """
+    The next healthy replica, None when there is none or the caller's own
+    recent writes may not have replicated yet
+    """
+    if replica_set and not write_tracker.wrote_recently(client_key):
+        return replica_set.choose()
+    return None
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """
+    Session for read only routes, bound to the next healthy replica.
+    Falls back to the primary when no replica is configured or healthy and
+    while the caller's own recent writes may not have replicated yet.
+    """
+    client_key = get_client_key(request)
+    replica = choose_replica(client_key)
+    if replica is None:
+        session_args = (SessionLocal, AsyncSessionLocal, threaded_session_slots)
+    else:
+        session_args = (
+            replica.session_factory,
+            replica.async_session_factory,
+            replica.session_slots,
+        )
+    async with open_async_session(*session_args, client_key) as session:
+        yield session
+
+
+def get_read_session_factory(request: Request) -> sessionmaker:
+    """
+    Factory of sync sessions for long reads that manage their own session,
+    bound to a replica like get_read_session
+    """
+    replica = choose_replica(get_client_key(request))
+    return SessionLocal if replica is None else replica.session_factory
+
+
+def check_login_attempt(
+    request: Request, data: OAuth2PasswordRequestForm = Depends()
+) -> str:
+    """
+    Reject logins for an email and client address with too many recent
+    failures, returns the key to record the outcome of the attempt against.
+    """
+    client_host = request.client.host if request.client else ""
+    login_key = login_throttle.key(data.username, client_host)
+    retry_after = login_throttle.retry_after(login_key)
+    if retry_after > 0:
+        login_throttle.record_rejection()
+        raise exceptions.too_many_login_attempts_exception(math.ceil(retry_after))
+    return login_key
+
+
+def get_principal(token: bytes) -> Principal:
+    """
+    Authenticate the token from its verified claims alone.
+    """
+    try:
+        principal = Principal.from_claims(util.decode_access_token(token))
+    except (PyJWTError, ValidationError):
+        raise exceptions.credentials_exception
+    if revocation_table.is_revoked(principal):
+        raise exceptions.credentials_exception
+    return principal
+
+
+def get_current_user(token: bytes = Depends(user_oauth2_scheme)) -> Principal:
+    user = get_principal(token)
+    if user.principal_type != enums.PrincipalType.USER:
         raise exceptions.credentials_exception
     return user
 
 
-def get_current_admin(
-    token: bytes = Depends(admin_oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> models.Admin:
-    admin_id: str = util.decode_access_token(token)
-    admin: models.Admin = session.query(models.Admin).get(UUID(admin_id))
-    if not admin:
+def get_current_admin(token: bytes = Depends(admin_oauth2_scheme)) -> Principal:
+    admin = get_principal(token)
+    if admin.principal_type != enums.PrincipalType.ADMIN:
         raise exceptions.credentials_exception
     return admin
 
 
 def get_current_vendor_admin(
     token: bytes = Depends(vendor_admin_oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> models.VendorUser:
-    vendor_admin_id: str = util.decode_access_token(token)
-    vendor_admin: models.VendorUser = (
-        session.query(models.VendorUser)
-        .filter(models.VendorUser.id == UUID(vendor_admin_id))
-        .filter(models.VendorUser.role == enums.VendorUserRole.ADMIN)
-        .one_or_none()
-    )
-    if vendor_admin is None:
+) -> Principal:
+    vendor_admin = get_principal(token)
+    if (
+        vendor_admin.principal_type != enums.PrincipalType.VENDOR_USER
+        or vendor_admin.role != enums.VendorUserRole.ADMIN
+        or vendor_admin.vendor_id is None
+    ):
         raise exceptions.credentials_exception
     return vendor_admin
 
 
 def get_current_courier_admin(
     token: bytes = Depends(courier_admin_oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> models.CourierUser:
-    courier_admin_id: str = util.decode_access_token(token)
-    courier_admin: models.CourierUser = (
-        session.query(models.CourierUser)
-        .filter(models.CourierUser.id == UUID(courier_admin_id))
-        .filter(models.CourierUser.role == enums.CourierUserRole.ADMIN)
-        .one_or_none()
-    )
-    if courier_admin is None:
+) -> Principal:
+    courier_admin = get_principal(token)
+    if (
+        courier_admin.principal_type != enums.PrincipalType.COURIER_USER
+        or courier_admin.role != enums.CourierUserRole.ADMIN
+        or courier_admin.courier_id is None
+    ):
         raise exceptions.credentials_exception
     return courier_admin
 
 
-def get_current_vendor(
-    token: bytes = Depends(vendor_oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> models.VendorUser:
-    vendor_id: str = util.decode_access_token(token)
-    vendor: models.VendorUser = session.query(models.VendorUser).get(
-        UUID(vendor_id)
-    )  # noqa
-    if vendor is None:
+def get_current_vendor(token: bytes = Depends(vendor_oauth2_scheme)) -> Principal:
+    vendor = get_principal(token)
+    if (
+        vendor.principal_type != enums.PrincipalType.VENDOR_USER
+        or vendor.vendor_id is None
+    ):
         raise exceptions.credentials_exception
     return vendor
 
 
-def get_current_courier(
-    token: bytes = Depends(courier_oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> models.CourierUser:
-    courier_id: str = util.decode_access_token(token)
-    courier: models.CourierUser = session.query(models.CourierUser).get(
-        UUID(courier_id)
-    )
-    if courier is None:
+def get_current_vendor_manager(
+    token: bytes = Depends(vendor_oauth2_scheme),
+) -> Principal:
+    vendor_manager = get_current_vendor(token)
+    if vendor_manager.role not in (
+        enums.VendorUserRole.ADMIN,
+        enums.VendorUserRole.MANAGER,
+    ):
+        raise exceptions.credentials_exception
+    return vendor_manager
+
+
+def get_current_courier(token: bytes = Depends(courier_oauth2_scheme)) -> Principal:
+    courier = get_principal(token)
+    if (
+        courier.principal_type != enums.PrincipalType.COURIER_USER
+        or courier.courier_id is None
+    ):
         raise exceptions.credentials_exception
     return courier
 
 
-def get_vendor(
-    vendor_id: UUID, session: Session = Depends(get_session)
+async def get_vendor(
+    vendor_id: UUID, session: AsyncSession = Depends(get_async_session)
 ) -> models.Vendor:
-    vendor: models.Vendor = session.query(models.Vendor).get(vendor_id)
+    vendor: models.Vendor = await session.get(models.Vendor, vendor_id)
     if vendor is None:
         raise exceptions.vendor_not_found_exception
     return vendor
 
 
-def get_courier(
-    courier_id: UUID, session: Session = Depends(get_session)
+async def get_courier(
+    courier_id: UUID, session: AsyncSession = Depends(get_async_session)
 ) -> models.Courier:
-    courier: models.Courier = session.query(models.Courier).get(courier_id)
+    courier: models.Courier = await session.get(models.Courier, courier_id)
     if courier is None:
         raise exceptions.courier_not_found_exception
     return courier
+
+
+def get_open_slot(
+    open_now: bool = False, open_at: Optional[datetime] = None
+) -> Optional[int]:
+    """Week slot vendors must be open in, when the caller filters on it"""
+    if open_at is not None:
+        return opening_hours.week_slot(open_at)
+    if open_now:
+        return opening_hours.week_slot(datetime.utcnow())
+    return None
@@ -1,4 +1,5 @@
 from fastapi import status, HTTPException
+from foodie import config
 
 credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -20,6 +21,14 @@ courier_not_found_exception = HTTPException(
     status_code=status.HTTP_404_NOT_FOUND, detail="Courier not found"
 )
 
+food_package_not_found_exception = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Food package not found"
+)
+
+food_category_not_found_exception = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Food category not found"
+)
+
 vendor_user_not_found_exception = HTTPException(
     status_code=status.HTTP_404_NOT_FOUND, detail="Vendor user not found"
 )
@@ -28,6 +37,42 @@ courier_user_not_found_exception = HTTPException(
     status_code=status.HTTP_404_NOT_FOUND, detail="Courier user not found"
 )
 
+principal_not_found_exception = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND, detail="Principal not found"
+)
+
 invalid_or_expired_token_exception = HTTPException(
     status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token"
 )
+
+invalid_cursor_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+)
+
+too_many_invite_emails_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail=f"At most {config.BULK_INVITE_MAX_EMAILS} emails can be invited at once",
+)
+
+invalid_csv_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid CSV file"
+)
+
+food_package_filter_required_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Filter by at least one item or category",
+)
+
+password_hasher_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Server is busy, please try again",
+    headers={"Retry-After": "1"},
+)
+
+
+def too_many_login_attempts_exception(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many failed login attempts",
+        headers={"Retry-After": str(retry_after)},
+    )
@@ -0,0 +1 @@
+from .admin_router import router as admin_export_router
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import StreamingResponse
+from foodie import enums
+from foodie.api import deps
+from foodie.exports import MEDIA_TYPES, export_table
+
+
+router = APIRouter()
+
+
+@router.get("/{table}")
+async def export(
+    table: enums.ExportTable,
+    format: enums.ExportFormat = enums.ExportFormat.NDJSON,
+    gzip: bool = False,
+    session_factory: sessionmaker = Depends(deps.get_read_session_factory),
+):
+    """
+    Every row of table as NDJSON, one object per line, or CSV with a header
+    row, streamed as it is read. gzip compresses the stream on the fly.
+    """
+    headers = {
+        "Content-Disposition": f'attachment; filename="{table.value}.{format.value}"'
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_table(session_factory, table, format, compress=gzip),
+        media_type=MEDIA_TYPES[format],
+        headers=headers,
+    )
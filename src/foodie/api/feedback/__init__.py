@@ -0,0 +1,2 @@
+from .admin_router import router as admin_feedback_router
+from .router import router as feedback_router
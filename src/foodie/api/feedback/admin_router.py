@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends
+from pydantic import conlist
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from foodie import enums
+from foodie.api import deps
+from foodie.db import models
+from foodie.db.feedback import import_feedback
+from .schema import FeedbackImportResultSchema, FeedbackImportRowSchema
+
+
+router = APIRouter()
+
+FEEDBACK_MODELS = {
+    enums.FeedbackTarget.VENDORS: models.UserVendorFeedback,
+    enums.FeedbackTarget.COURIERS: models.UserCourierFeedback,
+    enums.FeedbackTarget.FOOD_PACKAGES: models.UserFoodPackageFeedback,
+}
+
+
+@router.post("/{target}/import", response_model=FeedbackImportResultSchema)
+async def import_historical_feedback(
+    target: enums.FeedbackTarget,
+    payload: conlist(FeedbackImportRowSchema, min_items=1, max_items=50000),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Import ratings given elsewhere or before feedback was recorded. A row
+    replaces a user's existing feedback only if it is newer, rows naming an
+    unknown user or target are reported back and skipped.
+    """
+    rows = [row.dict(by_alias=False) for row in payload]
+    try:
+        report = await session.run_sync(import_feedback, FEEDBACK_MODELS[target], rows)
+    except IntegrityError:
+        # a user or target was deleted after the rows were checked, checking
+        # them again rejects its rows
+        await session.rollback()
+        report = await session.run_sync(import_feedback, FEEDBACK_MODELS[target], rows)
+    await session.commit()
+    return report
@@ -0,0 +1,96 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from foodie.api import deps, exceptions
+from foodie.dataclasses import Principal
+from foodie.db import models
+from foodie.db.feedback import feedback_upsert
+from .schema import FeedbackCreateSchema
+
+
+router = APIRouter()
+
+
+async def save_feedback(
+    session: AsyncSession,
+    feedback_model,
+    target_id: UUID,
+    user: Principal,
+    payload: FeedbackCreateSchema,
+    not_found: HTTPException,
+) -> Response:
+    try:
+        result = await session.execute(
+            feedback_upsert(
+                feedback_model, target_id, user.id, payload.rating, payload.feedback
+            )
+        )
+    except IntegrityError:
+        # the user or the target was deleted by a transaction that committed
+        # while the statement ran, a deleted user's token is no longer valid
+        await session.rollback()
+        if await session.scalar(
+            select(models.User.id).where(models.User.id == user.id)
+        ):
+            raise not_found
+        raise exceptions.credentials_exception
+    if not result.rowcount:
+        raise not_found
+    await session.commit()
+    return Response(status_code=204)
+
+
+@router.put("/vendors/{vendor_id}/feedback", status_code=204)
+async def submit_vendor_feedback(
+    vendor_id: UUID,
+    payload: FeedbackCreateSchema,
+    user: Principal = Depends(deps.get_current_user),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """Rate a vendor, replacing the user's earlier rating of it"""
+    return await save_feedback(
+        session,
+        models.UserVendorFeedback,
+        vendor_id,
+        user,
+        payload,
+        exceptions.vendor_not_found_exception,
+    )
+
+
+@router.put("/couriers/{courier_id}/feedback", status_code=204)
+async def submit_courier_feedback(
+    courier_id: UUID,
+    payload: FeedbackCreateSchema,
+    user: Principal = Depends(deps.get_current_user),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """Rate a courier, replacing the user's earlier rating of it"""
+    return await save_feedback(
+        session,
+        models.UserCourierFeedback,
+        courier_id,
+        user,
+        payload,
+        exceptions.courier_not_found_exception,
+    )
+
+
+@router.put("/food-packages/{food_package_id}/feedback", status_code=204)
+async def submit_food_package_feedback(
+    food_package_id: UUID,
+    payload: FeedbackCreateSchema,
+    user: Principal = Depends(deps.get_current_user),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """Rate a food package, replacing the user's earlier rating of it"""
+    return await save_feedback(
+        session,
+        models.UserFoodPackageFeedback,
+        food_package_id,
+        user,
+        payload,
+        exceptions.food_package_not_found_exception,
+    )
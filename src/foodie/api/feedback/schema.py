@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from uuid import UUID
+from pydantic import confloat, constr, validator
+from foodie.api.schema import BaseSchema
+
+
+class FeedbackCreateSchema(BaseSchema):
+    rating: confloat(ge=1, le=5)
+    feedback: Optional[constr(max_length=2000)] = None
+
+
+class FeedbackImportRowSchema(FeedbackCreateSchema):
+    user_id: UUID
+    target_id: UUID
+    created_at: datetime
+
+    @validator("created_at")
+    def to_naive_utc(cls, created_at: datetime) -> datetime:
+        # timestamps are stored as naive UTC
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return created_at
+
+
+class FeedbackImportRejectionSchema(BaseSchema):
+    index: int
+    reason: str
+
+
+class FeedbackImportResultSchema(BaseSchema):
+    imported: int
+    rejected: List[FeedbackImportRejectionSchema]
@@ -1,68 +1,133 @@
 from datetime import timedelta
-from fastapi import APIRouter
+from uuid import UUID
+from fastapi import APIRouter, File, UploadFile
 from fastapi.param_functions import Depends
 from pydantic.networks import EmailStr
-from sqlalchemy.orm.session import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.exceptions import HTTPException
 from foodie import config, enums, util
 from foodie.api import deps
-from foodie.db import models
+from foodie.db.invites import INVITE_TARGETS, lookup_invite
+from .bulk import NOT_FOUND, bulk_invite_report, read_upload_emails
+from .emails import queue_invite_email
+from .schema import BulkInviteReportSchema, BulkInviteSchema
 
 
 router = APIRouter()
 
 
-@router.post("/vendors/{vendor_id}")
-def invite_vendor_admin(
-    email: EmailStr,
-    vendor: models.Vendor = Depends(deps.get_vendor),
-    session: Session = Depends(deps.get_session),
+async def invite_admin(
+    session: AsyncSession,
+    token_type: enums.ActivityTokenType,
+    organisation_id: UUID,
+    email: str,
 ):
-    existing_vendor_user_with_same_email = (
-        session.query(models.VendorUser)
-        .filter(models.VendorUser.vendor_id == vendor.id)
-        .filter(models.VendorUser.email == email)
-        .one_or_none()
-    )
-    if existing_vendor_user_with_same_email:
-        raise HTTPException(400, "Vendor user with same email exists")
+    """Queue the invitation of email to be an admin of the organisation"""
+    invite = await lookup_invite(session, token_type, organisation_id, email)
+    if invite is None:
+        raise NOT_FOUND[INVITE_TARGETS[token_type].organisation]
+    if invite.joined:
+        raise HTTPException(
+            400, f"{invite.target.user_type.capitalize()} user with same email exists"
+        )
     invite_token = util.create_token(
-        {
-            "id": str(vendor.id),
-            "email": email,
-            "token_type": enums.ActivityTokenType.VENDOR_ADMIN_INVITE,
-        },
+        {"id": str(organisation_id), "email": email, "token_type": token_type},
         config.ACTIVITY_TOKEN_SECRET_KEY,
         timedelta(hours=1),
     )
-    print("\n\n\n\n\n")
-    print(f"vendor admin invite token is: {invite_token}")
-    print("\n\n\n\n\n\n")
+    queue_invite_email(
+        session, email, invite_token, invite.organisation_name, invite.target.role.value
+    )
+    await session.commit()
+
+
+@router.post("/vendors/{vendor_id}")
+async def invite_vendor_admin(
+    vendor_id: UUID,
+    email: EmailStr,
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    await invite_admin(
+        session, enums.ActivityTokenType.VENDOR_ADMIN_INVITE, vendor_id, email
+    )
 
 
 @router.post("/couriers/{courier_id}")
-def invite_courier_admin(
+async def invite_courier_admin(
+    courier_id: UUID,
     email: EmailStr,
-    courier: models.Courier = Depends(deps.get_courier),
-    session: Session = Depends(deps.get_session),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
-    existing_courier_user_with_same_email = (
-        session.query(models.CourierUser)
-        .filter(models.CourierUser.courier_id == courier.id)
-        .filter(models.CourierUser.email == email)
-        .one_or_none()
+    await invite_admin(
+        session, enums.ActivityTokenType.COURIER_ADMIN_INVITE, courier_id, email
     )
-    if existing_courier_user_with_same_email:
-        raise HTTPException(400, "Courier user with same email exists")
-    invite_token = util.create_token(
-        {
-            "id": str(courier.id),
-            "email": email,
-            "token_type": enums.ActivityTokenType.COURIER_ADMIN_INVITE,
-        },
-        config.ACTIVITY_TOKEN_SECRET_KEY,
-        timedelta(hours=1),
+
+
+@router.post("/vendors/{vendor_id}/bulk", response_model=BulkInviteReportSchema)
+async def bulk_invite_vendor_admins(
+    vendor_id: UUID,
+    payload: BulkInviteSchema,
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Invite many emails at once as admins of the vendor, reporting for each
+    whether it was invited, already a vendor user, a duplicate or not an email
+    """
+    return await bulk_invite_report(
+        session, enums.ActivityTokenType.VENDOR_ADMIN_INVITE, vendor_id, payload.emails
+    )
+
+
+@router.post("/vendors/{vendor_id}/bulk/csv", response_model=BulkInviteReportSchema)
+async def bulk_invite_vendor_admins_from_csv(
+    vendor_id: UUID,
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Invite the emails of a CSV file, its "email" column or its first one, as
+    admins of the vendor
+    """
+    return await bulk_invite_report(
+        session,
+        enums.ActivityTokenType.VENDOR_ADMIN_INVITE,
+        vendor_id,
+        await read_upload_emails(file),
+    )
+
+
+@router.post("/couriers/{courier_id}/bulk", response_model=BulkInviteReportSchema)
+async def bulk_invite_courier_admins(
+    courier_id: UUID,
+    payload: BulkInviteSchema,
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Invite many emails at once as admins of the courier, reporting for each
+    whether it was invited, already a courier user, a duplicate or not an
+    email
+    """
+    return await bulk_invite_report(
+        session,
+        enums.ActivityTokenType.COURIER_ADMIN_INVITE,
+        courier_id,
+        payload.emails,
+    )
+
+
+@router.post("/couriers/{courier_id}/bulk/csv", response_model=BulkInviteReportSchema)
+async def bulk_invite_courier_admins_from_csv(
+    courier_id: UUID,
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Invite the emails of a CSV file, its "email" column or its first one, as
+    admins of the courier
+    """
+    return await bulk_invite_report(
+        session,
+        enums.ActivityTokenType.COURIER_ADMIN_INVITE,
+        courier_id,
+        await read_upload_emails(file),
     )
-    print("\n\n\n\n\n")
-    print(f"courier admin invite token is: {invite_token}")
-    print("\n\n\n\n\n\n")
@@ -0,0 +1,120 @@
+"""
+Invitations to many emails in one call.
+
+Emails are validated and deduplicated in memory, checked against the
+organisation's users with the batched IN queries of db/invites.py, and the
+invitations of the rest are signed in one pass and queued to the outbox with
+executemany inserts, all in the caller's transaction. Every email gets a
+status in the report, in the order it was given.
+"""
+import csv
+import io
+from datetime import timedelta
+from typing import List
+from uuid import UUID
+from fastapi import UploadFile
+from pydantic.errors import EmailError
+from pydantic.networks import validate_email
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from foodie import config, enums, util
+from foodie.api import exceptions
+from foodie.db import models
+from foodie.db.invites import INVITE_TARGETS, existing_members, organisation_name
+from foodie.outbox import queue_emails
+from .emails import invite_email
+
+
+NOT_FOUND = {
+    models.Vendor: exceptions.vendor_not_found_exception,
+    models.Courier: exceptions.courier_not_found_exception,
+}
+
+
+def read_csv_emails(data: bytes) -> List[str]:
+    """
+    The emails of a CSV upload: its "email" column when the first row names
+    one, its first column otherwise. Raises ValueError on undecodable data.
+    """
+    rows = [row for row in csv.reader(io.StringIO(data.decode("utf-8-sig"))) if row]
+    if not rows:
+        return []
+    header = [cell.strip().casefold() for cell in rows[0]]
+    if "email" in header:
+        column = header.index("email")
+        rows = rows[1:]
+    else:
+        column = 0
+    return [row[column] if column < len(row) else "" for row in rows]
+
+
+def bulk_invite(
+    session: Session,
+    token_type: enums.ActivityTokenType,
+    organisation_id: UUID,
+    emails: List[str],
+) -> List[dict]:
+    """Invite emails to the organisation, the status of each email"""
+    target = INVITE_TARGETS[token_type]
+    name = organisation_name(session, target, organisation_id)
+    if name is None:
+        raise NOT_FOUND[target.organisation]
+    results = []
+    candidates = {}
+    for given in emails:
+        try:
+            _, email = validate_email(given)
+        except EmailError:
+            results.append(
+                {"email": given, "status": enums.BulkInviteStatus.INVALID_EMAIL}
+            )
+            continue
+        result = {"email": email, "status": enums.BulkInviteStatus.DUPLICATE}
+        if email not in candidates:
+            candidates[email] = result
+        results.append(result)
+    if not candidates:
+        return results
+
+    members = existing_members(session, target, organisation_id, list(candidates))
+    expires_delta = timedelta(hours=1)
+    outbox = []
+    for email, result in candidates.items():
+        if email in members:
+            result["status"] = enums.BulkInviteStatus.EXISTING_MEMBER
+            continue
+        token = util.create_token(
+            {"id": str(organisation_id), "email": email, "token_type": token_type},
+            config.ACTIVITY_TOKEN_SECRET_KEY,
+            expires_delta,
+        )
+        outbox.append(invite_email(email, token, name, target.role.value))
+        result["status"] = enums.BulkInviteStatus.INVITED
+    queue_emails(session, outbox)
+    return results
+
+
+async def read_upload_emails(file: UploadFile) -> List[str]:
+    try:
+        return read_csv_emails(await file.read())
+    except (UnicodeDecodeError, csv.Error):
+        raise exceptions.invalid_csv_exception
+
+
+async def bulk_invite_report(
+    session: AsyncSession,
+    token_type: enums.ActivityTokenType,
+    organisation_id: UUID,
+    emails: List[str],
+) -> dict:
+    """Run bulk_invite in one transaction, as a BulkInviteReportSchema"""
+    if len(emails) > config.BULK_INVITE_MAX_EMAILS:
+        raise exceptions.too_many_invite_emails_exception
+    results = await session.run_sync(bulk_invite, token_type, organisation_id, emails)
+    await session.commit()
+    return {
+        "invited": sum(
+            result["status"] == enums.BulkInviteStatus.INVITED for result in results
+        ),
+        "results": results,
+    }
@@ -0,0 +1,24 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from foodie import config
+from foodie.outbox import queue_email
+
+
+def invite_email(email: str, token: str, name: str, role: str) -> dict:
+    """The recipient, subject and body of the email carrying an invitation"""
+    link = f"{config.CLIENT_HOST}/invites/accept?token={token}"
+    return {
+        "recipient": email,
+        "subject": f"You have been invited to {name} on {config.PROJECT_NAME}",
+        "body": (
+            f"You have been invited to join {name} as {role} on "
+            f"{config.PROJECT_NAME}.\n\n"
+            f"Accept the invitation within the hour at {link}\n"
+        ),
+    }
+
+
+def queue_invite_email(
+    session: AsyncSession, email: str, token: str, name: str, role: str
+):
+    """Add the email carrying an invitation token to session's outbox"""
+    queue_email(session, **invite_email(email, token, name, role))
@@ -1,6 +1,7 @@
-from typing import Literal
-from pydantic import validator
+from typing import List, Literal
+from pydantic import conlist, validator
 from pydantic.networks import EmailStr
+from foodie import config, enums
 from foodie.api.schema import BaseSchema
 
 
@@ -21,3 +22,17 @@ class InviteTokenDetailsSchema(BaseSchema):
     user_type: Literal["vendor", "courier"]
     role: Literal["admin", "staff", "manager"]
     name: str
+
+
+class BulkInviteSchema(BaseSchema):
+    emails: conlist(str, min_items=1, max_items=config.BULK_INVITE_MAX_EMAILS)
+
+
+class BulkInviteResultSchema(BaseSchema):
+    email: str
+    status: enums.BulkInviteStatus
+
+
+class BulkInviteReportSchema(BaseSchema):
+    invited: int
+    results: List[BulkInviteResultSchema]
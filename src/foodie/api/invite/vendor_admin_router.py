@@ -1,39 +1,77 @@
 from datetime import timedelta
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, File, HTTPException, Depends, UploadFile
 from pydantic.networks import EmailStr
-from sqlalchemy.orm.session import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from foodie import config, enums, util
+from foodie.dataclasses import Principal
 from foodie.api import deps
-from foodie.db import models
+from foodie.db.invites import find_invite
+from .bulk import bulk_invite_report, read_upload_emails
+from .emails import queue_invite_email
+from .schema import BulkInviteReportSchema, BulkInviteSchema
 
 
 router = APIRouter()
 
 
 @router.post("/")
-def invite_vendor_user(
+async def invite_vendor_user(
     email: EmailStr,
-    vendor_admin: models.VendorUser = Depends(deps.get_current_vendor_admin),
-    session: Session = Depends(deps.get_session),
+    vendor_admin: Principal = Depends(deps.get_current_vendor_admin),
+    session: AsyncSession = Depends(deps.get_async_session),
 ):
-    vendor: models.Vendor = vendor_admin.vendor
-    existing_vendor_user_with_same_email = (
-        session.query(models.VendorUser)
-        .filter(models.VendorUser.vendor_id == vendor.id)
-        .filter(models.VendorUser.email == email)
-        .one_or_none()
+    vendor_id = vendor_admin.vendor_id
+    # the vendor's name for the email, none if the email already joined it
+    invite = await find_invite(
+        session, enums.ActivityTokenType.VENDOR_USER_INVITE, vendor_id, email
     )
-    if existing_vendor_user_with_same_email:
+    if invite is None:
         raise HTTPException(400, "Vendor user with same email exists")
     invite_token = util.create_token(
         {
-            "vendor_id": str(vendor.id),
+            "id": str(vendor_id),
             "email": email,
             "token_type": enums.ActivityTokenType.VENDOR_USER_INVITE,
         },
         config.ACTIVITY_TOKEN_SECRET_KEY,
         timedelta(hours=1),
     )
-    print("\n\n\n\n\n")
-    print(f"vendor user invite token is: {invite_token}")
-    print("\n\n\n\n\n\n")
+    queue_invite_email(
+        session, email, invite_token, invite.organisation_name, invite.target.role.value
+    )
+    await session.commit()
+
+
+@router.post("/bulk", response_model=BulkInviteReportSchema)
+async def bulk_invite_vendor_users(
+    payload: BulkInviteSchema,
+    vendor_admin: Principal = Depends(deps.get_current_vendor_admin),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Invite many emails at once, reporting for each whether it was invited,
+    already a vendor user, a duplicate or not an email
+    """
+    return await bulk_invite_report(
+        session,
+        enums.ActivityTokenType.VENDOR_USER_INVITE,
+        vendor_admin.vendor_id,
+        payload.emails,
+    )
+
+
+@router.post("/bulk/csv", response_model=BulkInviteReportSchema)
+async def bulk_invite_vendor_users_from_csv(
+    file: UploadFile = File(...),
+    vendor_admin: Principal = Depends(deps.get_current_vendor_admin),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Invite the emails of a CSV file, its "email" column or its first one
+    """
+    return await bulk_invite_report(
+        session,
+        enums.ActivityTokenType.VENDOR_USER_INVITE,
+        vendor_admin.vendor_id,
+        await read_upload_emails(file),
+    )
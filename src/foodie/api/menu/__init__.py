@@ -0,0 +1,2 @@
+from .router import router as menu_router
+from .vendor_router import router as vendor_menu_router
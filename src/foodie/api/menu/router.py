@@ -0,0 +1,113 @@
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from foodie import enums
+from foodie.api import deps, exceptions
+from foodie.categories import category_index
+from foodie.db import models
+from .schema import CategoryFacetsSchema, FoodPackageSchema
+
+
+router = APIRouter()
+
+
+def with_items(query, items: Optional[List[str]]):
+    """
+    Restrict query to food packages containing every one of items, matched
+    on the normalized item name through the (key, food_package_id) index.
+    """
+    for item in items or []:
+        query = query.where(
+            models.FoodPackage.id.in_(
+                select(models.FoodPackageItem.food_package_id).where(
+                    models.FoodPackageItem.key == models.FoodPackageItem.normalize(item)
+                )
+            )
+        )
+    return query
+
+
+@router.get("/vendors/{vendor_id}/menu", response_model=List[FoodPackageSchema])
+async def fetch_vendor_menu(
+    vendor_id: UUID,
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    item: Optional[List[str]] = Query(None),
+    sort: enums.MenuSort = enums.MenuSort.PRICE,
+    session: AsyncSession = Depends(deps.get_read_session),
+):
+    """
+    Available food packages of a vendor, prices are in the currency's minor
+    unit. Filtering and ordering are answered by the
+    (vendor_id, is_available, price) index. Repeat item to only get packages
+    containing all of the given items.
+    """
+    vendor: models.Vendor = await session.get(models.Vendor, vendor_id)
+    if vendor is None:
+        raise exceptions.vendor_not_found_exception
+    query = (
+        select(models.FoodPackage)
+        .where(models.FoodPackage.vendor_id == vendor.id)
+        .where(models.FoodPackage.is_available)
+    )
+    if min_price is not None:
+        query = query.where(models.FoodPackage.price >= min_price)
+    if max_price is not None:
+        query = query.where(models.FoodPackage.price <= max_price)
+    query = with_items(query, item)
+    if sort == enums.MenuSort.PRICE_DESC:
+        query = query.order_by(models.FoodPackage.price.desc())
+    elif sort in (enums.MenuSort.RATING, enums.MenuSort.RATING_DESC):
+        query = query.order_by(
+            *models.FoodPackage.rating_order(sort == enums.MenuSort.RATING_DESC)
+        )
+    else:
+        query = query.order_by(models.FoodPackage.price)
+    return (await session.execute(query)).scalars().all()
+
+
+@router.get("/food-packages", response_model=List[FoodPackageSchema])
+async def fetch_food_packages(
+    item: Optional[List[str]] = Query(None),
+    category: Optional[List[UUID]] = Query(None),
+    any_category: Optional[List[UUID]] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    session: AsyncSession = Depends(deps.get_read_session),
+):
+    """
+    Available food packages across vendors containing all of the given
+    items, in every given category and in at least one of any_category
+    """
+    if not (item or category or any_category):
+        raise exceptions.food_package_filter_required_exception
+    query = select(models.FoodPackage).where(models.FoodPackage.is_available)
+    query = category_index.where_categories(
+        with_items(query, item), category or (), any_category or (), True
+    )
+    query = query.order_by(models.FoodPackage.price, models.FoodPackage.id)
+    return (await session.execute(query.limit(limit))).scalars().all()
+
+
+@router.get("/food-categories/facets", response_model=CategoryFacetsSchema)
+async def fetch_food_category_facets(
+    category: Optional[List[UUID]] = Query(None),
+    any_category: Optional[List[UUID]] = Query(None),
+    available: Optional[bool] = True,
+    session: AsyncSession = Depends(deps.get_read_session),
+):
+    """
+    Number of food packages in every category of category and in at least
+    one of any_category, and how many of those fall in each category
+    """
+    total, facets = await category_index.facet_counts(
+        session, category or (), any_category or (), available
+    )
+    return {
+        "total": total,
+        "categories": [
+            {"id": category_id, "name": name, "count": count}
+            for category_id, name, count in facets
+        ],
+    }
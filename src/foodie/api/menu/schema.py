@@ -0,0 +1,64 @@
+from typing import List, Optional
+from uuid import UUID
+from pydantic import conint, conlist, constr, validator
+from foodie.api.schema import BaseSchema, OrmSchema, RatingSchema
+from foodie.db import models
+
+
+class FoodPackageSchema(OrmSchema, RatingSchema):
+    name: str
+    description: str
+    image_url: str
+    items: Optional[List[str]] = None
+    price: int
+    currency: str
+    is_available: bool
+    vendor_id: UUID
+
+    @validator("items", pre=True)
+    def items_to_list(cls, items):
+        # FoodPackage.items is an association proxy, not a list
+        return list(items) if items is not None else None
+
+
+class CategoryFacetSchema(BaseSchema):
+    id: UUID
+    name: str
+    count: int
+
+
+class CategoryFacetsSchema(BaseSchema):
+    total: int
+    categories: List[CategoryFacetSchema]
+
+
+class MenuPackageSchema(BaseSchema):
+    name: constr(strip_whitespace=True, min_length=1)
+    description: str
+    image_url: str
+    items: List[str] = []
+    price: conint(ge=0)
+    currency: Optional[constr(min_length=3, max_length=3)] = None
+    is_available: bool = True
+    categories: List[UUID] = []
+
+
+class MenuSyncSchema(BaseSchema):
+    packages: conlist(MenuPackageSchema, max_items=5000)
+    # delete packages left out instead of marking them unavailable
+    delete_missing: bool = False
+
+    @validator("packages")
+    def unique_names(cls, packages):
+        names = {models.FoodPackageItem.normalize(package.name) for package in packages}
+        if len(names) != len(packages):
+            raise ValueError("Food package names must be unique")
+        return packages
+
+
+class MenuSyncResultSchema(BaseSchema):
+    created: int
+    updated: int
+    deleted: int
+    withdrawn: int
+    unchanged: int
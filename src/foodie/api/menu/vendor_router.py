@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from foodie.api import deps, exceptions
+from foodie.categories import MemoryCategoryIndex, category_index
+from foodie.dataclasses import Principal
+from foodie.db import models
+from foodie.db.feedback import existing_ids
+from foodie.db.menus import MenuChanges, batches, sync_menu
+from foodie.search import MemorySearch, food_package_search
+from .schema import MenuSyncResultSchema, MenuSyncSchema
+
+
+router = APIRouter()
+
+
+def refresh_indexes(session: Session, changes: MenuChanges):
+    """Apply a menu sync to the in-process indexes its writes went around"""
+    for package_ids in batches(changes.created + changes.updated + changes.withdrawn):
+        food_packages = (
+            session.execute(
+                select(models.FoodPackage)
+                .where(models.FoodPackage.id.in_(package_ids))
+                .options(selectinload(models.FoodPackage.categories))
+            )
+            .scalars()
+            .all()
+        )
+        if isinstance(food_package_search, MemorySearch):
+            food_package_search.index_packages(food_packages)
+        if isinstance(category_index, MemoryCategoryIndex):
+            for food_package in food_packages:
+                category_index.set_package(
+                    food_package.id,
+                    [category.id for category in food_package.categories],
+                    food_package.is_available is not False,
+                )
+    if isinstance(food_package_search, MemorySearch):
+        food_package_search.remove_packages(changes.deleted)
+    if isinstance(category_index, MemoryCategoryIndex):
+        for package_id in changes.deleted:
+            category_index.remove_package(package_id)
+
+
+@router.put("/", response_model=MenuSyncResultSchema)
+async def sync_vendor_menu(
+    payload: MenuSyncSchema,
+    vendor_manager: Principal = Depends(deps.get_current_vendor_manager),
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Replace the vendor's menu with payload in one transaction. Packages are
+    matched by name, only those that changed are written and those left out
+    are marked unavailable, or deleted with delete_missing unless rated.
+    """
+    category_ids = {
+        category_id
+        for package in payload.packages
+        for category_id in package.categories
+    }
+    if category_ids:
+        found = await session.run_sync(existing_ids, models.FoodCategory, category_ids)
+        if len(found) != len(category_ids):
+            raise exceptions.food_category_not_found_exception
+    changes = await session.run_sync(
+        sync_menu,
+        vendor_manager.vendor_id,
+        [package.dict(by_alias=False) for package in payload.packages],
+        payload.delete_missing,
+    )
+    await session.commit()
+    await session.run_sync(refresh_indexes, changes)
+    return changes.summary()
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from foodie import util
+from foodie.db.base import replica_set
+from foodie.db.pool import pool_metrics
+from foodie.hashing import password_hasher
+from foodie.throttle import login_throttle
+
+
+router = APIRouter()
+
+
+@router.get("/password-hasher")
+def get_password_hasher_metrics():
+    return password_hasher.stats()
+
+
+@router.get("/access-token-cache")
+def get_access_token_cache_metrics():
+    return util.access_token_cache.stats()
+
+
+@router.get("/login-throttle")
+def get_login_throttle_metrics():
+    return login_throttle.stats()
+
+
+@router.get("/database-pool")
+def get_database_pool_metrics():
+    return [metrics.stats() for metrics in pool_metrics.values()]
+
+
+@router.get("/replicas")
+def get_replica_metrics():
+    return replica_set.stats()
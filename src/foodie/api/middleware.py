@@ -0,0 +1,58 @@
+import logging
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from foodie.db.query_stats import track_queries
+
+
+logger = logging.getLogger("foodie.requests")
+
+
+class QueryStatsMiddleware:
+    """
+    Counts the statements each request runs, see foodie/db/query_stats.py.
+    The count, total and slowest statement time go out in a Server-Timing
+    header and in the extra fields of a log record per request.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        # the api app is mounted, its paths are relative to the mount
+        path = scope.get("root_path", "") + scope["path"]
+        status = 500
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if self.server_timing:
+                        headers = MutableHeaders(scope=message)
+                        headers.append("Server-Timing", stats.server_timing())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                duration_ms = round((time.perf_counter() - started) * 1000, 3)
+                logger.info(
+                    "%s %s %s %s queries",
+                    scope["method"],
+                    path,
+                    status,
+                    stats.count,
+                    extra={
+                        "method": scope["method"],
+                        "path": path,
+                        "status": status,
+                        "duration_ms": duration_ms,
+                        **stats.log_fields(),
+                    },
+                )
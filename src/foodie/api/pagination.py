@@ -0,0 +1,64 @@
+from typing import Callable, Optional, Sequence
+from fastapi import Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from foodie.api import exceptions
+from foodie.db import keyset
+
+
+class CursorPagination:
+    """
+    Dependency paging a list endpoint by keyset, see foodie/db/keyset.py.
+    cursor is the nextCursor of the previous page, none for the first one.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        page_size: int = Query(50, ge=1, le=200),
+    ):
+        self.cursor = cursor
+        self.page_size = page_size
+
+    async def fetch(
+        self,
+        session: AsyncSession,
+        query,
+        keys: Sequence[keyset.Key],
+        accept: Optional[Callable] = None,
+    ) -> dict:
+        """
+        The page of query's entities ordered by keys, as a
+        CursorPageSchema. Entities accept returns False for are skipped,
+        reading on until the page is full or the rows run out.
+        """
+        values = None
+        if self.cursor is not None:
+            values = keyset.decode_cursor(keys, self.cursor)
+            if values is None:
+                raise exceptions.invalid_cursor_exception
+        query = query.add_columns(*keyset.key_columns(keys)).order_by(
+            *keyset.order_by(keys)
+        )
+        # one row more than the page tells whether there is a next one
+        limit = self.page_size + 1
+        items = []
+        while True:
+            page_query = (
+                query if values is None else query.where(keyset.after(keys, values))
+            )
+            rows = (await session.execute(page_query.limit(limit))).all()
+            for row in rows:
+                if len(items) == self.page_size:
+                    return self.page(items, values)
+                if accept is None or accept(row[0]):
+                    items.append(row[0])
+                values = row[1:]
+            if len(rows) < limit:
+                return self.page(items, None)
+
+    def page(self, items: list, values: Optional[Sequence]) -> dict:
+        return {
+            "items": items,
+            "page_size": self.page_size,
+            "next_cursor": None if values is None else keyset.encode_cursor(values),
+        }
@@ -1,9 +1,15 @@
 from fastapi import APIRouter
 from foodie.api.auth import (
+    admin_auth_router,
     auth_router,
 )
-from foodie.api.vendor import admin_vendor_router
+from foodie.api.vendor import admin_vendor_router, vendor_router
 from foodie.api.courier import admin_courier_router
+from foodie.api.export import admin_export_router
+from foodie.api.feedback import admin_feedback_router, feedback_router
+from foodie.api.menu import menu_router, vendor_menu_router
+from foodie.api.metrics import admin_metrics_router
+from foodie.api.search import search_router
 from foodie.api.invite import (
     admin_invite_router,
     courier_admin_invite_router,
@@ -24,6 +30,18 @@ def get_admin_router():
     admin_router.include_router(
         admin_invite_router, prefix="/invites", tags=["Invites"]
     )
+    admin_router.include_router(
+        admin_feedback_router, prefix="/feedback", tags=["Feedback"]
+    )
+    admin_router.include_router(
+        admin_metrics_router, prefix="/metrics", tags=["Metrics"]
+    )
+    admin_router.include_router(
+        admin_export_router, prefix="/exports", tags=["Exports"]
+    )
+    admin_router.include_router(
+        admin_auth_router, prefix="/sessions", tags=["Authentication"]
+    )
     return admin_router
 
 
@@ -48,6 +66,7 @@ def get_courier_admin_router():
 def get_vendor_router():
     """Router for all vendor endpoints"""
     vendor_router = APIRouter()
+    vendor_router.include_router(vendor_menu_router, prefix="/menu", tags=["Menus"])
     return vendor_router
 
 
@@ -62,4 +81,8 @@ def get_router():
     router = APIRouter()
     router.include_router(auth_router, tags=["Authentication"])
     router.include_router(invite_router, prefix="/invites", tags=["Invites"])
+    router.include_router(menu_router, tags=["Menus"])
+    router.include_router(search_router, tags=["Search"])
+    router.include_router(feedback_router, tags=["Feedback"])
+    router.include_router(vendor_router, tags=["Vendors"])
     return router
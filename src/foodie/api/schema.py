@@ -1,7 +1,8 @@
 import inflection
-from typing import Optional
+from typing import Dict, Generic, List, Optional, TypeVar
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, confloat, root_validator
+from pydantic.generics import GenericModel
 from datetime import datetime
 
 
@@ -30,7 +31,33 @@ class OrmSchema(OrmWithDateTimeSchema, OrmWithIdSchema):
     pass
 
 
+class RatingSchema(BaseOrmSchema):
+    rating: Optional[float] = None
+    rating_count: int = 0
+    rating_histogram: Dict[int, int] = {}
+
+
+class LocationSchema(BaseSchema):
+    latitude: Optional[confloat(ge=-90, le=90)] = None
+    longitude: Optional[confloat(ge=-180, le=180)] = None
+
+    @root_validator(skip_on_failure=True)
+    def both_or_neither(cls, values):
+        if (values.get("latitude") is None) != (values.get("longitude") is None):
+            raise ValueError("Set both latitude and longitude or neither")
+        return values
+
+
 class BasePaginationSchema(BaseSchema):
     page: int
     page_size: int
     count: int
+
+
+ItemT = TypeVar("ItemT")
+
+
+class CursorPageSchema(BaseSchema, GenericModel, Generic[ItemT]):
+    items: List[ItemT]
+    page_size: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,41 @@
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from foodie.api import deps
+from foodie.api.menu.schema import FoodPackageSchema
+from foodie.search import food_package_search
+from .schema import FoodPackageSearchResultSchema
+
+
+router = APIRouter()
+
+
+@router.get("/search/food-packages", response_model=List[FoodPackageSearchResultSchema])
+async def search_food_packages(
+    q: str = Query(..., min_length=1, max_length=200),
+    vendor_id: Optional[UUID] = None,
+    category_id: Optional[UUID] = None,
+    available: Optional[bool] = True,
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(deps.get_read_session),
+):
+    """
+    Food packages matching every word of q in their name, items, categories
+    or description, best match first. Names weigh more than items and
+    categories, which weigh more than descriptions.
+    """
+    results = await food_package_search.search(
+        session,
+        q,
+        limit=limit,
+        vendor_id=vendor_id,
+        is_available=available,
+        category_id=category_id,
+    )
+    return [
+        FoodPackageSearchResultSchema(
+            **FoodPackageSchema.from_orm(food_package).dict(), rank=rank
+        )
+        for food_package, rank in results
+    ]
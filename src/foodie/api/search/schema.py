@@ -0,0 +1,5 @@
+from foodie.api.menu.schema import FoodPackageSchema
+
+
+class FoodPackageSearchResultSchema(FoodPackageSchema):
+    rank: float
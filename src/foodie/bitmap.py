@@ -0,0 +1,252 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, Union
+
+
+Container = Union[array, int]
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+LOW_MASK = CHUNK_SIZE - 1
+
+# set bit positions of every byte value, used to list the members of a dense
+# container without testing 65536 bits one by one
+BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+if hasattr(int, "bit_count"):  # python 3.10+
+    popcount = int.bit_count
+else:
+
+    def popcount(bits: int) -> int:
+        return bin(bits).count("1")
+
+
+def to_int(values: Iterable[int]) -> int:
+    data = bytearray(CHUNK_SIZE // 8)
+    for value in values:
+        data[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(data, "little")
+
+
+def to_array(bits: int) -> array:
+    values = array("H")
+    for index, byte in enumerate(bits.to_bytes(CHUNK_SIZE // 8, "little")):
+        if byte:
+            base = index << 3
+            values.extend(base + bit for bit in BYTE_BITS[byte])
+    return values
+
+
+class Bitmap:
+    """
+    Compressed set of integers in [0, 2**32), laid out like a roaring bitmap.
+
+    Values are grouped into chunks by their high 16 bits. A chunk with at
+    most ARRAY_MAX members is a sorted array of the low 16 bits, a denser
+    chunk is a 65536 bit int, so sparse sets cost two bytes per member and
+    dense ones an eighth of a byte, and intersections and unions of dense
+    chunks run as single int operations.
+    """
+
+    ARRAY_MAX = 4096
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._chunks: Dict[int, Container] = {}
+        grouped: Dict[int, list] = {}
+        for value in values:
+            grouped.setdefault(value >> CHUNK_BITS, []).append(value & LOW_MASK)
+        for high, lows in grouped.items():
+            self._chunks[high] = self._container(sorted(set(lows)))
+
+    @classmethod
+    def _from_chunks(cls, chunks: Dict[int, Container]) -> "Bitmap":
+        bitmap = cls()
+        bitmap._chunks = chunks
+        return bitmap
+
+    @classmethod
+    def _container(cls, lows) -> Container:
+        if len(lows) > cls.ARRAY_MAX:
+            return to_int(lows)
+        return array("H", lows)
+
+    @classmethod
+    def _shrink(cls, bits: int) -> Container:
+        if popcount(bits) > cls.ARRAY_MAX:
+            return bits
+        return to_array(bits)
+
+    def add(self, value: int):
+        high, low = value >> CHUNK_BITS, value & LOW_MASK
+        chunk = self._chunks.get(high)
+        if chunk is None:
+            self._chunks[high] = array("H", [low])
+        elif isinstance(chunk, int):
+            self._chunks[high] = chunk | 1 << low
+        else:
+            index = bisect_left(chunk, low)
+            if index < len(chunk) and chunk[index] == low:
+                return
+            chunk.insert(index, low)
+            if len(chunk) > self.ARRAY_MAX:
+                self._chunks[high] = to_int(chunk)
+
+    def discard(self, value: int):
+        high, low = value >> CHUNK_BITS, value & LOW_MASK
+        chunk = self._chunks.get(high)
+        if chunk is None:
+            return
+        if isinstance(chunk, int):
+            chunk &= ~(1 << low)
+            self._chunks[high] = self._shrink(chunk)
+        else:
+            index = bisect_left(chunk, low)
+            if index < len(chunk) and chunk[index] == low:
+                del chunk[index]
+        if not self._chunks[high]:
+            del self._chunks[high]
+
+    def __contains__(self, value: int) -> bool:
+        chunk = self._chunks.get(value >> CHUNK_BITS)
+        if chunk is None:
+            return False
+        low = value & LOW_MASK
+        if isinstance(chunk, int):
+            return bool(chunk >> low & 1)
+        index = bisect_left(chunk, low)
+        return index < len(chunk) and chunk[index] == low
+
+    def __len__(self) -> int:
+        return sum(
+            popcount(chunk) if isinstance(chunk, int) else len(chunk)
+            for chunk in self._chunks.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._chunks):
+            chunk = self._chunks[high]
+            base = high << CHUNK_BITS
+            lows = to_array(chunk) if isinstance(chunk, int) else chunk
+            for low in lows:
+                yield base | low
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"Bitmap(len={len(self)})"
+
+    def copy(self) -> "Bitmap":
+        return self._from_chunks(
+            {
+                high: chunk if isinstance(chunk, int) else array("H", chunk)
+                for high, chunk in self._chunks.items()
+            }
+        )
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        chunks = {}
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        for high, chunk in small.items():
+            other_chunk = large.get(high)
+            if other_chunk is None:
+                continue
+            result = _intersect(chunk, other_chunk)
+            if result:
+                chunks[high] = result
+        return self._from_chunks(chunks)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        chunks = self.copy()._chunks
+        for high, chunk in other._chunks.items():
+            mine = chunks.get(high)
+            if mine is None:
+                chunks[high] = chunk if isinstance(chunk, int) else array("H", chunk)
+            else:
+                chunks[high] = _union(mine, chunk)
+        return self._from_chunks(chunks)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        chunks = {}
+        for high, chunk in self._chunks.items():
+            other_chunk = other._chunks.get(high)
+            if other_chunk is None:
+                chunks[high] = chunk if isinstance(chunk, int) else array("H", chunk)
+                continue
+            result = _difference(chunk, other_chunk)
+            if result:
+                chunks[high] = result
+        return self._from_chunks(chunks)
+
+    def intersection_len(self, other: "Bitmap") -> int:
+        """len(self & other) without building the intersection"""
+        count = 0
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        for high, chunk in small.items():
+            other_chunk = large.get(high)
+            if other_chunk is None:
+                continue
+            if isinstance(chunk, int) and isinstance(other_chunk, int):
+                count += popcount(chunk & other_chunk)
+            elif isinstance(chunk, int):
+                count += popcount(chunk & to_int(other_chunk))
+            elif isinstance(other_chunk, int):
+                count += popcount(other_chunk & to_int(chunk))
+            else:
+                count += len(set(chunk).intersection(other_chunk))
+        return count
+
+    @classmethod
+    def intersection(cls, bitmaps: Iterable["Bitmap"]) -> "Bitmap":
+        """Members of every bitmap, smallest first so the work shrinks"""
+        result = None
+        for bitmap in sorted(bitmaps, key=lambda bitmap: len(bitmap._chunks)):
+            result = bitmap.copy() if result is None else result & bitmap
+            if not result:
+                break
+        return result if result is not None else cls()
+
+    @classmethod
+    def union(cls, bitmaps: Iterable["Bitmap"]) -> "Bitmap":
+        result = cls()
+        for bitmap in bitmaps:
+            result = result | bitmap
+        return result
+
+
+def _intersect(chunk: Container, other: Container) -> Container:
+    if isinstance(chunk, int) and isinstance(other, int):
+        return Bitmap._shrink(chunk & other)
+    if isinstance(chunk, int):
+        chunk, other = other, chunk
+    if isinstance(other, int):
+        return array("H", (low for low in chunk if other >> low & 1))
+    return array("H", sorted(set(chunk).intersection(other)))
+
+
+def _union(chunk: Container, other: Container) -> Container:
+    if isinstance(chunk, int) and isinstance(other, int):
+        return chunk | other
+    if isinstance(chunk, int):
+        chunk, other = other, chunk
+    if isinstance(other, int):
+        return other | to_int(chunk)
+    return Bitmap._container(sorted(set(chunk).union(other)))
+
+
+def _difference(chunk: Container, other: Container) -> Container:
+    if isinstance(chunk, int):
+        if isinstance(other, int):
+            return Bitmap._shrink(chunk & ~other)
+        return Bitmap._shrink(chunk & ~to_int(other))
+    if isinstance(other, int):
+        return array("H", (low for low in chunk if not other >> low & 1))
+    return array("H", sorted(set(chunk).difference(other)))
@@ -0,0 +1,56 @@
+"""
+Measure bcrypt verify latency on this host and recommend BCRYPT_ROUNDS.
+
+usage: python -m foodie.calibrate [--target-ms 250] [--samples 5]
+"""
+import argparse
+import statistics
+import time
+from passlib.hash import bcrypt
+
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+
+
+def measure_verify_latency(rounds: int, samples: int) -> float:
+    """Median seconds taken to verify a password hashed with rounds"""
+    hashed_password = bcrypt.using(rounds=rounds).hash("calibration password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.verify("calibration password", hashed_password)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def recommend_rounds(target: float, samples: int = 5) -> int:
+    """
+    Highest number of rounds whose verify latency stays within target seconds.
+    """
+    recommended = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        latency = measure_verify_latency(rounds, samples)
+        print(f"rounds={rounds:<3} verify={latency * 1000:8.1f}ms")
+        if latency > target:
+            break
+        recommended = rounds
+    return recommended
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250,
+        help="highest acceptable verify latency per login",
+    )
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    rounds = recommend_rounds(args.target_ms / 1000, args.samples)
+    print(f"\nBCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
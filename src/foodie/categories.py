@@ -0,0 +1,371 @@
+import threading
+from collections import Counter
+from itertools import islice
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import false, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from foodie import config
+from foodie.bitmap import Bitmap
+from foodie.db import models
+from foodie.synced_index import CommitSyncedIndex
+
+
+Facets = Tuple[int, List[Tuple[Hashable, str, int]]]
+
+# matching package ids the memory index filters a query with, below SQLite's
+# default limit on bound parameters, larger matches use with_categories
+MATCH_IN_LIMIT = 500
+
+
+def with_categories(
+    query, all_of: Optional[Iterable[UUID]], any_of: Optional[Iterable[UUID]] = None
+):
+    """
+    Restrict query to food packages in every category of all_of and in at
+    least one of any_of, through the association's (category_id,
+    food_package_id) index.
+    """
+    association = models.food_packages_food_categories_association_table
+    for category_id in all_of or []:
+        query = query.where(
+            models.FoodPackage.id.in_(
+                select(association.c.food_package_id).where(
+                    association.c.category_id == category_id
+                )
+            )
+        )
+    any_of = list(any_of or [])
+    if any_of:
+        query = query.where(
+            models.FoodPackage.id.in_(
+                select(association.c.food_package_id).where(
+                    association.c.category_id.in_(any_of)
+                )
+            )
+        )
+    return query
+
+
+class PostgresCategoryIndex:
+    """
+    Counts the matching food packages and their categories with a GROUP BY
+    over the association table, always in step with the database.
+    """
+
+    def where_categories(
+        self,
+        query,
+        all_of: Iterable[UUID] = (),
+        any_of: Iterable[UUID] = (),
+        is_available: Optional[bool] = None,
+    ):
+        """Restrict query to food packages as with_categories does"""
+        return with_categories(query, all_of, any_of)
+
+    async def facet_counts(
+        self,
+        session: AsyncSession,
+        all_of: Iterable[UUID] = (),
+        any_of: Iterable[UUID] = (),
+        is_available: Optional[bool] = None,
+    ) -> Facets:
+        """
+        Number of food packages in every category of all_of and at least one
+        of any_of, with (category id, name, package count) of the categories
+        among them, largest first
+        """
+        matching = with_categories(select(models.FoodPackage.id), all_of, any_of)
+        if is_available is not None:
+            matching = matching.where(models.FoodPackage.is_available.is_(is_available))
+        total = (
+            await session.execute(select(func.count()).select_from(matching.subquery()))
+        ).scalar_one()
+        if not total:
+            return 0, []
+        association = models.food_packages_food_categories_association_table
+        count = func.count().label("count")
+        rows = await session.execute(
+            select(models.FoodCategory.id, models.FoodCategory.name, count)
+            .join(association, association.c.category_id == models.FoodCategory.id)
+            .where(association.c.food_package_id.in_(matching))
+            .group_by(models.FoodCategory.id, models.FoodCategory.name)
+            .order_by(count.desc(), models.FoodCategory.name, models.FoodCategory.id)
+        )
+        return total, [tuple(row) for row in rows]
+
+    def clear(self):
+        """Nothing is kept in process"""
+
+
+class CategoryIndex:
+    """
+    Category membership of food packages as compressed bitmaps.
+
+    Every package gets a small integer ordinal, ordinals of removed packages
+    are reused so the bitmaps stay dense. Each category maps to the bitmap of
+    its packages' ordinals, so filtering by several categories is a bitmap
+    intersection or union and facet counts are intersection sizes, with no
+    join against the association table.
+    """
+
+    SCAN_RATIO = 4
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._ids: List[Optional[Hashable]] = []
+            self._ordinals: Dict[Hashable, int] = {}
+            self._free: List[int] = []
+            self._package_categories: List[Tuple[Hashable, ...]] = []
+            self._live = Bitmap()
+            self._available = Bitmap()
+            self._categories: Dict[Hashable, Bitmap] = {}
+            self._names: Dict[Hashable, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def __contains__(self, package_id: Hashable) -> bool:
+        return package_id in self._ordinals
+
+    def set_package(
+        self,
+        package_id: Hashable,
+        category_ids: Iterable[Hashable],
+        is_available: bool = True,
+    ):
+        with self._lock:
+            ordinal = self._ordinals.get(package_id)
+            if ordinal is None:
+                if self._free:
+                    ordinal = self._free.pop()
+                    self._ids[ordinal] = package_id
+                    self._package_categories[ordinal] = ()
+                else:
+                    ordinal = len(self._ids)
+                    self._ids.append(package_id)
+                    self._package_categories.append(())
+                self._ordinals[package_id] = ordinal
+                self._live.add(ordinal)
+            categories = tuple(dict.fromkeys(category_ids))
+            for category_id in set(self._package_categories[ordinal]).difference(
+                categories
+            ):
+                bitmap = self._categories.get(category_id)
+                if bitmap is not None:
+                    bitmap.discard(ordinal)
+            for category_id in categories:
+                self._categories.setdefault(category_id, Bitmap()).add(ordinal)
+            self._package_categories[ordinal] = categories
+            if is_available:
+                self._available.add(ordinal)
+            else:
+                self._available.discard(ordinal)
+
+    def remove_package(self, package_id: Hashable):
+        with self._lock:
+            ordinal = self._ordinals.pop(package_id, None)
+            if ordinal is None:
+                return
+            for category_id in self._package_categories[ordinal]:
+                bitmap = self._categories.get(category_id)
+                if bitmap is not None:
+                    bitmap.discard(ordinal)
+            self._ids[ordinal] = None
+            self._package_categories[ordinal] = ()
+            self._live.discard(ordinal)
+            self._available.discard(ordinal)
+            self._free.append(ordinal)
+
+    def set_category(self, category_id: Hashable, name: str):
+        with self._lock:
+            self._names[category_id] = name
+            self._categories.setdefault(category_id, Bitmap())
+
+    def remove_category(self, category_id: Hashable):
+        with self._lock:
+            self._names.pop(category_id, None)
+            self._categories.pop(category_id, None)
+
+    def match(
+        self,
+        all_of: Iterable[Hashable] = (),
+        any_of: Iterable[Hashable] = (),
+        is_available: Optional[bool] = None,
+    ) -> Bitmap:
+        """
+        Ordinals of packages in every category of all_of and at least one of
+        any_of, empty filters match every package
+        """
+        with self._lock:
+            bitmaps = [
+                self._categories.get(category_id, Bitmap()) for category_id in all_of
+            ]
+            any_of = list(any_of)
+            if any_of:
+                bitmaps.append(
+                    Bitmap.union(
+                        self._categories.get(category_id, Bitmap())
+                        for category_id in any_of
+                    )
+                )
+            if is_available is True:
+                bitmaps.append(self._available)
+            elif is_available is False:
+                bitmaps.append(self._live - self._available)
+            if not bitmaps:
+                return self._live.copy()
+            return Bitmap.intersection(bitmaps)
+
+    def package_ids(self, ordinals: Bitmap, limit: Optional[int] = None) -> list:
+        with self._lock:
+            return [self._ids[ordinal] for ordinal in islice(ordinals, limit)]
+
+    def facets(
+        self, ordinals: Optional[Bitmap] = None
+    ) -> List[Tuple[Hashable, str, int]]:
+        """
+        (category id, name, package count) of every category with packages
+        among ordinals, or among all packages, largest first
+        """
+        with self._lock:
+            if ordinals is None:
+                counts = {
+                    category_id: len(bitmap)
+                    for category_id, bitmap in self._categories.items()
+                }
+            elif len(ordinals) * self.SCAN_RATIO < len(self._ordinals):
+                # few packages, counting their categories beats intersecting
+                # every category's bitmap
+                counts = Counter(
+                    category_id
+                    for ordinal in ordinals
+                    for category_id in self._package_categories[ordinal]
+                    if category_id in self._categories
+                )
+            else:
+                counts = {
+                    category_id: bitmap.intersection_len(ordinals)
+                    for category_id, bitmap in self._categories.items()
+                }
+            facets = [
+                (category_id, self._names.get(category_id, ""), count)
+                for category_id, count in counts.items()
+                if count
+            ]
+        facets.sort(key=lambda facet: (-facet[2], facet[1]))
+        return facets
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "packages": len(self._ordinals),
+                "categories": len(self._categories),
+                "free_ordinals": len(self._free),
+            }
+
+
+class MemoryCategoryIndex(CommitSyncedIndex, CategoryIndex):
+    """CategoryIndex of the food packages in the database"""
+
+    def new_pending(self) -> dict:
+        return {"packages": {}, "removed": set(), "categories": {}}
+
+    def _on_flush(self, session: Session, flush_context):
+        for instance in (*session.new, *session.dirty):
+            if isinstance(instance, models.FoodPackage):
+                pending = self.pending(session)
+                pending["packages"][instance.id] = (
+                    [category.id for category in instance.categories],
+                    instance.is_available is not False,
+                )
+                pending["removed"].discard(instance.id)
+            elif isinstance(instance, models.FoodCategory):
+                self.pending(session)["categories"][instance.id] = instance.name
+        for instance in session.deleted:
+            if isinstance(instance, models.FoodPackage):
+                pending = self.pending(session)
+                pending["packages"].pop(instance.id, None)
+                pending["removed"].add(instance.id)
+            elif isinstance(instance, models.FoodCategory):
+                self.pending(session)["categories"][instance.id] = None
+
+    def apply(self, pending: dict):
+        with self._lock:
+            for category_id, name in pending["categories"].items():
+                if name is None:
+                    self.remove_category(category_id)
+                else:
+                    self.set_category(category_id, name)
+            for package_id, (category_ids, is_available) in pending["packages"].items():
+                self.set_package(package_id, category_ids, is_available)
+            for package_id in pending["removed"]:
+                self.remove_package(package_id)
+
+    def where_categories(
+        self,
+        query,
+        all_of: Iterable[UUID] = (),
+        any_of: Iterable[UUID] = (),
+        is_available: Optional[bool] = None,
+    ):
+        """
+        Restrict query to the food packages the bitmaps match, by id, or with
+        with_categories when they are too many for an IN list
+        """
+        ordinals = self.match(all_of, any_of, is_available)
+        if not ordinals:
+            return query.where(false())
+        if len(ordinals) > MATCH_IN_LIMIT:
+            return with_categories(query, all_of, any_of)
+        return query.where(models.FoodPackage.id.in_(self.package_ids(ordinals)))
+
+    async def facet_counts(
+        self,
+        session: AsyncSession,
+        all_of: Iterable[UUID] = (),
+        any_of: Iterable[UUID] = (),
+        is_available: Optional[bool] = None,
+    ) -> Facets:
+        """PostgresCategoryIndex.facet_counts from the bitmaps, without a query"""
+        ordinals = self.match(all_of, any_of, is_available)
+        return len(ordinals), self.facets(ordinals)
+
+    def rebuild(self, session: Session):
+        """Load every category and food package from the database"""
+        association = models.food_packages_food_categories_association_table
+        package_categories: Dict[Hashable, List[Hashable]] = {}
+        for package_id, category_id in session.execute(
+            select(association.c.food_package_id, association.c.category_id)
+        ):
+            package_categories.setdefault(package_id, []).append(category_id)
+        with self._lock:
+            self.clear()
+            for category in session.execute(select(models.FoodCategory)).scalars():
+                self.set_category(category.id, category.name)
+            for package_id, is_available in session.execute(
+                select(models.FoodPackage.id, models.FoodPackage.is_available)
+            ):
+                self.set_package(
+                    package_id,
+                    package_categories.get(package_id, ()),
+                    is_available is not False,
+                )
+
+
+def get_category_index(backend: str, database_url: str):
+    if backend == "auto":
+        backend = "postgres" if database_url.startswith("postgres") else "memory"
+    if backend == "postgres":
+        return PostgresCategoryIndex()
+    if backend == "memory":
+        return MemoryCategoryIndex()
+    raise ValueError(f"Unknown category backend {backend}")
+
+
+category_index = get_category_index(config.CATEGORY_BACKEND, config.DATABASE_URL)
@@ -24,6 +24,101 @@ ALLOWED_HOSTS: CommaSeparatedStrings = config(
 
 DATABASE_URL: str = config("DATABASE_URL", cast=str)
 
+# serve async routes from an asyncio engine (asyncpg, aiosqlite) instead of
+# running the sync engine in the threadpool
+DATABASE_ASYNC: bool = config("DATABASE_ASYNC", cast=bool, default=False)
+
+# read only routes are spread round-robin over these databases, empty serves
+# every route from DATABASE_URL
+REPLICA_DATABASE_URLS: CommaSeparatedStrings = config(
+    "REPLICA_DATABASE_URLS", cast=CommaSeparatedStrings, default=""
+)
+
+# seconds a replica is skipped after a connection error
+REPLICA_EJECT_SECONDS: float = config("REPLICA_EJECT_SECONDS", cast=float, default=30)
+
+# seconds a client's reads stay on the primary after it writes, should cover
+# the replication lag
+REPLICA_READ_YOUR_WRITES_SECONDS: float = config(
+    "REPLICA_READ_YOUR_WRITES_SECONDS", cast=float, default=5
+)
+
+# connections kept open per engine, size it to the number of requests served
+# concurrently (threadpool workers for sync routes)
+DATABASE_POOL_SIZE: int = config("DATABASE_POOL_SIZE", cast=int, default=20)
+
+# connections opened on top of DATABASE_POOL_SIZE under load, closed on checkin
+DATABASE_MAX_OVERFLOW: int = config("DATABASE_MAX_OVERFLOW", cast=int, default=10)
+
+# seconds to wait for a connection before giving up with an error
+DATABASE_POOL_TIMEOUT: float = config("DATABASE_POOL_TIMEOUT", cast=float, default=30)
+
+# seconds after which a connection is replaced, -1 keeps connections forever
+DATABASE_POOL_RECYCLE: int = config("DATABASE_POOL_RECYCLE", cast=int, default=1800)
+
+# test connections with a lightweight query on checkout and reconnect if stale
+DATABASE_POOL_PRE_PING: bool = config("DATABASE_POOL_PRE_PING", cast=bool, default=True)
+
+# generate time ordered UUIDv7 primary keys instead of random UUIDv4, new rows
+# then land on the right edge of primary key indexes instead of random pages
+TIME_ORDERED_IDS: bool = config("TIME_ORDERED_IDS", cast=bool, default=False)
+
+# ISO 4217 code of prices stored without an explicit currency
+DEFAULT_CURRENCY: str = config("DEFAULT_CURRENCY", cast=str, default="NGN")
+
+# food package search: "postgres" uses the tsvector column, "memory" an index
+# kept in each process, "auto" picks postgres for postgres databases
+SEARCH_BACKEND: str = config("SEARCH_BACKEND", cast=str, default="auto")
+
+# food category facets: "postgres" counts with a GROUP BY over the category
+# association, "memory" with bitmaps kept in each process, "auto" picks
+# postgres for postgres databases
+CATEGORY_BACKEND: str = config("CATEGORY_BACKEND", cast=str, default="auto")
+
+# nearby and open vendors: "postgres" uses the GiST index over vendor
+# coordinates and tests vendor_open_slots, "memory" a grid of
+# LOCATION_GRID_DEGREES cells and opening hours kept in each process, "auto"
+# picks postgres for postgres databases
+LOCATION_BACKEND: str = config("LOCATION_BACKEND", cast=str, default="auto")
+LOCATION_GRID_DEGREES: float = config("LOCATION_GRID_DEGREES", cast=float, default=0.01)
+
+# send each request's query count and database time in a Server-Timing header
+SERVER_TIMING: bool = config("SERVER_TIMING", cast=bool, default=True)
+
+# rows read and encoded at a time by table exports
+EXPORT_CHUNK_SIZE: int = config("EXPORT_CHUNK_SIZE", cast=int, default=1000)
+
+# minutes vendors' opening hours are ahead of UTC, Lagos by default
+OPENING_HOURS_UTC_OFFSET: int = config("OPENING_HOURS_UTC_OFFSET", cast=int, default=60)
+
+# outgoing email is written to the outbox_emails table with the change it is
+# about and sent by a background dispatcher through this SMTP server
+SMTP_HOST: str = config("SMTP_HOST", cast=str, default="localhost")
+SMTP_PORT: int = config("SMTP_PORT", cast=int, default=25)
+SMTP_USERNAME: str = config("SMTP_USERNAME", cast=str, default="")
+SMTP_PASSWORD: str = config("SMTP_PASSWORD", cast=str, default="")
+SMTP_STARTTLS: bool = config("SMTP_STARTTLS", cast=bool, default=False)
+SMTP_TIMEOUT: float = config("SMTP_TIMEOUT", cast=float, default=10)
+EMAIL_SENDER: str = config("EMAIL_SENDER", cast=str, default="noreply@localhost")
+
+# run the outbox dispatcher in this process, at least one process should
+OUTBOX_DISPATCH: bool = config("OUTBOX_DISPATCH", cast=bool, default=True)
+
+# emails sent per batch, over one SMTP connection
+OUTBOX_BATCH_SIZE: int = config("OUTBOX_BATCH_SIZE", cast=int, default=50)
+
+# seconds the dispatcher waits after finding less than a batch due
+OUTBOX_POLL_SECONDS: float = config("OUTBOX_POLL_SECONDS", cast=float, default=2)
+
+# failed sends are retried after OUTBOX_BACKOFF_BASE seconds, doubling with
+# each attempt up to OUTBOX_BACKOFF_MAX, and given up after OUTBOX_MAX_ATTEMPTS
+OUTBOX_MAX_ATTEMPTS: int = config("OUTBOX_MAX_ATTEMPTS", cast=int, default=8)
+OUTBOX_BACKOFF_BASE: float = config("OUTBOX_BACKOFF_BASE", cast=float, default=30)
+OUTBOX_BACKOFF_MAX: float = config("OUTBOX_BACKOFF_MAX", cast=float, default=3600)
+
+# emails accepted by one bulk invite call
+BULK_INVITE_MAX_EMAILS: int = config("BULK_INVITE_MAX_EMAILS", cast=int, default=5000)
+
 SECRET_KEY: str = config("SECRET_KEY", cast=str)
 
 ACTIVITY_TOKEN_SECRET_KEY: str = config("ACTIVITY_TOKEN_SECRET_KEY", cast=str)
@@ -32,6 +127,39 @@ JWT_ALGORITHM: str = config("JWT_ALGORITHM", cast=str, default="HS256")
 
 ACCESS_TOKEN_EXPIRE: int = config("ACCESS_TOKEN_EXPIRE", cast=int, default=60)
 
+# number of verified access tokens kept in memory, 0 disables the cache
+ACCESS_TOKEN_CACHE_SIZE: int = config("ACCESS_TOKEN_CACHE_SIZE", cast=int, default=1024)
+
+# seconds a principal's token epoch is cached before it is read again, so
+# revoked tokens may keep working that long on other processes, and how many
+# principals' epochs are kept, 0 disables the cache
+REVOCATION_CACHE_SECONDS: float = config(
+    "REVOCATION_CACHE_SECONDS", cast=float, default=30
+)
+REVOCATION_CACHE_SIZE: int = config("REVOCATION_CACHE_SIZE", cast=int, default=10000)
+
 CLIENT_HOST: str = config("CLIENT_HOST", cast=str)  # host for frontend
 
 SALT: str = config("SALT", cast=str)
+
+# bcrypt cost factor, run `python -m foodie.calibrate` to pick one for a host.
+# stored hashes are rehashed on login whenever this changes
+BCRYPT_ROUNDS: int = config("BCRYPT_ROUNDS", cast=int, default=4 if IS_TEST else 12)
+
+# number of processes used for password hashing, defaults to number of cores
+PASSWORD_HASHER_WORKERS: int = config("PASSWORD_HASHER_WORKERS", cast=int, default=0)
+
+# password hashing jobs allowed to wait or run before new ones are rejected
+PASSWORD_HASHER_MAX_PENDING: int = config(
+    "PASSWORD_HASHER_MAX_PENDING", cast=int, default=64
+)
+
+# failed logins per email and client address within LOGIN_FAILURE_WINDOW
+# seconds before further attempts are delayed by an exponential backoff
+LOGIN_FAILURE_WINDOW: int = config("LOGIN_FAILURE_WINDOW", cast=int, default=900)
+
+LOGIN_FAILURE_THRESHOLD: int = config("LOGIN_FAILURE_THRESHOLD", cast=int, default=5)
+
+LOGIN_BACKOFF_BASE: float = config("LOGIN_BACKOFF_BASE", cast=float, default=1)
+
+LOGIN_BACKOFF_MAX: float = config("LOGIN_BACKOFF_MAX", cast=float, default=900)
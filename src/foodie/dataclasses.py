@@ -1,3 +1,5 @@
+from typing import Optional
+from uuid import UUID
 from pydantic.dataclasses import dataclass
 from foodie import enums
 
@@ -7,3 +9,39 @@ class InvitationTokenPayload:
     id: str
     email: str
     token_type: enums.ActivityTokenType
+
+
+@dataclass
+class Principal:
+    """
+    The authenticated party of a request as described by the claims
+    of its access token.
+    """
+
+    id: UUID
+    principal_type: enums.PrincipalType
+    role: Optional[str] = None
+    vendor_id: Optional[UUID] = None
+    courier_id: Optional[UUID] = None
+    epoch: int = 0
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "Principal":
+        return cls(
+            id=claims.get("sub"),
+            principal_type=claims.get("typ"),
+            role=claims.get("role"),
+            vendor_id=claims.get("vendor_id"),
+            courier_id=claims.get("courier_id"),
+            epoch=claims.get("epoch", 0),
+        )
+
+    def to_claims(self) -> dict:
+        claims = {"sub": str(self.id), "typ": self.principal_type, "epoch": self.epoch}
+        if self.role is not None:
+            claims["role"] = self.role
+        if self.vendor_id is not None:
+            claims["vendor_id"] = str(self.vendor_id)
+        if self.courier_id is not None:
+            claims["courier_id"] = str(self.courier_id)
+        return claims
@@ -1,22 +1,164 @@
-from sqlalchemy import create_engine
+import logging
+from typing import Optional
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from foodie.config import DATABASE_URL
+from foodie import config
+from foodie.config import DATABASE_URL, DATABASE_ASYNC
+from .replicas import Replica, ReplicaSet, WriteTracker
+from .session import SessionSlots
+from .pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_pool,
+)
+
+
+logger = logging.getLogger(__name__)
+
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-def get_engine(database_url):
+
+def get_pool_options(database_url: str) -> dict:
+    """Pool arguments for create_engine taken from foodie.config"""
+    if ":memory:" in database_url or database_url.endswith(":///"):
+        # in memory sqlite databases live and die with their only connection
+        return {}
+    return {
+        "pool_size": config.DATABASE_POOL_SIZE,
+        "max_overflow": config.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": config.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": config.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": config.DATABASE_POOL_PRE_PING,
+    }
+
+
+def get_engine(database_url, name: Optional[str] = None):
+    """
+    Create an engine for database_url, when name is given the engine's pool
+    is instrumented and reported under that name.
+    """
+    options = get_pool_options(database_url)
+    if options:
+        options["poolclass"] = InstrumentedQueuePool
     if "sqlite" in database_url:
-        engine = create_engine(
-            database_url,
-            connect_args={"check_same_thread": False},
-        )
-    else:
-        engine = create_engine(database_url, pool_size=20, max_overflow=10)
+        options["connect_args"] = {"check_same_thread": False}
+    if database_url.startswith("postgres"):
+        # psycopg2 pages only INSERT executemany into multi-row statements by
+        # default, page the UPDATEs of menu syncs too
+        options["executemany_mode"] = "values_plus_batch"
+    engine = create_engine(database_url, **options)
+    if name is not None:
+        instrument_pool(name, engine.pool)
     return engine
 
 
-SessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=get_engine(DATABASE_URL)
+def get_async_database_url(database_url: str) -> str:
+    """Swap the sync driver in database_url for its asyncio counterpart"""
+    scheme, separator, rest = database_url.partition("://")
+    dialect = scheme.split("+")[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}{separator}{rest}"
+
+
+def get_async_engine(database_url, name: Optional[str] = None):
+    async_database_url = get_async_database_url(database_url)
+    options = get_pool_options(async_database_url)
+    if options:
+        options["poolclass"] = InstrumentedAsyncAdaptedQueuePool
+    engine = create_async_engine(async_database_url, **options)
+    if name is not None:
+        instrument_pool(name, engine.sync_engine.pool)
+    return engine
+
+
+def get_pool_capacity(database_url: str) -> int:
+    """Connections the pool for database_url can hand out, 0 when unbounded"""
+    options = get_pool_options(database_url)
+    if not options or options["max_overflow"] < 0:
+        return 0
+    return options["pool_size"] + options["max_overflow"]
+
+
+def get_session_factory(database_url: str, name: str) -> sessionmaker:
+    return sessionmaker(
+        autocommit=False, autoflush=False, bind=get_engine(database_url, name=name)
+    )
+
+
+def get_async_session_factory(database_url: str, name: str) -> sessionmaker:
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        bind=get_async_engine(database_url, name=f"{name}_async"),
+    )
+
+
+SessionLocal = get_session_factory(DATABASE_URL, "primary")
+
+# threaded sessions open at once, bounded by the connections of the sync pool
+threaded_session_slots = SessionSlots(get_pool_capacity(DATABASE_URL))
+
+AsyncSessionLocal = (
+    get_async_session_factory(DATABASE_URL, "primary") if DATABASE_ASYNC else None
+)
+
+replica_set = ReplicaSet(
+    [
+        Replica(
+            f"replica_{index}",
+            get_session_factory(url, f"replica_{index}"),
+            get_async_session_factory(url, f"replica_{index}")
+            if DATABASE_ASYNC
+            else None,
+            SessionSlots(get_pool_capacity(url)),
+        )
+        for index, url in enumerate(config.REPLICA_DATABASE_URLS)
+    ],
+    eject_seconds=config.REPLICA_EJECT_SECONDS,
 )
 
+write_tracker = WriteTracker(window=config.REPLICA_READ_YOUR_WRITES_SECONDS)
+
+
+def get_async_engines() -> list:
+    factories = [AsyncSessionLocal] + [
+        replica.async_session_factory for replica in replica_set.replicas
+    ]
+    return [factory.kw["bind"] for factory in factories if factory is not None]
+
+
+async def connect_async_engine():
+    """
+    Open the first async connection before serving requests. The pool's
+    first connect hooks are guarded by a mutex that concurrent greenlets can
+    deadlock on, so they must run once before requests race for connections.
+    An unreachable replica does not stop startup, it is ejected instead.
+    """
+    primary, *replicas = get_async_engines() or [None]
+    if primary is None:
+        return
+    async with primary.connect():
+        pass
+    for engine in replicas:
+        try:
+            async with engine.connect():
+                pass
+        except (exc.DBAPIError, OSError):
+            logger.exception("Could not connect to replica %s", engine.url)
+
+
+async def dispose_async_engine():
+    for engine in get_async_engines():
+        await engine.dispose()
+
+
 Base = declarative_base()
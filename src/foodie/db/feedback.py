@@ -0,0 +1,159 @@
+"""
+Feedback writes as single INSERT ... ON CONFLICT DO UPDATE statements.
+
+A user rates a vendor, courier or food package at most once, enforced by
+the (target, user) unique constraints, and rating it again replaces the
+earlier rating. Upserting on that constraint makes a submission one round
+trip whether or not the user rated before, and of two concurrent first
+submissions the later one updates the row of the earlier one instead of
+failing on the constraint. The triggers of db/ratings.py keep the rating
+aggregates right either way.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+from sqlalchemy import cast, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from foodie import config
+from foodie.ids import new_id
+from . import models
+
+
+INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# feedback model -> (rated model, column of the feedback referencing it)
+FEEDBACK_TARGETS = {
+    models.UserVendorFeedback: (models.Vendor, "vendor_id"),
+    models.UserCourierFeedback: (models.Courier, "courier_id"),
+    models.UserFoodPackageFeedback: (models.FoodPackage, "food_package_id"),
+}
+
+# rows per executemany and ids per IN list of an import, below SQLite's
+# default limit on bound parameters
+IMPORT_BATCH_SIZE = 500
+
+
+def get_insert(database_url: str):
+    """insert() of the database's dialect, the one with on_conflict_do_update"""
+    backend = make_url(database_url).get_backend_name()
+    if backend not in INSERTS:
+        raise ValueError(f"Feedback upserts are not supported on {backend}")
+    return INSERTS[backend]
+
+
+insert = get_insert(config.DATABASE_URL)
+
+
+def feedback_upsert(
+    feedback_model,
+    target_id: UUID,
+    user_id: UUID,
+    rating: float,
+    feedback: Optional[str] = None,
+):
+    """
+    Statement saving user's feedback on target_id. The row to insert is
+    selected from the target's table, so an unknown target inserts nothing
+    and the statement's rowcount is 0 instead of needing a separate lookup.
+    Ids are cast as Postgres reads untyped select parameters as text, which
+    it won't insert into uuid columns.
+    """
+    target_model, foreign_key = FEEDBACK_TARGETS[feedback_model]
+    columns = feedback_model.__table__.c
+    now = datetime.utcnow()
+    statement = insert(feedback_model.__table__).from_select(
+        ["id", "user_id", foreign_key, "rating", "feedback", "created_at"],
+        select(
+            cast(literal(new_id(), columns.id.type), columns.id.type),
+            cast(literal(user_id, columns.user_id.type), columns.user_id.type),
+            target_model.id,
+            literal(rating, columns.rating.type),
+            literal(feedback, columns.feedback.type),
+            literal(now, columns.created_at.type),
+        ).where(target_model.id == target_id),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[columns[foreign_key], columns.user_id],
+        set_={
+            "rating": statement.excluded.rating,
+            "feedback": statement.excluded.feedback,
+            "updated_at": now,
+        },
+    )
+
+
+def feedback_import_upsert(feedback_model):
+    """
+    executemany statement for historical feedback. A row only replaces
+    feedback last written before it was, so importing old ratings never
+    overwrites newer ones and running the same import twice changes nothing.
+    """
+    table = feedback_model.__table__
+    _, foreign_key = FEEDBACK_TARGETS[feedback_model]
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[foreign_key], table.c.user_id],
+        set_={
+            "rating": statement.excluded.rating,
+            "feedback": statement.excluded.feedback,
+            "updated_at": statement.excluded.created_at,
+        },
+        where=func.coalesce(table.c.updated_at, table.c.created_at)
+        < statement.excluded.created_at,
+    )
+
+
+def existing_ids(session: Session, model, ids: Iterable[UUID]) -> set:
+    ids = list(set(ids))
+    found = set()
+    for start in range(0, len(ids), IMPORT_BATCH_SIZE):
+        found.update(
+            session.execute(
+                select(model.id).where(
+                    model.id.in_(ids[start : start + IMPORT_BATCH_SIZE])
+                )
+            ).scalars()
+        )
+    return found
+
+
+def import_feedback(session: Session, feedback_model, rows: List[dict]) -> Dict:
+    """
+    Upsert rows of user_id, target_id, rating, feedback and created_at in
+    batches. Rows naming an unknown user or target are rejected up front, of
+    several rows for the same user and target only the latest is written.
+    Returns the number of rows written and the (index, reason) of rejected
+    ones, the caller commits.
+    """
+    target_model, foreign_key = FEEDBACK_TARGETS[feedback_model]
+    users = existing_ids(session, models.User, (row["user_id"] for row in rows))
+    targets = existing_ids(session, target_model, (row["target_id"] for row in rows))
+    rejected = []
+    latest: Dict[tuple, dict] = {}
+    for index, row in enumerate(rows):
+        if row["user_id"] not in users:
+            rejected.append({"index": index, "reason": "Unknown user"})
+            continue
+        if row["target_id"] not in targets:
+            rejected.append({"index": index, "reason": "Unknown target"})
+            continue
+        key = (row["target_id"], row["user_id"])
+        if key not in latest or latest[key]["created_at"] <= row["created_at"]:
+            latest[key] = row
+    values = [
+        {
+            "id": new_id(),
+            "user_id": row["user_id"],
+            foreign_key: row["target_id"],
+            "rating": row["rating"],
+            "feedback": row.get("feedback"),
+            "created_at": row["created_at"],
+        }
+        for row in latest.values()
+    ]
+    statement = feedback_import_upsert(feedback_model)
+    for start in range(0, len(values), IMPORT_BATCH_SIZE):
+        session.execute(statement, values[start : start + IMPORT_BATCH_SIZE])
+    return {"imported": len(values), "rejected": rejected}
@@ -0,0 +1,174 @@
+"""
+Invitations resolved in one query.
+
+An invitation token names an organisation, a vendor or a courier, and the
+email of the person invited to join it. Whether the organisation exists and
+whether the email is already one of its users is answered by a single
+select of the organisation outer joined to its users on that email, served
+by the unique (organisation, email) index. Token details and acceptance
+share it, so accepting an invitation is that select and the insert.
+
+Bulk invitations check all their emails against the organisation's users
+with IN lists of MEMBER_BATCH_SIZE emails, a query per batch rather than
+one per email.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Set, Type, Union
+from uuid import UUID
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from foodie import enums
+from . import models
+
+
+# emails per IN list, below SQLite's default limit on bound parameters
+MEMBER_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class InviteTarget:
+    organisation: Type[models.Base]
+    user: Type[models.Base]
+    # column of user referencing organisation
+    organisation_key: str
+    user_type: str
+    role: Union[enums.VendorUserRole, enums.CourierUserRole]
+
+
+INVITE_TARGETS = {
+    enums.ActivityTokenType.VENDOR_ADMIN_INVITE: InviteTarget(
+        models.Vendor,
+        models.VendorUser,
+        "vendor_id",
+        "vendor",
+        enums.VendorUserRole.ADMIN,
+    ),
+    enums.ActivityTokenType.VENDOR_USER_INVITE: InviteTarget(
+        models.Vendor,
+        models.VendorUser,
+        "vendor_id",
+        "vendor",
+        enums.VendorUserRole.STAFF,
+    ),
+    enums.ActivityTokenType.COURIER_ADMIN_INVITE: InviteTarget(
+        models.Courier,
+        models.CourierUser,
+        "courier_id",
+        "courier",
+        enums.CourierUserRole.ADMIN,
+    ),
+    enums.ActivityTokenType.COURIER_USER_INVITE: InviteTarget(
+        models.Courier,
+        models.CourierUser,
+        "courier_id",
+        "courier",
+        enums.CourierUserRole.STAFF,
+    ),
+}
+
+
+@dataclass
+class Invite:
+    target: InviteTarget
+    organisation_id: UUID
+    organisation_name: str
+    email: str
+    # whether email already belongs to one of the organisation's users
+    joined: bool = False
+
+    def details(self) -> dict:
+        return {
+            "email": self.email,
+            "role": self.target.role.value,
+            "user_type": self.target.user_type,
+            "name": self.organisation_name,
+        }
+
+    def new_user(self, **fields) -> models.Base:
+        return self.target.user(
+            **{self.target.organisation_key: self.organisation_id},
+            email=self.email,
+            role=self.target.role,
+            **fields,
+        )
+
+
+def invite_query(target: InviteTarget, organisation_id: UUID, email: str):
+    """
+    The organisation's id and name, with the id of its user with email,
+    none when there is no such user. No row when there is no organisation.
+    """
+    organisation, user = target.organisation, target.user
+    return (
+        select(organisation.id, organisation.name, user.id)
+        .outerjoin(
+            user,
+            and_(
+                getattr(user, target.organisation_key) == organisation.id,
+                user.email == email,
+            ),
+        )
+        .where(organisation.id == organisation_id)
+    )
+
+
+async def lookup_invite(
+    session: AsyncSession,
+    token_type: enums.ActivityTokenType,
+    organisation_id: UUID,
+    email: str,
+) -> Optional[Invite]:
+    """
+    The invitation to join organisation_id as email, joined when email is
+    already one of its users, none when the organisation does not exist
+    """
+    target = INVITE_TARGETS[token_type]
+    row = (
+        await session.execute(invite_query(target, organisation_id, email))
+    ).one_or_none()
+    if row is None:
+        return None
+    return Invite(target, row[0], row[1], email, joined=row[2] is not None)
+
+
+async def find_invite(
+    session: AsyncSession,
+    token_type: enums.ActivityTokenType,
+    organisation_id: UUID,
+    email: str,
+) -> Optional[Invite]:
+    """
+    The invitation to join organisation_id as email, none when the
+    organisation does not exist or email is already one of its users
+    """
+    invite = await lookup_invite(session, token_type, organisation_id, email)
+    if invite is None or invite.joined:
+        return None
+    return invite
+
+
+def organisation_name(
+    session: Session, target: InviteTarget, organisation_id: UUID
+) -> Optional[str]:
+    organisation = target.organisation
+    return session.execute(
+        select(organisation.name).where(organisation.id == organisation_id)
+    ).scalar_one_or_none()
+
+
+def existing_members(
+    session: Session, target: InviteTarget, organisation_id: UUID, emails: List[str]
+) -> Set[str]:
+    """The emails of emails that already belong to users of the organisation"""
+    user = target.user
+    members = set()
+    for start in range(0, len(emails), MEMBER_BATCH_SIZE):
+        members.update(
+            session.execute(
+                select(user.email)
+                .where(getattr(user, target.organisation_key) == organisation_id)
+                .where(user.email.in_(emails[start : start + MEMBER_BATCH_SIZE]))
+            ).scalars()
+        )
+    return members
@@ -0,0 +1,114 @@
+"""
+Keyset pagination.
+
+A page is read as the rows ordered by a list of keys, the last of them
+unique, that come after the keys of the previous page's last row. Unlike
+OFFSET every page costs the same however deep it is, and rows inserted or
+deleted meanwhile neither repeat nor skip rows of later pages. The cursor
+handed out for the next page is those key values, JSON encoded.
+
+SQLite keeps DateTime columns as text, and the microseconds SQLAlchemy
+writes when binding a datetime make it compare unequal to a stored
+timestamp without them, so there DateTime keys are compared and ordered
+through julianday().
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import DateTime, and_, func, or_
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql import ColumnElement
+from foodie import config
+
+
+# (expression, descending)
+Key = Tuple[ColumnElement, bool]
+
+IS_SQLITE = make_url(config.DATABASE_URL).get_backend_name() == "sqlite"
+
+
+def created_keys(model) -> List[Key]:
+    """Oldest first, the order of keyset pages by default"""
+    return [(model.created_at, False), (model.id, False)]
+
+
+def comparable(expression: ColumnElement) -> ColumnElement:
+    if IS_SQLITE and isinstance(expression.type, DateTime):
+        return func.julianday(expression)
+    return expression
+
+
+def order_by(keys: Sequence[Key]) -> list:
+    return [
+        comparable(expression).desc() if descending else comparable(expression)
+        for expression, descending in keys
+    ]
+
+
+def after(keys: Sequence[Key], values: Sequence) -> ColumnElement:
+    """Rows ordered after the row with values for keys"""
+    clauses = []
+    for index, (expression, descending) in enumerate(keys):
+        expression = comparable(expression)
+        equal = [
+            comparable(previous) == value
+            for (previous, _), value in zip(keys[:index], values)
+        ]
+        beyond = (
+            expression < values[index] if descending else expression > values[index]
+        )
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def key_columns(keys: Sequence[Key]) -> list:
+    """The keys' values to select alongside rows to build their cursor"""
+    return [
+        comparable(expression).label(f"keyset_{index}")
+        for index, (expression, _) in enumerate(keys)
+    ]
+
+
+def dump(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = json.dumps([dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(keys: Sequence[Key], cursor: str) -> Optional[list]:
+    """Key values of cursor, None when it is not a cursor of keys"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+    try:
+        return [load(expression, value) for (expression, _), value in zip(keys, values)]
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def load(expression: ColumnElement, value):
+    try:
+        python_type = comparable(expression).type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is UUID:
+        return UUID(value)
+    if not isinstance(value, (python_type, int, float)):
+        raise TypeError(f"{value!r} is not a {python_type.__name__}")
+    return value
@@ -0,0 +1,55 @@
+"""
+Postgres side of vendor locations.
+
+Vendors are found near a point through a GiST index over
+point(longitude, latitude), the built in geometric type, so no extension has
+to be installed. Queries narrow the vendors down to the bounding boxes of
+the search circle, which the index answers, and compute great circle
+distances only for those.
+"""
+from sqlalchemy import DDL, event, func, or_
+from foodie.geo import EARTH_RADIUS_KM, bounding_boxes
+
+
+VENDOR_LOCATION_INDEX = (
+    "CREATE INDEX ix_vendors_location ON vendors "
+    "USING gist (point(longitude, latitude))"
+)
+
+
+def install_location_ddl(metadata):
+    """Create the Postgres location index whenever metadata.create_all runs"""
+    event.listen(
+        metadata,
+        "after_create",
+        DDL(VENDOR_LOCATION_INDEX).execute_if(dialect="postgresql"),
+    )
+
+
+def location_point(entity):
+    """point(longitude, latitude) as indexed by ix_vendors_location"""
+    return func.point(entity.longitude, entity.latitude)
+
+
+def within_bounding_boxes(entity, latitude: float, longitude: float, radius_km):
+    point = location_point(entity)
+    return or_(
+        *(
+            point.op("<@")(
+                func.box(func.point(min_lng, min_lat), func.point(max_lng, max_lat))
+            )
+            for min_lat, min_lng, max_lat, max_lng in bounding_boxes(
+                latitude, longitude, radius_km
+            )
+        )
+    )
+
+
+def distance_km(entity, latitude: float, longitude: float):
+    """Haversine distance in kilometres from entity's location to the point"""
+    half_dlat = func.radians(entity.latitude - latitude) / 2
+    half_dlng = func.radians(entity.longitude - longitude) / 2
+    a = func.power(func.sin(half_dlat), 2) + func.cos(
+        func.radians(latitude)
+    ) * func.cos(func.radians(entity.latitude)) * func.power(func.sin(half_dlng), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
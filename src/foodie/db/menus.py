@@ -0,0 +1,246 @@
+"""
+Whole menu synchronisation for vendors pushing their menu from a point of
+sale.
+
+The menu a vendor sends is compared with its food packages, their items
+and categories, all loaded in three queries, and only the differences are
+written: new packages inserted, changed ones updated and missing ones
+withdrawn, each kind as one executemany per batch instead of a flush of ORM
+objects per package. A withdrawn package is only marked unavailable, so a
+partial push loses nothing; missing packages are deleted when the vendor
+asks for it, except those with feedback, which are withdrawn instead so a
+sync never deletes ratings. Packages are matched on their normalized name, the
+one thing a point of sale and this database share. On Postgres the engine
+runs executemany in psycopg2's values_plus_batch mode, inserts as multi-row
+VALUES and updates as pages of statements per round trip.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+from uuid import UUID
+from sqlalchemy import bindparam, delete, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+from foodie import config
+from foodie.ids import new_id
+from . import models
+
+
+# rows per executemany and ids per IN list, below SQLite's default limit on
+# bound parameters
+SYNC_BATCH_SIZE = 500
+
+PACKAGE_FIELDS = ("name", "description", "image_url", "price", "currency")
+
+
+@dataclass
+class MenuChanges:
+    created: List[UUID] = field(default_factory=list)
+    updated: List[UUID] = field(default_factory=list)
+    deleted: List[UUID] = field(default_factory=list)
+    withdrawn: List[UUID] = field(default_factory=list)
+    unchanged: int = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "created": len(self.created),
+            "updated": len(self.updated),
+            "deleted": len(self.deleted),
+            "withdrawn": len(self.withdrawn),
+            "unchanged": self.unchanged,
+        }
+
+
+def batches(values: list):
+    for start in range(0, len(values), SYNC_BATCH_SIZE):
+        yield values[start : start + SYNC_BATCH_SIZE]
+
+
+def load_menu(session: Session, vendor_id: UUID) -> Dict[UUID, dict]:
+    """Every food package of the vendor as a dict comparable with a menu entry"""
+    packages = {
+        row.id: {
+            **{name: getattr(row, name) for name in PACKAGE_FIELDS},
+            "is_available": row.is_available is not False,
+            "items": [],
+            "categories": set(),
+        }
+        for row in session.execute(
+            select(
+                models.FoodPackage.id,
+                models.FoodPackage.is_available,
+                *(getattr(models.FoodPackage, name) for name in PACKAGE_FIELDS),
+            ).where(models.FoodPackage.vendor_id == vendor_id)
+        )
+    }
+    vendor_packages = select(models.FoodPackage.id).where(
+        models.FoodPackage.vendor_id == vendor_id
+    )
+    for package_id, name in session.execute(
+        select(models.FoodPackageItem.food_package_id, models.FoodPackageItem.name)
+        .where(models.FoodPackageItem.food_package_id.in_(vendor_packages))
+        .order_by(
+            models.FoodPackageItem.food_package_id, models.FoodPackageItem.position
+        )
+    ):
+        packages[package_id]["items"].append(name)
+    association = models.food_packages_food_categories_association_table
+    for package_id, category_id in session.execute(
+        select(association.c.food_package_id, association.c.category_id).where(
+            association.c.food_package_id.in_(vendor_packages)
+        )
+    ):
+        packages[package_id]["categories"].add(category_id)
+    return packages
+
+
+def item_rows(package_id: UUID, items: List[str]) -> List[dict]:
+    return [
+        {
+            "food_package_id": package_id,
+            "position": position,
+            "name": name,
+            "key": models.FoodPackageItem.normalize(name),
+        }
+        for position, name in enumerate(items)
+    ]
+
+
+def rated_packages(session: Session, package_ids: List[UUID]) -> set:
+    """The ids of package_ids with feedback"""
+    feedback = models.UserFoodPackageFeedback
+    rated = set()
+    for ids in batches(package_ids):
+        rated.update(
+            session.execute(
+                select(feedback.food_package_id)
+                .where(feedback.food_package_id.in_(ids))
+                .distinct()
+            ).scalars()
+        )
+    return rated
+
+
+def sync_menu(
+    session: Session, vendor_id: UUID, menu: List[dict], delete_missing: bool = False
+) -> MenuChanges:
+    """
+    Make the vendor's food packages match menu, a list of dicts with the
+    package fields, its items and the ids of its categories. Names must be
+    unique once normalized and categories must exist. Packages missing from
+    menu are marked unavailable, or deleted with delete_missing unless they
+    have feedback. The caller commits and, as these writes bypass the ORM,
+    refreshes the in-process indexes.
+    """
+    current = load_menu(session, vendor_id)
+    by_key = {}
+    for package_id, package in current.items():
+        # of packages already sharing a name the first one is kept
+        by_key.setdefault(models.FoodPackageItem.normalize(package["name"]), package_id)
+    changes, matched = MenuChanges(), set()
+    new_packages, changed_packages, new_items, new_categories = [], [], [], []
+    stale_items, stale_categories = [], []
+    for entry in menu:
+        wanted = {
+            **{name: entry[name] for name in PACKAGE_FIELDS},
+            "is_available": entry["is_available"],
+            "items": list(entry["items"]),
+            "categories": set(entry["categories"]),
+        }
+        wanted["currency"] = wanted["currency"] or config.DEFAULT_CURRENCY
+        package_id = by_key.pop(models.FoodPackageItem.normalize(entry["name"]), None)
+        if package_id is None:
+            package_id = new_id()
+            changes.created.append(package_id)
+            new_packages.append(
+                {
+                    "id": package_id,
+                    "vendor_id": vendor_id,
+                    **{name: wanted[name] for name in PACKAGE_FIELDS},
+                    "is_available": wanted["is_available"],
+                }
+            )
+            new_items.extend(item_rows(package_id, wanted["items"]))
+            new_categories.extend(
+                (package_id, category_id) for category_id in wanted["categories"]
+            )
+            continue
+        matched.add(package_id)
+        existing = current[package_id]
+        if existing == wanted:
+            changes.unchanged += 1
+            continue
+        changes.updated.append(package_id)
+        changed_packages.append(
+            {
+                "_id": package_id,
+                **{name: wanted[name] for name in PACKAGE_FIELDS},
+                "is_available": wanted["is_available"],
+            }
+        )
+        if existing["items"] != wanted["items"]:
+            stale_items.append(package_id)
+            new_items.extend(item_rows(package_id, wanted["items"]))
+        stale_categories.extend(
+            (package_id, category_id)
+            for category_id in existing["categories"] - wanted["categories"]
+        )
+        new_categories.extend(
+            (package_id, category_id)
+            for category_id in wanted["categories"] - existing["categories"]
+        )
+    # packages left out of the menu, and the rest of any sharing a name
+    missing = [package_id for package_id in current if package_id not in matched]
+    if delete_missing:
+        rated = rated_packages(session, missing)
+        changes.deleted = [
+            package_id for package_id in missing if package_id not in rated
+        ]
+        missing = [package_id for package_id in missing if package_id in rated]
+    for package_id in missing:
+        if current[package_id]["is_available"]:
+            changes.withdrawn.append(package_id)
+        else:
+            changes.unchanged += 1
+
+    association = models.food_packages_food_categories_association_table
+    packages = models.FoodPackage.__table__
+    items = models.FoodPackageItem.__table__
+    for ids in batches(changes.deleted):
+        session.execute(
+            delete(association).where(association.c.food_package_id.in_(ids))
+        )
+        session.execute(delete(items).where(items.c.food_package_id.in_(ids)))
+        session.execute(delete(packages).where(packages.c.id.in_(ids)))
+    for ids in batches(changes.withdrawn):
+        session.execute(
+            update(packages).where(packages.c.id.in_(ids)).values(is_available=False)
+        )
+    for ids in batches(stale_items):
+        session.execute(delete(items).where(items.c.food_package_id.in_(ids)))
+    for pairs in batches(stale_categories):
+        session.execute(
+            delete(association).where(
+                tuple_(association.c.food_package_id, association.c.category_id).in_(
+                    pairs
+                )
+            )
+        )
+    for rows in batches(new_packages):
+        session.execute(insert(packages), rows)
+    statement = (
+        update(packages)
+        .where(packages.c.id == bindparam("_id"))
+        .values({name: bindparam(name) for name in (*PACKAGE_FIELDS, "is_available")})
+    )
+    for rows in batches(changed_packages):
+        session.execute(statement, rows)
+    for rows in batches(new_items):
+        session.execute(insert(items), rows)
+    for pairs in batches(new_categories):
+        session.execute(
+            insert(association),
+            [
+                {"food_package_id": package_id, "category_id": category_id}
+                for package_id, category_id in pairs
+            ],
+        )
+    return changes
@@ -1,7 +1,8 @@
-import uuid
 from sqlalchemy_utils import UUIDType
-from sqlalchemy import Column, DateTime
-from sqlalchemy import func
+from sqlalchemy import Column, DateTime, Float, Integer
+from sqlalchemy import case, func
+from sqlalchemy.ext.hybrid import hybrid_property
+from foodie.ids import new_id
 
 
 class TimestampMixin:
@@ -14,4 +15,74 @@ class TimestampMixin:
 
 
 class EntityMixin:
-    id = Column(UUIDType(binary=False), primary_key=True, default=uuid.uuid4)
+    id = Column(UUIDType(binary=False), primary_key=True, default=new_id)
+
+
+class TokenEpochMixin:
+    """
+    Epoch of a principal's access tokens, tokens issued at an earlier one
+    are rejected, see foodie/revocation.py
+    """
+
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class LocationMixin:
+    """Coordinates in degrees, unknown until both are set"""
+
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+
+
+class RatingMixin:
+    """
+    Running totals of the ratings given to a record: how many, their sum and
+    how many rounded to each of 1 to 5 stars. Kept up to date by triggers on
+    the feedback tables, see db/ratings.py, so reading or sorting by the
+    average never touches the feedback rows.
+    """
+
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Float, nullable=False, default=0, server_default="0")
+    rating_1 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4 = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5 = Column(Integer, nullable=False, default=0, server_default="0")
+
+    @hybrid_property
+    def rating(self):
+        """Average rating, None until rated"""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @rating.expression
+    def rating(cls):
+        return case(
+            (cls.rating_count > 0, cls.rating_sum / cls.rating_count), else_=None
+        )
+
+    @property
+    def rating_histogram(self) -> dict:
+        return {star: getattr(self, f"rating_{star}") or 0 for star in range(1, 6)}
+
+    @classmethod
+    def rating_order(cls, descending: bool = True) -> list:
+        """Order by average rating, unrated last, then by number of ratings"""
+        if descending:
+            return [cls.rating.desc().nullslast(), cls.rating_count.desc(), cls.id]
+        return [cls.rating.asc().nullslast(), cls.rating_count.desc(), cls.id]
+
+    @classmethod
+    def rating_keys(cls, descending: bool = True) -> list:
+        """
+        rating_order as keyset pagination keys, see db/keyset.py. Keys can't
+        be NULL, so unrated records are put last by a key of their own.
+        """
+        return [
+            (case((cls.rating_count == 0, 1), else_=0), False),
+            (func.coalesce(cls.rating, 0), descending),
+            (cls.rating_count, True),
+            (cls.id, False),
+        ]
@@ -1,5 +1,8 @@
+from datetime import datetime
 from sqlalchemy import (
+    BigInteger,
     Column,
+    Integer,
     String,
     Table,
     UniqueConstraint,
@@ -7,13 +10,26 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     Float,
+    Index,
+    Text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.ext.orderinglist import ordering_list
+from sqlalchemy.orm import deferred, relationship, validates
 from sqlalchemy.sql.schema import ForeignKey
-from sqlalchemy_utils import ChoiceType, ScalarListType, UUIDType, JSONType
+from sqlalchemy_utils import ChoiceType, UUIDType, JSONType
 from .base import Base
-from .mixins import EntityMixin, TimestampMixin
-from foodie import enums
+from .locations import install_location_ddl
+from .mixins import (
+    EntityMixin,
+    LocationMixin,
+    RatingMixin,
+    TimestampMixin,
+    TokenEpochMixin,
+)
+from .ratings import install_rating_ddl
+from .search import SearchVectorType, install_search_vector_ddl
+from foodie import config, enums
 
 
 food_packages_food_categories_association_table = Table(
@@ -23,16 +39,24 @@ food_packages_food_categories_association_table = Table(
         "food_package_id",
         UUIDType(binary=False),
         ForeignKey("food_packages.id"),
+        primary_key=True,
     ),
     Column(
         "category_id",
         UUIDType(binary=False),
         ForeignKey("food_categories.id"),
+        primary_key=True,
+    ),
+    # the primary key serves a package's categories, this a category's packages
+    Index(
+        "ix_food_packages_food_categories_association_category_id",
+        "category_id",
+        "food_package_id",
     ),
 )
 
 
-class AuthBase(Base, EntityMixin, TimestampMixin):
+class AuthBase(Base, EntityMixin, TimestampMixin, TokenEpochMixin):
     __abstract__ = True
     email = Column(String, nullable=False, unique=True)
     email_verified_on = Column(DateTime, nullable=True)
@@ -55,31 +79,33 @@ class User(AuthBase):
     phone_number_verified_on = Column(DateTime, nullable=False)
 
 
-class Vendor(Base, EntityMixin, TimestampMixin):
+class Vendor(Base, EntityMixin, TimestampMixin, RatingMixin, LocationMixin):
     """
     A food vendor, could be a restaurant or a food stand
     or even a home food vendor.
     """
 
     __tablename__ = "vendors"
+    __table_args__ = (Index("ix_vendors_created_at_id", "created_at", "id"),)
     name = Column(String, nullable=False, unique=True)
     type = Column(ChoiceType(enums.VendorType, impl=String()), nullable=False)
     address = Column(String, nullable=False)
 
-    # TODO location
-
 
-class VendorUser(Base, EntityMixin, TimestampMixin):
+class VendorUser(Base, EntityMixin, TimestampMixin, TokenEpochMixin):
     """
     A user under a specific vendor with specific roles
     """
 
     __tablename__ = "vendor_users"
+    __table_args__ = (
+        Index("ix_vendor_users_vendor_id_email", "vendor_id", "email", unique=True),
+    )
     vendor_id = Column(ForeignKey("vendors.id"), nullable=False)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     phone_number = Column(String, nullable=False)
-    email = Column(String, nullable=False)
+    email = Column(String, nullable=False, index=True)
     role = Column(
         ChoiceType(enums.VendorUserRole, impl=String()),
         nullable=False,
@@ -89,30 +115,32 @@ class VendorUser(Base, EntityMixin, TimestampMixin):
     vendor = relationship(Vendor, backref="users")
 
 
-class Courier(Base, EntityMixin, TimestampMixin):
+class Courier(Base, EntityMixin, TimestampMixin, RatingMixin, LocationMixin):
     """
     A courier or delivery business, tasked with the
     responsibility of delivering orders to user
     """
 
     __tablename__ = "couriers"
+    __table_args__ = (Index("ix_couriers_created_at_id", "created_at", "id"),)
     name = Column(String, nullable=False, unique=True)
     address = Column(String, nullable=False)
 
-    # TODO location
-
 
-class CourierUser(Base, EntityMixin, TimestampMixin):
+class CourierUser(Base, EntityMixin, TimestampMixin, TokenEpochMixin):
     """
     A user under a specific courier with specific roles
     """
 
     __tablename__ = "courier_users"
+    __table_args__ = (
+        Index("ix_courier_users_courier_id_email", "courier_id", "email", unique=True),
+    )
     courier_id = Column(ForeignKey("couriers.id"), nullable=False)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     phone_number = Column(String, nullable=False)
-    email = Column(String, nullable=False)
+    email = Column(String, nullable=False, index=True)
     role = Column(
         ChoiceType(enums.CourierUserRole, impl=String()),
         nullable=False,
@@ -127,19 +155,74 @@ class FoodCategory(Base, EntityMixin, TimestampMixin):
     name = Column(String, nullable=False)
 
 
-class FoodPackage(Base, EntityMixin, TimestampMixin):
+class FoodPackageItem(Base):
+    """
+    One entry of a food package's contents, ordered by position.
+    key is the normalized name that item lookups match against.
+    """
+
+    __tablename__ = "food_package_items"
+    __table_args__ = (
+        Index("ix_food_package_items_key_food_package_id", "key", "food_package_id"),
+    )
+    food_package_id = Column(
+        ForeignKey("food_packages.id", ondelete="CASCADE"), primary_key=True
+    )
+    position = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+
+    def __init__(self, name: str, **kwargs):
+        super().__init__(name=name, **kwargs)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return " ".join(name.split()).casefold()
+
+    @validates("name")
+    def validate_name(self, _, name: str) -> str:
+        self.key = self.normalize(name)
+        return name
+
+
+class FoodPackage(Base, EntityMixin, TimestampMixin, RatingMixin):
     __tablename__ = "food_packages"
+    __table_args__ = (
+        Index(
+            "ix_food_packages_vendor_id_is_available_price",
+            "vendor_id",
+            "is_available",
+            "price",
+        ),
+    )
     name = Column(String, nullable=False)
     description = Column(String, nullable=False)
     image_url = Column(String, nullable=False)
-    items = Column(ScalarListType(str))
-    price = Column(String, nullable=False)
+    item_entries = relationship(
+        FoodPackageItem,
+        order_by=FoodPackageItem.position,
+        collection_class=ordering_list("position"),
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+    )
+    # list of item names, backed by item_entries
+    items = association_proxy("item_entries", "name")
+    # in the currency's minor unit, eg kobo for NGN
+    price = Column(BigInteger, nullable=False)
+    currency = Column(String(3), nullable=False, default=config.DEFAULT_CURRENCY)
     is_available = Column(Boolean, nullable=False, default=True)
     vendor_id = Column(ForeignKey("vendors.id"), nullable=False)
     categories = relationship(
         FoodCategory,
         secondary=food_packages_food_categories_association_table,
     )
+    # maintained by database triggers on Postgres, see db/search.py
+    search_vector = deferred(Column(SearchVectorType, nullable=True))
+
+
+install_search_vector_ddl(Base.metadata)
+install_location_ddl(Base.metadata)
 
 
 class ContactInformation(Base, EntityMixin, TimestampMixin):
@@ -161,10 +244,24 @@ class OpenInformation(Base, EntityMixin, TimestampMixin):
     open_to = Column(Time)
 
 
+class VendorOpenSlots(Base):
+    """
+    A vendor's week of opening hours as bits, see foodie/db/opening_hours.py,
+    in words of WORD_SLOTS slots: bit n of word w is set when the vendor is
+    open in week slot w * WORD_SLOTS + n. Words with no open slot are left
+    out.
+    """
+
+    __tablename__ = "vendor_open_slots"
+    vendor_id = Column(ForeignKey("vendors.id", ondelete="CASCADE"), primary_key=True)
+    word = Column(Integer, primary_key=True, autoincrement=False)
+    bits = Column(BigInteger, nullable=False)
+
+
 class Order(Base, EntityMixin, TimestampMixin):
     __tablename__ = "orders"
-    user_id = Column(ForeignKey("users.id"), nullable=False)
-    vendor_id = Column(ForeignKey("vendors.id"), nullable=False)
+    user_id = Column(ForeignKey("users.id"), nullable=False, index=True)
+    vendor_id = Column(ForeignKey("vendors.id"), nullable=False, index=True)
     courier_user_id = Column(ForeignKey("courier_users.id"), nullable=True)
     vendor_accepted = Column(Boolean, nullable=True)
     courier_accepted = Column(Boolean, nullable=True)
@@ -172,7 +269,7 @@ class Order(Base, EntityMixin, TimestampMixin):
 
 class OrderEvent(Base, EntityMixin, TimestampMixin):
     __tablename__ = "order_events"
-    order_id = Column(ForeignKey("orders.id"), nullable=False)
+    order_id = Column(ForeignKey("orders.id"), nullable=False, index=True)
     event_type = Column(
         ChoiceType(enums.OrderEventType, impl=String()),
         nullable=False,
@@ -205,3 +302,31 @@ class UserCourierFeedback(Base, EntityMixin, TimestampMixin):
     courier_id = Column(ForeignKey("couriers.id"), nullable=False)
     rating = Column(Float, nullable=False)
     feedback = Column(String, nullable=True)
+
+
+class OutboxEmail(Base, EntityMixin, TimestampMixin):
+    """
+    An email written in the transaction of the change it is about and sent
+    afterwards by the outbox dispatcher, see foodie/outbox.py
+    """
+
+    __tablename__ = "outbox_emails"
+    __table_args__ = (
+        Index("ix_outbox_emails_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(
+        ChoiceType(enums.OutboxStatus, impl=String()),
+        nullable=False,
+        default=enums.OutboxStatus.PENDING,
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    # utc, compared with the dispatcher's clock rather than the database's
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+
+
+install_rating_ddl(Base.metadata)
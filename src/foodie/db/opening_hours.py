@@ -0,0 +1,64 @@
+"""
+Database side of opening hours.
+
+Every vendor's week bitmap, see foodie/opening_hours.py, is stored in
+vendor_open_slots as words of WORD_SLOTS bits and rewritten in the
+transaction that changes the vendor's opening hours. Whether a vendor is
+open in a slot is then the primary key lookup of one word and a bitwise and,
+so open vendors are filtered in the query that finds them.
+"""
+from typing import Dict
+from uuid import UUID
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+
+
+# half a day of slots, the bits of a word fit a signed bigint
+WORD_SLOTS = 48
+WORD_MASK = (1 << WORD_SLOTS) - 1
+
+
+def week_words(week: int) -> Dict[int, int]:
+    """The words of week with open slots, by word number"""
+    words = {}
+    word = 0
+    while week:
+        if week & WORD_MASK:
+            words[word] = week & WORD_MASK
+        week >>= WORD_SLOTS
+        word += 1
+    return words
+
+
+def open_in_slot(entity, slot: int):
+    """Condition on entity, a vendor, being open in week slot"""
+    word, bit = divmod(slot, WORD_SLOTS)
+    open_slots = models.VendorOpenSlots
+    return (
+        select(open_slots.vendor_id)
+        .where(
+            open_slots.vendor_id == entity.id,
+            open_slots.word == word,
+            open_slots.bits.op("&")(1 << bit) != 0,
+        )
+        .exists()
+    )
+
+
+async def save_open_slots(session: AsyncSession, vendor_id: UUID, week: int):
+    """Replace the stored week of the vendor, committed with session"""
+    await session.execute(
+        delete(models.VendorOpenSlots).where(
+            models.VendorOpenSlots.vendor_id == vendor_id
+        )
+    )
+    words = week_words(week)
+    if words:
+        await session.execute(
+            insert(models.VendorOpenSlots),
+            [
+                {"vendor_id": vendor_id, "word": word, "bits": bits}
+                for word, bits in words.items()
+            ],
+        )
@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Counters fed by the connection pool of one engine.
+
+    checkouts, overflow checkouts, connects and invalidations come from pool
+    events, the time spent waiting for a connection is recorded by the
+    instrumented pool classes below.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional[Pool] = None
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._overflow_checkouts = 0
+        self._connects = 0
+        self._invalidations = 0
+        self._timeouts = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def attach(self, pool: Pool):
+        self.pool = pool
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        event.listen(pool, "soft_invalidate", self._on_invalidate)
+        if isinstance(pool, InstrumentedPoolMixin):
+            pool.metrics = self
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        overflow = isinstance(self.pool, QueuePool) and self.pool.overflow() > 0
+        with self._lock:
+            self._checkouts += 1
+            if overflow:
+                self._overflow_checkouts += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self._invalidations += 1
+
+    def record_wait(self, wait: float):
+        with self._lock:
+            self._waits += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+    def record_timeout(self):
+        with self._lock:
+            self._timeouts += 1
+
+    def stats(self) -> dict:
+        state = {}
+        if isinstance(self.pool, QueuePool):
+            state = {
+                "pool_size": self.pool.size(),
+                "max_overflow": self.pool._max_overflow,
+                "checked_in": self.pool.checkedin(),
+                "checked_out": self.pool.checkedout(),
+                "overflow": max(0, self.pool.overflow()),
+            }
+        with self._lock:
+            return {
+                "name": self.name,
+                "pool_class": type(self.pool).__name__,
+                **state,
+                "checkouts": self._checkouts,
+                "overflow_checkouts": self._overflow_checkouts,
+                "connects": self._connects,
+                "invalidations": self._invalidations,
+                "timeouts": self._timeouts,
+                "average_wait": self._total_wait / self._waits if self._waits else 0.0,
+                "max_wait": self._max_wait,
+            }
+
+
+class InstrumentedPoolMixin:
+    """Times how long each checkout waits on the pool"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# metrics of every engine created through foodie.db.base, by engine name
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_pool(name: str, pool: Pool) -> PoolMetrics:
+    metrics = PoolMetrics(name)
+    metrics.attach(pool)
+    pool_metrics[name] = metrics
+    return metrics
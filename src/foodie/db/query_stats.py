@@ -0,0 +1,85 @@
+"""
+Per request database statistics.
+
+Cursor execution events of every engine add the statements they run and
+how long each took to the QueryStats of the current request, held in a
+context variable. Starlette's threadpool copies the context into worker
+threads and the async engines run their statements in the request's own
+task, so sync routes, threaded sessions and async sessions all count
+towards the request that ran them. Statements run outside a request are
+not counted.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        return (
+            f'db;dur={self.seconds * 1000:.3f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_seconds * 1000:.3f}"
+        )
+
+    def log_fields(self) -> dict:
+        return {
+            "db_queries": self.count,
+            "db_ms": round(self.seconds * 1000, 3),
+            "db_slowest_ms": round(self.slowest_seconds * 1000, 3),
+            "db_slowest_statement": self.slowest_statement,
+        }
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries():
+    """Count the statements run within the block, in this context"""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
@@ -0,0 +1,245 @@
+"""
+Rating aggregates of vendors, couriers and food packages.
+
+Triggers on the feedback tables add every inserted rating to the rated
+record's RatingMixin columns, move it on update and take it back out on
+delete, in the same transaction as the feedback write, whichever way the
+feedback is written.
+
+repair_ratings recomputes the aggregates from the feedback rows in chunks,
+for data written while the triggers were missing or disabled. SQLite drops
+a table's triggers along with it, so a batch migration that recreates a
+feedback table has to create its triggers again.
+
+usage: python -m foodie.db.ratings [--chunk-size 1000]
+"""
+import argparse
+import logging
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import DDL, and_, bindparam, case, event, func, select, update
+from sqlalchemy.orm import Session
+from .base import Base, SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+# (feedback table, rated table, column of the feedback referencing it)
+RATED_TABLES = [
+    ("user_vendor_feedbacks", "vendors", "vendor_id"),
+    ("user_courier_feedbacks", "couriers", "courier_id"),
+    ("user_food_package_feedbacks", "food_packages", "food_package_id"),
+]
+
+STARS = range(1, 6)
+
+
+def star_bounds(star: int) -> Tuple[Optional[float], Optional[float]]:
+    """Ratings in [low, high) round to star, the outer stars are open ended"""
+    return (star - 0.5 if star > 1 else None, star + 0.5 if star < 5 else None)
+
+
+def star_condition(rating, star: int):
+    """Whether the rating column rounds to star"""
+    low, high = star_bounds(star)
+    conditions = []
+    if low is not None:
+        conditions.append(rating >= low)
+    if high is not None:
+        conditions.append(rating < high)
+    return and_(*conditions)
+
+
+def star_sql(rating: str, star: int) -> str:
+    """star_condition for trigger bodies"""
+    low, high = star_bounds(star)
+    conditions = []
+    if low is not None:
+        conditions.append(f"{rating} >= {low}")
+    if high is not None:
+        conditions.append(f"{rating} < {high}")
+    return " AND ".join(conditions)
+
+
+def adjust_statement(table: str, foreign_key: str, row: str, sign: str) -> str:
+    """UPDATE adding (sign +) or removing (sign -) row's rating to its target"""
+    assignments = [
+        f"rating_count = rating_count {sign} 1",
+        f"rating_sum = rating_sum {sign} {row}.rating",
+    ] + [
+        f"rating_{star} = rating_{star} {sign} "
+        f"CASE WHEN {star_sql(f'{row}.rating', star)} THEN 1 ELSE 0 END"
+        for star in STARS
+    ]
+    return (
+        f"UPDATE {table} SET {', '.join(assignments)} "
+        f"WHERE id = {row}.{foreign_key}"
+    )
+
+
+def sqlite_trigger_statements(feedback: str, table: str, foreign_key: str):
+    add = adjust_statement(table, foreign_key, "NEW", "+")
+    remove = adjust_statement(table, foreign_key, "OLD", "-")
+    return [
+        f"CREATE TRIGGER {feedback}_rating_insert AFTER INSERT ON {feedback} "
+        f"BEGIN {add}; END",
+        f"CREATE TRIGGER {feedback}_rating_update "
+        f"AFTER UPDATE OF rating, {foreign_key} ON {feedback} "
+        f"BEGIN {remove}; {add}; END",
+        f"CREATE TRIGGER {feedback}_rating_delete AFTER DELETE ON {feedback} "
+        f"BEGIN {remove}; END",
+    ]
+
+
+def postgresql_trigger_statements(feedback: str, table: str, foreign_key: str):
+    add = adjust_statement(table, foreign_key, "NEW", "+")
+    remove = adjust_statement(table, foreign_key, "OLD", "-")
+    return [
+        f"""
+CREATE OR REPLACE FUNCTION {feedback}_rating() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        {remove};
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        {add};
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+        f"CREATE TRIGGER {feedback}_rating "
+        f"AFTER INSERT OR DELETE OR UPDATE OF rating, {foreign_key} ON {feedback} "
+        f"FOR EACH ROW EXECUTE PROCEDURE {feedback}_rating()",
+    ]
+
+
+TRIGGER_STATEMENTS = {
+    "sqlite": sqlite_trigger_statements,
+    "postgresql": postgresql_trigger_statements,
+}
+
+
+def trigger_statements(dialect: str) -> List[str]:
+    return [
+        statement
+        for feedback, table, foreign_key in RATED_TABLES
+        for statement in TRIGGER_STATEMENTS[dialect](feedback, table, foreign_key)
+    ]
+
+
+def drop_trigger_statements(dialect: str) -> List[str]:
+    if dialect == "sqlite":
+        return [
+            f"DROP TRIGGER IF EXISTS {feedback}_rating_{operation}"
+            for feedback, _, _ in RATED_TABLES
+            for operation in ("insert", "update", "delete")
+        ]
+    return [
+        statement
+        for feedback, _, _ in RATED_TABLES
+        for statement in (
+            f"DROP TRIGGER IF EXISTS {feedback}_rating ON {feedback}",
+            f"DROP FUNCTION IF EXISTS {feedback}_rating()",
+        )
+    ]
+
+
+def install_rating_ddl(metadata):
+    """Create the rating triggers whenever metadata.create_all runs"""
+    for dialect in TRIGGER_STATEMENTS:
+        for statement in trigger_statements(dialect):
+            event.listen(
+                metadata, "after_create", DDL(statement).execute_if(dialect=dialect)
+            )
+
+
+def aggregate_columns(feedback_table) -> list:
+    rating = feedback_table.c.rating
+    return [
+        func.count().label("rating_count"),
+        func.coalesce(func.sum(rating), 0).label("rating_sum"),
+    ] + [
+        func.sum(case((star_condition(rating, star), 1), else_=0)).label(
+            f"rating_{star}"
+        )
+        for star in STARS
+    ]
+
+
+AGGREGATES = ["rating_count", "rating_sum"] + [f"rating_{star}" for star in STARS]
+
+
+def repair_table(
+    session: Session, feedback: str, table: str, foreign_key: str, chunk_size: int
+) -> int:
+    """
+    Recompute the aggregates of every row of table, chunk by chunk. Each
+    chunk's rows are locked before their feedback is counted so ratings
+    written meanwhile wait instead of being lost. Returns the number of rows
+    whose stored aggregates were wrong.
+    """
+    target = Base.metadata.tables[table]
+    feedback_table = Base.metadata.tables[feedback]
+    reference = feedback_table.c[foreign_key]
+    repaired = 0
+    last_id = None
+    while True:
+        query = select(target.c.id, *(target.c[column] for column in AGGREGATES))
+        if last_id is not None:
+            query = query.where(target.c.id > last_id)
+        rows = session.execute(
+            query.order_by(target.c.id).limit(chunk_size).with_for_update()
+        ).all()
+        if not rows:
+            return repaired
+        ids = [row.id for row in rows]
+        aggregates = {
+            row[0]: row[1:]
+            for row in session.execute(
+                select(reference, *aggregate_columns(feedback_table))
+                .where(reference.in_(ids))
+                .group_by(reference)
+            )
+        }
+        fixes = []
+        for row in rows:
+            expected = aggregates.get(row.id, (0,) * len(AGGREGATES))
+            stored = row[1:]
+            if any(
+                abs((value or 0) - (current or 0)) > 1e-6
+                for value, current in zip(expected, stored)
+            ):
+                fixes.append({"target_id": row.id, **dict(zip(AGGREGATES, expected))})
+        if fixes:
+            session.execute(
+                update(target).where(target.c.id == bindparam("target_id")),
+                fixes,
+            )
+        session.commit()
+        repaired += len(fixes)
+        last_id = ids[-1]
+
+
+def repair_ratings(session: Session, chunk_size: int = 1000) -> Dict[str, int]:
+    """Recompute every rating aggregate, returns the repaired rows per table"""
+    repaired = {}
+    for feedback, table, foreign_key in RATED_TABLES:
+        repaired[table] = repair_table(
+            session, feedback, table, foreign_key, chunk_size
+        )
+        if repaired[table]:
+            logger.warning("Repaired ratings of %s %s", repaired[table], table)
+    return repaired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    with SessionLocal() as session:
+        for table, count in repair_ratings(session, args.chunk_size).items():
+            print(f"{table}: {count} repaired")
+
+
+if __name__ == "__main__":
+    main()
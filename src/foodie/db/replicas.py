@@ -0,0 +1,162 @@
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from .session import SessionSlots
+
+
+class Replica:
+    """A read replica with its session factories and health state"""
+
+    def __init__(
+        self,
+        name: str,
+        session_factory: sessionmaker,
+        async_session_factory: Optional[sessionmaker] = None,
+        session_slots: Optional[SessionSlots] = None,
+    ):
+        self.name = name
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.session_slots = session_slots or SessionSlots(0)
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.reads = 0
+
+    @property
+    def engines(self) -> list:
+        engines = [self.session_factory.kw["bind"]]
+        if self.async_session_factory is not None:
+            engines.append(self.async_session_factory.kw["bind"].sync_engine)
+        return engines
+
+
+class ReplicaSet:
+    """
+    Hands out replicas round-robin.
+
+    A replica whose engine reports a connection error is ejected for
+    eject_seconds and skipped until then. When every replica is ejected
+    choose returns None and the caller falls back to the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        eject_seconds: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.replicas = replicas
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(replicas)
+        self._fallbacks = 0
+        for replica in replicas:
+            for engine in replica.engines:
+                event.listen(engine, "handle_error", self._on_error(replica))
+
+    def _on_error(self, replica: Replica):
+        def handle_error(context):
+            dbapi = context.engine.dialect.dbapi
+            if context.is_disconnect or isinstance(
+                context.original_exception, dbapi.OperationalError
+            ):
+                self.eject(replica)
+
+        return handle_error
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        now = self._clock()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica.ejected_until <= now:
+                    replica.reads += 1
+                    return replica
+            self._fallbacks += 1
+            return None
+
+    def eject(self, replica: Replica):
+        with self._lock:
+            replica.ejected_until = self._clock() + self.eject_seconds
+            replica.ejections += 1
+
+    def stats(self) -> dict:
+        now = self._clock()
+        with self._lock:
+            return {
+                "replicas": [
+                    {
+                        "name": replica.name,
+                        "healthy": replica.ejected_until <= now,
+                        "reads": replica.reads,
+                        "ejections": replica.ejections,
+                    }
+                    for replica in self.replicas
+                ],
+                "primary_fallbacks": self._fallbacks,
+            }
+
+
+class WriteTracker:
+    """
+    Remembers which clients wrote to the primary within the last window
+    seconds so their reads can stay on the primary until replicas catch up.
+
+    A client is marked once a session opened for it commits after flushing
+    changes. Sessions are tagged with the client through track.
+    """
+
+    def __init__(
+        self,
+        window: float = 5,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self.max_keys = max_keys
+        self._clock = clock
+        self._writes: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        event.listen(Session, "after_flush", self._on_flush)
+        event.listen(Session, "after_commit", self._on_commit)
+
+    def track(self, session: Session, key: Hashable):
+        session.info[self] = {"key": key, "flushed": False}
+
+    def _on_flush(self, session: Session, flush_context):
+        if self in session.info:
+            session.info[self]["flushed"] = True
+
+    def _on_commit(self, session: Session):
+        tracked = session.info.get(self)
+        if tracked is not None and tracked["flushed"]:
+            tracked["flushed"] = False
+            self.record(tracked["key"])
+
+    def record(self, key: Hashable):
+        now = self._clock()
+        with self._lock:
+            if len(self._writes) >= self.max_keys:
+                self._writes = {
+                    key: at
+                    for key, at in self._writes.items()
+                    if at > now - self.window
+                }
+            self._writes[key] = now
+
+    def wrote_recently(self, key: Hashable) -> bool:
+        with self._lock:
+            written_at = self._writes.get(key)
+        return written_at is not None and written_at > self._clock() - self.window
+
+    def clear(self):
+        with self._lock:
+            self._writes.clear()
@@ -0,0 +1,96 @@
+from sqlalchemy import DDL, Text, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.types import TypeDecorator
+
+
+class SearchVectorType(TypeDecorator):
+    """tsvector on Postgres, an unused text column everywhere else"""
+
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(TSVECTOR())
+        return dialect.type_descriptor(Text())
+
+
+# Keeps food_packages.search_vector in sync with the package's name,
+# description, items and category names. Weights: name A, items and
+# categories B, description C.
+SEARCH_VECTOR_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION refresh_food_package_search_vector(target uuid)
+RETURNS void AS $$
+    UPDATE food_packages SET search_vector =
+        setweight(to_tsvector('english', coalesce(food_packages.name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(food_package_items.name, ' ')
+            FROM food_package_items
+            WHERE food_package_items.food_package_id = food_packages.id
+        ), '')), 'B')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(food_categories.name, ' ')
+            FROM food_categories
+            JOIN food_packages_food_categories_association AS association
+                ON association.category_id = food_categories.id
+            WHERE association.food_package_id = food_packages.id
+        ), '')), 'B')
+        || setweight(
+            to_tsvector('english', coalesce(food_packages.description, '')), 'C'
+        )
+    WHERE food_packages.id = target;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION food_package_search_vector_trigger()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'food_categories' THEN
+        PERFORM refresh_food_package_search_vector(association.food_package_id)
+        FROM food_packages_food_categories_association AS association
+        WHERE association.category_id = NEW.id;
+    ELSIF TG_TABLE_NAME = 'food_packages' THEN
+        PERFORM refresh_food_package_search_vector(NEW.id);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_food_package_search_vector(OLD.food_package_id);
+    ELSE
+        PERFORM refresh_food_package_search_vector(NEW.food_package_id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+SEARCH_VECTOR_TRIGGERS = """
+CREATE TRIGGER food_packages_search_vector
+AFTER INSERT OR UPDATE OF name, description ON food_packages
+FOR EACH ROW EXECUTE PROCEDURE food_package_search_vector_trigger();
+
+CREATE TRIGGER food_package_items_search_vector
+AFTER INSERT OR UPDATE OR DELETE ON food_package_items
+FOR EACH ROW EXECUTE PROCEDURE food_package_search_vector_trigger();
+
+CREATE TRIGGER food_packages_categories_search_vector
+AFTER INSERT OR DELETE ON food_packages_food_categories_association
+FOR EACH ROW EXECUTE PROCEDURE food_package_search_vector_trigger();
+
+CREATE TRIGGER food_categories_search_vector
+AFTER UPDATE OF name ON food_categories
+FOR EACH ROW EXECUTE PROCEDURE food_package_search_vector_trigger();
+"""
+
+SEARCH_VECTOR_INDEX = (
+    "CREATE INDEX ix_food_packages_search_vector "
+    "ON food_packages USING gin (search_vector)"
+)
+
+
+def install_search_vector_ddl(metadata):
+    """Create the Postgres search triggers whenever metadata.create_all runs"""
+    for statement in (
+        SEARCH_VECTOR_FUNCTIONS,
+        SEARCH_VECTOR_TRIGGERS,
+        SEARCH_VECTOR_INDEX,
+    ):
+        event.listen(
+            metadata, "after_create", DDL(statement).execute_if(dialect="postgresql")
+        )
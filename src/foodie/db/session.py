@@ -0,0 +1,95 @@
+import asyncio
+import weakref
+from sqlalchemy.orm.session import Session
+from starlette.concurrency import run_in_threadpool
+
+
+class SessionSlots:
+    """
+    Limits how many threaded sessions are open at once to the number of
+    connections the pool can hand out.
+
+    A threaded session keeps its connection checked out while it waits for a
+    threadpool worker. Once more sessions are open than the pool has
+    connections, every worker can end up blocked on a checkout that only
+    those waiting sessions could release, until pool_timeout expires.
+    Waiting for a slot here happens on the event loop instead, so workers
+    never block on the pool. A size of 0 disables the limit.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.size)
+        return semaphore
+
+    async def __aenter__(self):
+        if self.size:
+            await self._get_semaphore().acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.size:
+            self._get_semaphore().release()
+
+
+class ThreadedAsyncSession:
+    """
+    Async facade over a sync Session, each database round trip runs in the
+    threadpool.
+
+    It mirrors the parts of AsyncSession used by the async routes, so those
+    routes run unchanged whether DATABASE_ASYNC is enabled or not.
+    """
+
+    def __init__(self, sync_session: Session):
+        self.sync_session = sync_session
+
+    async def execute(self, statement, params=None, execution_options=None, **kw):
+        execution_options = {**(execution_options or {}), "prebuffer_rows": True}
+        return await run_in_threadpool(
+            self.sync_session.execute,
+            statement,
+            params,
+            execution_options=execution_options,
+            **kw,
+        )
+
+    async def scalar(self, statement, params=None, **kw):
+        result = await self.execute(statement, params, **kw)
+        return result.scalar()
+
+    async def get(self, entity, ident, **kw):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kw)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kw):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kw)
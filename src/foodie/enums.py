@@ -52,3 +52,54 @@ class ActivityTokenType(str, Enum):
     COURIER_ADMIN_INVITE = "COURIER_ADMIN_INVITE"
     COURIER_USER_INVITE = "COURIER_USER_INVITE"
     VENDOR_USER_INVITE = "VENDOR_USER_INVITE"
+
+
+class PrincipalType(str, Enum):
+    USER = "user"
+    ADMIN = "admin"
+    VENDOR_USER = "vendor_user"
+    COURIER_USER = "courier_user"
+
+
+class MenuSort(str, Enum):
+    PRICE = "price"
+    PRICE_DESC = "-price"
+    RATING = "rating"
+    RATING_DESC = "-rating"
+
+
+class RatingSort(str, Enum):
+    RATING = "rating"
+    RATING_DESC = "-rating"
+
+
+class FeedbackTarget(str, Enum):
+    VENDORS = "vendors"
+    COURIERS = "couriers"
+    FOOD_PACKAGES = "food-packages"
+
+
+class ExportTable(str, Enum):
+    VENDORS = "vendors"
+    COURIERS = "couriers"
+    FOOD_PACKAGES = "food-packages"
+    ORDERS = "orders"
+    ORDER_EVENTS = "order-events"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class BulkInviteStatus(str, Enum):
+    INVITED = "invited"
+    EXISTING_MEMBER = "existing_member"
+    DUPLICATE = "duplicate"
+    INVALID_EMAIL = "invalid_email"
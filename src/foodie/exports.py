@@ -0,0 +1,121 @@
+"""
+Streaming table exports.
+
+A table is read with stream_results, a server side cursor on Postgres, and
+handed on EXPORT_CHUNK_SIZE rows at a time as plain tuples, never ORM
+objects. Each chunk is encoded as NDJSON or CSV, and optionally gzipped,
+before the next one is read, so memory stays flat whatever the size of
+the table.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Callable, Iterator, List
+from uuid import UUID
+from sqlalchemy import Column, Table, select
+from sqlalchemy.orm import sessionmaker
+from foodie import config, enums
+from foodie.db import models
+
+
+EXPORT_TABLES = {
+    enums.ExportTable.VENDORS: models.Vendor.__table__,
+    enums.ExportTable.COURIERS: models.Courier.__table__,
+    enums.ExportTable.FOOD_PACKAGES: models.FoodPackage.__table__,
+    enums.ExportTable.ORDERS: models.Order.__table__,
+    enums.ExportTable.ORDER_EVENTS: models.OrderEvent.__table__,
+}
+
+# derived columns only meaningful to the database
+EXCLUDED_COLUMNS = {"search_vector"}
+
+MEDIA_TYPES = {
+    enums.ExportFormat.NDJSON: "application/x-ndjson",
+    enums.ExportFormat.CSV: "text/csv",
+}
+
+
+def export_columns(table: Table) -> List[Column]:
+    return [column for column in table.c if column.name not in EXCLUDED_COLUMNS]
+
+
+def plain(value):
+    """value as something json.dumps and csv can write"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_ndjson(names: List[str], rows: list) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(names, map(plain, row))), separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode()
+
+
+def encode_csv(names: List[str], rows: list) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = map(plain, row)
+        writer.writerow(
+            json.dumps(value) if isinstance(value, (dict, list)) else value
+            for value in values
+        )
+    return buffer.getvalue().encode()
+
+
+ENCODERS = {
+    enums.ExportFormat.NDJSON: encode_ndjson,
+    enums.ExportFormat.CSV: encode_csv,
+}
+
+
+def export_chunks(
+    session_factory: sessionmaker,
+    table: Table,
+    chunk_size: int = config.EXPORT_CHUNK_SIZE,
+) -> Iterator[list]:
+    """Every row of table in primary key order, chunk_size rows at a time"""
+    query = (
+        select(*export_columns(table))
+        .order_by(*table.primary_key.columns)
+        .execution_options(stream_results=True)
+    )
+    with session_factory() as session:
+        yield from session.execute(query).partitions(chunk_size)
+
+
+def export_table(
+    session_factory: sessionmaker,
+    export: enums.ExportTable,
+    export_format: enums.ExportFormat,
+    compress: bool = False,
+    chunk_size: int = config.EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """The encoded table, a chunk at a time, gzipped when compress is set"""
+    table = EXPORT_TABLES[export]
+    names = [column.name for column in export_columns(table)]
+    encode: Callable[[List[str], list], bytes] = ENCODERS[export_format]
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def output(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor is not None else data
+
+    if export_format == enums.ExportFormat.CSV:
+        header = output(encode(names, [names]))
+        if header:
+            yield header
+    for rows in export_chunks(session_factory, table, chunk_size):
+        data = output(encode(names, rows))
+        if data:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
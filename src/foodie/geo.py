@@ -0,0 +1,235 @@
+import heapq
+import math
+import threading
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+Box = Tuple[float, float, float, float]
+
+
+def haversine_km(latitude: float, longitude: float, other_latitude, other_longitude):
+    """Great circle distance between two points in kilometres"""
+    phi, other_phi = math.radians(latitude), math.radians(other_latitude)
+    half_dphi = (other_phi - phi) / 2
+    half_dlambda = math.radians(other_longitude - longitude) / 2
+    a = (
+        math.sin(half_dphi) ** 2
+        + math.cos(phi) * math.cos(other_phi) * math.sin(half_dlambda) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def degree_spans(latitude: float, radius_km: float) -> Tuple[float, Optional[float]]:
+    """
+    Half height and half width in degrees of the smallest latitude/longitude
+    box around the circle of radius_km, no width when the circle reaches a
+    pole and so spans every longitude
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    if abs(latitude) + dlat >= 90:
+        return dlat, None
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    return dlat, math.degrees(math.asin(min(1.0, ratio)))
+
+
+def bounding_boxes(latitude: float, longitude: float, radius_km: float) -> List[Box]:
+    """
+    (min latitude, min longitude, max latitude, max longitude) boxes covering
+    every point within radius_km, two of them when the circle crosses the
+    antimeridian
+    """
+    dlat, dlng = degree_spans(latitude, radius_km)
+    min_lat, max_lat = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    if dlng is None:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    min_lng, max_lng = longitude - dlng, longitude + dlng
+    if min_lng < -180:
+        return [
+            (min_lat, min_lng + 360, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lng),
+        ]
+    if max_lng > 180:
+        return [
+            (min_lat, min_lng, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lng - 360),
+        ]
+    return [(min_lat, min_lng, max_lat, max_lng)]
+
+
+class GridIndex:
+    """
+    Points bucketed into cells of cell_degrees by cell_degrees.
+
+    nearest scans the cell of the query point and then rings of cells around
+    it, closest ring first, and stops as soon as no point of the next ring
+    can be closer than the limit-th point found or lie within the radius, so
+    a query touches the few cells around the point however many points the
+    index holds.
+    """
+
+    def __init__(self, cell_degrees: float = 0.01):
+        self.cell_degrees = cell_degrees
+        self._rows = math.ceil(180 / cell_degrees)
+        self._columns = math.ceil(360 / cell_degrees)
+        # cell_degrees rounded down so the cells tile the globe exactly
+        self._row_degrees = 180 / self._rows
+        self._column_degrees = 360 / self._columns
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            # cell -> {key: (latitude, longitude in radians, cos latitude)}
+            self._cells: Dict[Tuple[int, int], Dict[Hashable, tuple]] = {}
+            self._cell_of: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._cell_of
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        row = min(int((latitude + 90) / self._row_degrees), self._rows - 1)
+        column = int((longitude + 180) / self._column_degrees) % self._columns
+        return row, column
+
+    def set(self, key: Hashable, latitude: float, longitude: float):
+        phi = math.radians(latitude)
+        point = (phi, math.radians(longitude), math.cos(phi))
+        cell = self._cell(latitude, longitude)
+        with self._lock:
+            previous = self._cell_of.get(key)
+            if previous is not None and previous != cell:
+                self._discard(key, previous)
+            self._cells.setdefault(cell, {})[key] = point
+            self._cell_of[key] = cell
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            cell = self._cell_of.pop(key, None)
+            if cell is not None:
+                self._discard(key, cell)
+
+    def _discard(self, key: Hashable, cell: Tuple[int, int]):
+        points = self._cells[cell]
+        del points[key]
+        if not points:
+            del self._cells[cell]
+
+    def _ring(self, row: int, column: int, ring: int):
+        if ring == 0:
+            yield row, column
+            return
+        for drow in range(-ring, ring + 1):
+            ring_row = row + drow
+            if not 0 <= ring_row < self._rows:
+                continue
+            if abs(drow) == ring:
+                dcolumns = range(-ring, ring + 1)
+            else:
+                dcolumns = (-ring, ring)
+            for dcolumn in dcolumns:
+                yield ring_row, (column + dcolumn) % self._columns
+
+    def _ring_distance(self, latitude: float, ring: int) -> float:
+        """
+        Lower bound in kilometres of the distance from a point of the centre
+        cell to any point of ring. Whole cells lie between them, so the
+        latitudes or longitudes differ by (ring - 1) cells, and along a
+        parallel the gap shrinks towards the poles with the cosine of the
+        highest latitude the ring reaches.
+        """
+        if ring <= 1:
+            return 0.0
+        # columns past halfway round the globe come back closer
+        cells_apart = min(ring - 1, self._columns - ring - 1)
+        if cells_apart <= 0:
+            return 0.0
+        gap = math.radians(cells_apart * min(self._row_degrees, self._column_degrees))
+        highest = min(90.0, abs(latitude) + (ring + 1) * self._row_degrees)
+        return (
+            2
+            * EARTH_RADIUS_KM
+            * math.asin(min(1.0, math.cos(math.radians(highest)) * math.sin(gap / 2)))
+        )
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int,
+        accept: Optional[Callable[[Hashable], bool]] = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Up to limit (key, distance in km) pairs within radius_km, closest
+        first, of the keys accept returns True for
+        """
+        if limit <= 0:
+            return []
+        phi, lam = math.radians(latitude), math.radians(longitude)
+        cos_phi = math.cos(phi)
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+        diameter = 2 * EARTH_RADIUS_KM
+        # haversine term of radius_km, compared before the asin
+        max_a = sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+        # (-a, key) of the best matches so far, a max-heap of the worst one
+        best: List[Tuple[float, Hashable]] = []
+
+        def scan(points: Dict[Hashable, tuple]):
+            for key, (point_phi, point_lam, point_cos) in points.items():
+                a = (
+                    sin((point_phi - phi) / 2) ** 2
+                    + cos_phi * point_cos * sin((point_lam - lam) / 2) ** 2
+                )
+                if a > max_a or (len(best) == limit and -a <= best[0][0]):
+                    continue
+                if accept is not None and not accept(key):
+                    continue
+                if len(best) < limit:
+                    heapq.heappush(best, (-a, key))
+                else:
+                    heapq.heapreplace(best, (-a, key))
+
+        row, column = self._cell(latitude, longitude)
+        dlat, dlng = degree_spans(latitude, radius_km)
+        first_row = max(int((latitude - dlat + 90) / self._row_degrees), 0)
+        last_row = min(int((latitude + dlat + 90) / self._row_degrees), self._rows - 1)
+        column_reach = self._columns // 2
+        if dlng is not None:
+            column_reach = min(int(dlng / self._column_degrees) + 1, column_reach)
+
+        def in_reach(cell: Tuple[int, int]) -> bool:
+            columns_apart = abs(cell[1] - column) % self._columns
+            return first_row <= cell[0] <= last_row and (
+                min(columns_apart, self._columns - columns_apart) <= column_reach
+            )
+
+        with self._lock:
+            reach_cells = (last_row - first_row + 1) * (2 * column_reach + 1)
+            if reach_cells > len(self._cells):
+                # the circle covers more cells than hold points, near a pole
+                # or with a large radius, so visit the occupied ones instead
+                for cell, points in self._cells.items():
+                    if in_reach(cell):
+                        scan(points)
+            else:
+                seen = set()
+                rings = max(row - first_row, last_row - row, column_reach)
+                for ring in range(rings + 1):
+                    if len(best) == limit:
+                        bound = self._ring_distance(latitude, ring)
+                        if diameter * asin(min(1.0, sqrt(-best[0][0]))) <= bound:
+                            break
+                    for cell in self._ring(row, column, ring):
+                        if cell in seen or not in_reach(cell):
+                            continue
+                        seen.add(cell)
+                        points = self._cells.get(cell)
+                        if points:
+                            scan(points)
+        ranked = sorted((-negative_a, key) for negative_a, key in best)
+        return [(key, diameter * asin(min(1.0, sqrt(a)))) for a, key in ranked]
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+from foodie import config
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the password hasher has no room left in its queue, or its
+    workers died twice in a row
+    """
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification on a dedicated process pool.
+
+    bcrypt is CPU bound, running it inline in a sync endpoint occupies one of
+    the server's threadpool workers for the whole hash. Submitting it here
+    frees the event loop and the threadpool while the hash runs on a separate
+    core. The number of pending jobs is bounded, once the bound is reached new
+    jobs are rejected immediately with PasswordHasherBusy instead of queueing
+    up behind work that is already late. A pool broken by a dead worker is
+    replaced and the job tried once more.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Drop a broken executor, the next job starts a new one"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+
+    def _release(self, latency: float, completed: bool):
+        with self._lock:
+            self._pending -= 1
+            if not completed:
+                self._failed += 1
+                return
+            self._completed += 1
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Run func(*args) on the process pool.
+        func and args must be picklable, i.e module level functions.
+        """
+        self._acquire()
+        start = time.perf_counter()
+        completed = False
+        try:
+            loop = asyncio.get_running_loop()
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    result = await loop.run_in_executor(executor, func, *args)
+                except BrokenProcessPool:
+                    # a worker was killed, every job of this pool fails now
+                    self._discard(executor)
+                    if attempt:
+                        raise PasswordHasherBusy()
+                    continue
+                completed = True
+                return result
+        finally:
+            self._release(time.perf_counter() - start, completed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "queue_depth": max(0, self._pending - self.max_workers),
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "average_latency": (
+                    self._total_latency / self._completed if self._completed else 0.0
+                ),
+                "max_latency": self._max_latency,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=config.PASSWORD_HASHER_WORKERS,
+    max_pending=config.PASSWORD_HASHER_MAX_PENDING,
+)
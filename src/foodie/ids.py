@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+import uuid
+from foodie import config
+
+
+class _UUID7Generator:
+    """
+    Generates UUIDv7 values: a 48 bit unix timestamp in milliseconds followed
+    by random bits, so ids sort by creation time.
+
+    The 12 bits after the version hold a counter that is reseeded every
+    millisecond and incremented for ids created within the same millisecond,
+    keeping ids from one process strictly increasing. When the counter runs
+    out or the clock goes backwards the timestamp is advanced past the last
+    one used instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._counter = 0
+
+    def __call__(self) -> uuid.UUID:
+        now_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # leave headroom for ids created within the same millisecond
+                self._counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+            else:
+                self._counter += 1
+                if self._counter > 0xFFF:
+                    self._last_ms += 1
+                    self._counter = 0
+            unix_ms, counter = self._last_ms, self._counter
+        rand_b = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+        value = (
+            (unix_ms & 0xFFFF_FFFF_FFFF) << 80
+            | 0x7 << 76
+            | counter << 64
+            | 0b10 << 62
+            | rand_b
+        )
+        return uuid.UUID(int=value)
+
+
+uuid7 = _UUID7Generator()
+
+
+def uuid7_timestamp(value: uuid.UUID) -> float:
+    """Unix time in seconds at which a UUIDv7 was generated"""
+    return (value.int >> 80) / 1000
+
+
+def new_id() -> uuid.UUID:
+    """
+    Primary key default for entities, time ordered when TIME_ORDERED_IDS is
+    enabled and random otherwise.
+    """
+    if config.TIME_ORDERED_IDS:
+        return uuid7()
+    return uuid.uuid4()
@@ -0,0 +1,318 @@
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from functools import partial
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+STOP_WORDS = frozenset(
+    ["a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with"]
+)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms. Stop words are dropped and a
+    trailing plural s is stripped so "wraps" finds "wrap".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.casefold()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class InvertedIndex:
+    """
+    In-process full text index over documents made of weighted fields.
+
+    Every document gets an ordinal, postings are arrays of ordinals in
+    increasing order with a parallel array of weighted term frequencies,
+    which keeps a million documents in a few hundred megabytes and lets
+    conjunctive queries probe the longer postings with a binary search.
+    Updating a document tombstones its old ordinal and appends a new one,
+    tombstones are compacted away once they outnumber live documents.
+
+    Category names are indexed separately from documents, a term matching a
+    category name matches every document in that category, so renaming a
+    category does not touch the documents.
+
+    Ranking is BM25 over the weighted term frequencies.
+    """
+
+    FIELD_WEIGHTS = {"name": 3, "items": 2, "description": 1}
+    CATEGORY_WEIGHT = 2
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._ids: List[Optional[Hashable]] = []
+            self._ordinals: Dict[Hashable, int] = {}
+            self._vendors: List[Optional[Hashable]] = []
+            self._available = bytearray()
+            self._lengths = array("I")
+            self._categories: List[Tuple[Hashable, ...]] = []
+            self._vendor_docs: Dict[Hashable, array] = {}
+            self._postings: Dict[str, Tuple[array, array]] = {}
+            self._category_docs: Dict[Hashable, array] = {}
+            self._category_terms: Dict[str, Set[Hashable]] = {}
+            self._category_names: Dict[Hashable, List[str]] = {}
+            self._total_length = 0
+            self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._ordinals
+
+    def upsert(
+        self,
+        doc_id: Hashable,
+        fields: Dict[str, str],
+        vendor_id: Hashable = None,
+        is_available: bool = True,
+        category_ids: Iterable[Hashable] = (),
+    ):
+        """Index a document, replacing any earlier version of it"""
+        frequencies: Dict[str, int] = {}
+        for field, text in fields.items():
+            weight = self.FIELD_WEIGHTS.get(field, 1)
+            for term in tokenize(text or ""):
+                frequencies[term] = frequencies.get(term, 0) + weight
+        with self._lock:
+            self._remove(doc_id)
+            ordinal = len(self._ids)
+            self._ids.append(doc_id)
+            self._ordinals[doc_id] = ordinal
+            self._vendors.append(vendor_id)
+            self._available.append(1 if is_available else 0)
+            length = sum(frequencies.values())
+            self._lengths.append(length)
+            self._total_length += length
+            categories = tuple(category_ids)
+            self._categories.append(categories)
+            self._vendor_docs.setdefault(vendor_id, array("I")).append(ordinal)
+            for term, frequency in frequencies.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("H"))
+                postings[0].append(ordinal)
+                postings[1].append(min(frequency, 0xFFFF))
+            for category_id in categories:
+                self._category_docs.setdefault(category_id, array("I")).append(ordinal)
+
+    def remove(self, doc_id: Hashable):
+        with self._lock:
+            self._remove(doc_id)
+            if self._tombstones > max(1024, len(self._ordinals)):
+                self._compact()
+
+    def _remove(self, doc_id: Hashable):
+        ordinal = self._ordinals.pop(doc_id, None)
+        if ordinal is None:
+            return
+        self._ids[ordinal] = None
+        self._total_length -= self._lengths[ordinal]
+        self._tombstones += 1
+
+    def _compact(self):
+        live = [
+            ordinal for ordinal, doc_id in enumerate(self._ids) if doc_id is not None
+        ]
+        renumber = {old: new for new, old in enumerate(live)}
+        self._ids = [self._ids[ordinal] for ordinal in live]
+        self._ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(self._ids)}
+        self._vendors = [self._vendors[ordinal] for ordinal in live]
+        self._available = bytearray(self._available[ordinal] for ordinal in live)
+        self._lengths = array("I", (self._lengths[ordinal] for ordinal in live))
+        self._categories = [self._categories[ordinal] for ordinal in live]
+        postings = {}
+        for term, (ordinals, frequencies) in self._postings.items():
+            kept = [
+                (renumber[ordinal], frequency)
+                for ordinal, frequency in zip(ordinals, frequencies)
+                if ordinal in renumber
+            ]
+            if kept:
+                postings[term] = (
+                    array("I", (ordinal for ordinal, _ in kept)),
+                    array("H", (frequency for _, frequency in kept)),
+                )
+        self._postings = postings
+        self._category_docs = self._renumber(self._category_docs, renumber)
+        self._vendor_docs = self._renumber(self._vendor_docs, renumber)
+        self._tombstones = 0
+
+    @staticmethod
+    def _renumber(docs: Dict[Hashable, array], renumber: Dict[int, int]):
+        return {
+            key: array(
+                "I", (renumber[ordinal] for ordinal in ordinals if ordinal in renumber)
+            )
+            for key, ordinals in docs.items()
+        }
+
+    def set_category(self, category_id: Hashable, name: str):
+        with self._lock:
+            self._drop_category_terms(category_id)
+            terms = sorted(set(tokenize(name or "")))
+            self._category_names[category_id] = terms
+            for term in terms:
+                self._category_terms.setdefault(term, set()).add(category_id)
+
+    def remove_category(self, category_id: Hashable):
+        with self._lock:
+            self._drop_category_terms(category_id)
+            self._category_docs.pop(category_id, None)
+
+    def _drop_category_terms(self, category_id: Hashable):
+        for term in self._category_names.pop(category_id, []):
+            categories = self._category_terms.get(term)
+            if categories is not None:
+                categories.discard(category_id)
+                if not categories:
+                    del self._category_terms[term]
+
+    def _document_frequency(self, term: str) -> int:
+        frequency = len(self._postings.get(term, ((),))[0])
+        for category_id in self._category_terms.get(term, ()):
+            frequency += len(self._category_docs.get(category_id, ()))
+        return frequency
+
+    def _term_frequency(self, term: str, ordinal: int) -> int:
+        frequency = 0
+        postings = self._postings.get(term)
+        if postings is not None:
+            ordinals, frequencies = postings
+            index = bisect_left(ordinals, ordinal)
+            if index < len(ordinals) and ordinals[index] == ordinal:
+                frequency = frequencies[index]
+        categories = self._category_terms.get(term)
+        if categories and not categories.isdisjoint(self._categories[ordinal]):
+            frequency += self.CATEGORY_WEIGHT
+        return frequency
+
+    def _matches(self, term: str) -> Iterable[Tuple[int, int]]:
+        """Ordinals and weighted frequencies of the documents containing term"""
+        postings = self._postings.get(term)
+        categories = self._category_terms.get(term)
+        if not categories:
+            return zip(*postings) if postings is not None else ()
+        matches: Dict[int, int] = {}
+        if postings is not None:
+            matches.update(zip(*postings))
+        for category_id in categories:
+            for ordinal in self._category_docs.get(category_id, ()):
+                matches[ordinal] = matches.get(ordinal, 0) + self.CATEGORY_WEIGHT
+        return matches.items()
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        vendor_id: Hashable = None,
+        is_available: Optional[bool] = None,
+        category_id: Hashable = None,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Ids and scores of the best matching documents containing every term
+        of query, best first, ties in the order documents were indexed.
+
+        Candidates come from the postings of the rarest term, or from the
+        documents of the vendor or category filtered on when there are fewer
+        of those, the other terms are probed with a binary search.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            live = len(self._ordinals)
+            if not live:
+                return []
+            frequencies = {term: self._document_frequency(term) for term in terms}
+            if not all(frequencies.values()):
+                return []
+            rarest, *others = sorted(terms, key=frequencies.__getitem__)
+            idf = {
+                term: math.log(1 + (live - frequency + 0.5) / (frequency + 0.5))
+                for term, frequency in frequencies.items()
+            }
+            candidates = self._matches(rarest)
+            candidate_count = frequencies[rarest]
+            for key, docs in (
+                (vendor_id, self._vendor_docs),
+                (category_id, self._category_docs),
+            ):
+                if key is None:
+                    continue
+                ordinals = docs.get(key, ())
+                if len(ordinals) < candidate_count:
+                    candidates = (
+                        (ordinal, self._term_frequency(rarest, ordinal))
+                        for ordinal in ordinals
+                    )
+                    candidate_count = len(ordinals)
+                    break
+            # a binary search per candidate beats hashing a long postings list
+            # only while there are few candidates
+            probes = [
+                (
+                    idf[term],
+                    dict(self._matches(term)).get
+                    if candidate_count * 16 > frequencies[term]
+                    else partial(self._term_frequency, term),
+                )
+                for term in others
+            ]
+
+            ids, vendors, lengths = self._ids, self._vendors, self._lengths
+            available, categories = self._available, self._categories
+            wanted = None if is_available is None else int(is_available)
+            # BM25 with the constant parts of the length normalisation hoisted
+            fixed = self.K1 * (1 - self.B)
+            per_length = self.K1 * self.B / max(self._total_length / live, 1)
+            rarest_idf = idf[rarest]
+            scored = []
+            for ordinal, frequency in candidates:
+                if not frequency or ids[ordinal] is None:
+                    continue
+                if vendor_id is not None and vendors[ordinal] != vendor_id:
+                    continue
+                if wanted is not None and available[ordinal] != wanted:
+                    continue
+                if category_id is not None and category_id not in categories[ordinal]:
+                    continue
+                norm = fixed + per_length * lengths[ordinal]
+                score = rarest_idf * frequency / (frequency + norm)
+                for term_idf, probe in probes:
+                    term_frequency = probe(ordinal)
+                    if not term_frequency:
+                        break
+                    score += term_idf * term_frequency / (term_frequency + norm)
+                else:
+                    scored.append((score, -ordinal))
+            best = heapq.nlargest(limit, scored)
+            return [(ids[-ordinal], score * (self.K1 + 1)) for score, ordinal in best]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._ordinals),
+                "terms": len(self._postings),
+                "categories": len(self._category_names),
+                "tombstones": self._tombstones,
+            }
@@ -0,0 +1,173 @@
+import threading
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from foodie import config, enums
+from foodie.db import models
+from foodie.db.locations import distance_km, within_bounding_boxes
+from foodie.db.opening_hours import open_in_slot
+from foodie.geo import GridIndex
+from foodie.opening_hours import opening_hours
+from foodie.synced_index import CommitSyncedIndex
+
+
+NearbyVendors = List[Tuple[models.Vendor, float]]
+
+
+class PostgresVendorLocator:
+    """
+    Finds vendors through the GiST index over their coordinates, see
+    foodie/db/locations.py.
+    """
+
+    async def nearby(
+        self,
+        session: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int = 20,
+        vendor_type: Optional[enums.VendorType] = None,
+        open_slot: Optional[int] = None,
+    ) -> NearbyVendors:
+        distance = distance_km(models.Vendor, latitude, longitude).label("distance")
+        query = select(models.Vendor, distance).where(
+            within_bounding_boxes(models.Vendor, latitude, longitude, radius_km),
+            distance <= radius_km,
+        )
+        if vendor_type is not None:
+            query = query.where(models.Vendor.type == vendor_type)
+        if open_slot is not None:
+            query = query.where(open_in_slot(models.Vendor, open_slot))
+        query = query.order_by(distance, models.Vendor.id).limit(limit)
+        return [tuple(row) for row in (await session.execute(query))]
+
+    def clear(self):
+        """Nothing is kept in process"""
+
+
+class MemoryVendorLocator(CommitSyncedIndex):
+    """Finds vendors through a GridIndex of their locations kept in this process"""
+
+    def __init__(self, index: Optional[GridIndex] = None):
+        super().__init__()
+        self.index = index or GridIndex(config.LOCATION_GRID_DEGREES)
+        self._types: Dict[UUID, enums.VendorType] = {}
+        self._lock = threading.Lock()
+
+    def _on_flush(self, session: Session, flush_context):
+        for instance in (*session.new, *session.dirty):
+            if isinstance(instance, models.Vendor):
+                self.pending(session)[instance.id] = self.snapshot(instance)
+        for instance in session.deleted:
+            if isinstance(instance, models.Vendor):
+                self.pending(session)[instance.id] = None
+
+    def apply(self, pending: dict):
+        for vendor_id, snapshot in pending.items():
+            if snapshot is None:
+                self.remove_vendors([vendor_id])
+            else:
+                self._apply(vendor_id, snapshot)
+
+    @staticmethod
+    def snapshot(vendor: models.Vendor) -> tuple:
+        return vendor.latitude, vendor.longitude, vendor.type
+
+    def _apply(self, vendor_id: UUID, snapshot: tuple):
+        latitude, longitude, vendor_type = snapshot
+        if latitude is None or longitude is None:
+            self.remove_vendors([vendor_id])
+            return
+        self._types[vendor_id] = vendor_type
+        self.index.set(vendor_id, latitude, longitude)
+
+    def locate_vendors(self, vendors: List[models.Vendor]):
+        for vendor in vendors:
+            self._apply(vendor.id, self.snapshot(vendor))
+
+    def remove_vendors(self, vendor_ids: List[UUID]):
+        for vendor_id in vendor_ids:
+            self.index.remove(vendor_id)
+            self._types.pop(vendor_id, None)
+
+    def rebuild(self, session: Session):
+        """Index the location of every vendor in the database from scratch"""
+        with self._lock:
+            self.clear()
+            for vendor_id, latitude, longitude, vendor_type in session.execute(
+                select(
+                    models.Vendor.id,
+                    models.Vendor.latitude,
+                    models.Vendor.longitude,
+                    models.Vendor.type,
+                ).where(
+                    models.Vendor.latitude.isnot(None),
+                    models.Vendor.longitude.isnot(None),
+                )
+            ):
+                self._apply(vendor_id, (latitude, longitude, vendor_type))
+
+    def _accepts(
+        self,
+        vendor_type: Optional[enums.VendorType],
+        open_slot: Optional[int],
+        vendor_id: UUID,
+    ) -> bool:
+        if vendor_type is not None and self._types.get(vendor_id) != vendor_type:
+            return False
+        return open_slot is None or opening_hours.is_open(vendor_id, open_slot)
+
+    async def nearby(
+        self,
+        session: AsyncSession,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int = 20,
+        vendor_type: Optional[enums.VendorType] = None,
+        open_slot: Optional[int] = None,
+    ) -> NearbyVendors:
+        accept = None
+        if vendor_type is not None or open_slot is not None:
+            accept = partial(self._accepts, vendor_type, open_slot)
+        nearest = self.index.nearest(latitude, longitude, radius_km, limit, accept)
+        if not nearest:
+            return []
+        vendors = (
+            (
+                await session.execute(
+                    select(models.Vendor).where(
+                        models.Vendor.id.in_([vendor_id for vendor_id, _ in nearest])
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        by_id = {vendor.id: vendor for vendor in vendors}
+        return [
+            (by_id[vendor_id], distance)
+            for vendor_id, distance in nearest
+            if vendor_id in by_id
+        ]
+
+    def clear(self):
+        self.index.clear()
+        self._types.clear()
+
+
+def get_vendor_locator(backend: str, database_url: str):
+    if backend == "auto":
+        backend = "postgres" if database_url.startswith("postgres") else "memory"
+    if backend == "postgres":
+        return PostgresVendorLocator()
+    if backend == "memory":
+        return MemoryVendorLocator()
+    raise ValueError(f"Unknown location backend {backend}")
+
+
+vendor_locator = get_vendor_locator(config.LOCATION_BACKEND, config.DATABASE_URL)
@@ -1,6 +1,13 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
 from foodie import config
+from foodie.api import exceptions
+from foodie.api.middleware import QueryStatsMiddleware
+from foodie.db.base import connect_async_engine, dispose_async_engine
+from foodie.hashing import PasswordHasherBusy, password_hasher
+from foodie.outbox import email_dispatcher, start_email_dispatcher
+from foodie.synced_index import build_synced_indexes
 from foodie.api.router import (
     get_admin_router,
     get_courier_admin_router,
@@ -33,6 +40,7 @@ def get_api_app():
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    api.add_middleware(QueryStatsMiddleware, server_timing=config.SERVER_TIMING)
     api.include_router(
         get_admin_router(),
         dependencies=[Depends(get_current_admin)],
@@ -65,6 +73,13 @@ def get_api_app():
     )
 
     api.include_router(get_router(), tags=["User Routes"])
+
+    @api.exception_handler(PasswordHasherBusy)
+    async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+        return await http_exception_handler(
+            request, exceptions.password_hasher_busy_exception
+        )
+
     return api
 
 
@@ -76,6 +91,12 @@ def get_app() -> FastAPI:
     app = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
     api_app = get_api_app()
     app.mount("/api", app=api_app)
+    app.add_event_handler("startup", connect_async_engine)
+    app.add_event_handler("startup", build_synced_indexes)
+    app.add_event_handler("startup", start_email_dispatcher)
+    app.add_event_handler("shutdown", email_dispatcher.stop)
+    app.add_event_handler("shutdown", password_hasher.shutdown)
+    app.add_event_handler("shutdown", dispose_async_engine)
     return app
 
 
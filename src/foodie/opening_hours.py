@@ -0,0 +1,219 @@
+import threading
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+from foodie import config, enums
+from foodie.db import models
+from foodie.db.opening_hours import open_in_slot
+from foodie.synced_index import CommitSyncedIndex
+
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+WEEK_MASK = (1 << WEEK_SLOTS) - 1
+DAYS = list(enums.DaysOfTheWeek)
+
+Hours = Tuple[Optional[time], Optional[time]]
+
+
+def day_bits(
+    day: enums.DaysOfTheWeek, open_from: Optional[time], open_to: Optional[time]
+):
+    """
+    Week slots the vendor is open for in full on day: from open_from to
+    open_to, into the next day when open_to is not after open_from, round
+    the clock when they are equal. No open_from means closed, no open_to
+    open until midnight. Partly open slots are left out so a vendor is never
+    shown open when it is closed.
+    """
+    if open_from is None:
+        return 0
+    start = open_from.hour * 60 + open_from.minute + (open_from.second > 0)
+    end = 24 * 60 if open_to is None else open_to.hour * 60 + open_to.minute
+    if end <= start and open_to is not None:
+        end += 24 * 60
+    first = -(-start // SLOT_MINUTES)
+    last = end // SLOT_MINUTES
+    if last <= first:
+        return 0
+    bits = ((1 << (last - first)) - 1) << (DAYS.index(day) * SLOTS_PER_DAY + first)
+    # Sunday night runs into Monday morning
+    return (bits | bits >> WEEK_SLOTS) & WEEK_MASK
+
+
+def week_bits(
+    hours: Iterable[Tuple[enums.DaysOfTheWeek, Optional[time], Optional[time]]]
+) -> int:
+    """Week slots the vendor is open for in full over days of hours"""
+    week = 0
+    for day, open_from, open_to in hours:
+        week |= day_bits(day, open_from, open_to)
+    return week
+
+
+def week_slot(moment: datetime) -> int:
+    """
+    Week slot of moment in the vendors' time, OPENING_HOURS_UTC_OFFSET
+    minutes from UTC. Naive datetimes are taken as UTC.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    local = moment + timedelta(minutes=config.OPENING_HOURS_UTC_OFFSET)
+    return (
+        local.weekday() * SLOTS_PER_DAY
+        + (local.hour * 60 + local.minute) // SLOT_MINUTES
+    )
+
+
+class OpeningHoursIndex:
+    """
+    Every vendor's week as one int of WEEK_SLOTS bits, bit n set when the
+    vendor is open for the n-th SLOT_MINUTES of the week counting from
+    Monday midnight. Whether a vendor is open at some time is then a single
+    bit test instead of loading and comparing its opening hours.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._hours: Dict[Hashable, Dict[enums.DaysOfTheWeek, Hours]] = {}
+            self._weeks: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._weeks)
+
+    def _update(self, vendor_id: Hashable):
+        week = week_bits(
+            (day, open_from, open_to)
+            for day, (open_from, open_to) in self._hours.get(vendor_id, {}).items()
+        )
+        if week:
+            self._weeks[vendor_id] = week
+        else:
+            self._weeks.pop(vendor_id, None)
+            self._hours.pop(vendor_id, None)
+
+    def set_day(
+        self,
+        vendor_id: Hashable,
+        day: enums.DaysOfTheWeek,
+        open_from: Optional[time],
+        open_to: Optional[time],
+    ):
+        with self._lock:
+            self._hours.setdefault(vendor_id, {})[day] = (open_from, open_to)
+            self._update(vendor_id)
+
+    def remove_day(self, vendor_id: Hashable, day: enums.DaysOfTheWeek):
+        with self._lock:
+            self._hours.get(vendor_id, {}).pop(day, None)
+            self._update(vendor_id)
+
+    def set_vendor(
+        self,
+        vendor_id: Hashable,
+        hours: Iterable[Tuple[enums.DaysOfTheWeek, Optional[time], Optional[time]]],
+    ):
+        """Replace every day of the vendor's opening hours"""
+        with self._lock:
+            self._hours[vendor_id] = {
+                day: (open_from, open_to) for day, open_from, open_to in hours
+            }
+            self._update(vendor_id)
+
+    def remove_vendor(self, vendor_id: Hashable):
+        with self._lock:
+            self._hours.pop(vendor_id, None)
+            self._weeks.pop(vendor_id, None)
+
+    def week(self, vendor_id: Hashable) -> int:
+        return self._weeks.get(vendor_id, 0)
+
+    def is_open(self, vendor_id: Hashable, slot: int) -> bool:
+        return bool(self._weeks.get(vendor_id, 0) >> slot & 1)
+
+
+class PostgresOpeningHours:
+    """
+    Finds open vendors with a bit test on vendor_open_slots, see
+    foodie/db/opening_hours.py
+    """
+
+    def where_open(self, query, slot: int):
+        """Restrict query, a select of vendors, to those open in slot"""
+        return query.where(open_in_slot(models.Vendor, slot))
+
+    def clear(self):
+        """Nothing is kept in process"""
+
+
+class MemoryOpeningHours(CommitSyncedIndex, OpeningHoursIndex):
+    """OpeningHoursIndex of the opening hours in the database"""
+
+    def new_pending(self) -> list:
+        return []
+
+    def _on_flush(self, session: Session, flush_context):
+        for instance in (*session.new, *session.dirty):
+            if isinstance(instance, models.OpenInformation):
+                pending = self.pending(session)
+                for day in inspect(instance).attrs.day.history.deleted:
+                    pending.append((instance.vendor_id, day, None))
+                pending.append(
+                    (
+                        instance.vendor_id,
+                        instance.day,
+                        (instance.open_from, instance.open_to),
+                    )
+                )
+        for instance in session.deleted:
+            if isinstance(instance, models.OpenInformation):
+                self.pending(session).append((instance.vendor_id, instance.day, None))
+            elif isinstance(instance, models.Vendor):
+                self.pending(session).append((instance.id, None, None))
+
+    def apply(self, pending: list):
+        with self._lock:
+            for vendor_id, day, hours in pending:
+                if day is None:
+                    self.remove_vendor(vendor_id)
+                elif hours is None:
+                    self.remove_day(vendor_id, day)
+                else:
+                    self.set_day(vendor_id, day, *hours)
+
+    def rebuild(self, session: Session):
+        """Load every vendor's opening hours from the database"""
+        hours: Dict[Hashable, list] = {}
+        for vendor_id, day, open_from, open_to in session.execute(
+            select(
+                models.OpenInformation.vendor_id,
+                models.OpenInformation.day,
+                models.OpenInformation.open_from,
+                models.OpenInformation.open_to,
+            )
+        ):
+            hours.setdefault(vendor_id, []).append((day, open_from, open_to))
+        with self._lock:
+            self.clear()
+            for vendor_id, vendor_hours in hours.items():
+                self.set_vendor(vendor_id, vendor_hours)
+
+
+def get_opening_hours(backend: str, database_url: str):
+    if backend == "auto":
+        backend = "postgres" if database_url.startswith("postgres") else "memory"
+    if backend == "postgres":
+        return PostgresOpeningHours()
+    if backend == "memory":
+        return MemoryOpeningHours()
+    raise ValueError(f"Unknown location backend {backend}")
+
+
+# open vendors are found alongside nearby ones
+opening_hours = get_opening_hours(config.LOCATION_BACKEND, config.DATABASE_URL)
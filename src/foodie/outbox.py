@@ -0,0 +1,215 @@
+"""
+Outgoing email through an outbox table.
+
+Requests never talk to the SMTP server. queue_email adds an OutboxEmail row
+to the request's session, so the email is committed with the change it is
+about, or not at all, and the request returns as soon as that commit does.
+
+EmailDispatcher drains the table in the background: it takes up to
+OUTBOX_BATCH_SIZE due emails at a time, locked with SKIP LOCKED on Postgres
+so several processes can dispatch side by side, and sends them over one SMTP
+connection, kept open while there is more to send. A failed send is retried
+with an exponential backoff, emails the server refuses for good (5xx) or
+that failed OUTBOX_MAX_ATTEMPTS times are marked failed.
+"""
+import asyncio
+import logging
+import smtplib
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from foodie import config, enums
+from foodie.db import models
+from foodie.db.base import SessionLocal
+
+
+logger = logging.getLogger("foodie.outbox")
+
+# replies refusing a single message, any other error (smtplib's are OSErrors)
+# leaves the connection unusable for the rest of a batch
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+# rows per executemany of queue_emails
+QUEUE_BATCH_SIZE = 500
+
+
+def queue_email(session: AsyncSession, recipient: str, subject: str, body: str):
+    """Add an email to session, sent once session commits"""
+    session.add(models.OutboxEmail(recipient=recipient, subject=subject, body=body))
+
+
+def queue_emails(session: Session, emails: List[dict]):
+    """
+    Insert many emails, dicts of recipient, subject and body, with an
+    executemany per QUEUE_BATCH_SIZE, sent once session commits
+    """
+    for start in range(0, len(emails), QUEUE_BATCH_SIZE):
+        session.execute(
+            insert(models.OutboxEmail), emails[start : start + QUEUE_BATCH_SIZE]
+        )
+
+
+def is_permanent(error: Exception) -> bool:
+    """whether retrying a send that failed with error cannot succeed"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class EmailDispatcher:
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        host: str = config.SMTP_HOST,
+        port: int = config.SMTP_PORT,
+        sender: str = config.EMAIL_SENDER,
+        batch_size: int = config.OUTBOX_BATCH_SIZE,
+        poll_seconds: float = config.OUTBOX_POLL_SECONDS,
+        max_attempts: int = config.OUTBOX_MAX_ATTEMPTS,
+        backoff_base: float = config.OUTBOX_BACKOFF_BASE,
+        backoff_max: float = config.OUTBOX_BACKOFF_MAX,
+    ):
+        self.session_factory = session_factory
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=config.SMTP_TIMEOUT)
+            try:
+                if config.SMTP_STARTTLS:
+                    smtp.starttls()
+                if config.SMTP_USERNAME:
+                    smtp.login(config.SMTP_USERNAME, config.SMTP_PASSWORD)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+        return self._smtp
+
+    def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+
+    def message(self, email: models.OutboxEmail) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = email.recipient
+        message["Subject"] = email.subject
+        message.set_content(email.body)
+        return message
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(
+            seconds=min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        )
+
+    def failed(
+        self,
+        email: models.OutboxEmail,
+        error: Exception,
+        now: datetime,
+        permanent: bool = False,
+    ):
+        email.attempts += 1
+        email.last_error = repr(error)[:500]
+        if permanent or email.attempts >= self.max_attempts:
+            email.status = enums.OutboxStatus.FAILED
+            logger.warning("giving up on email %s: %r", email.id, error)
+        else:
+            email.next_attempt_at = now + self.backoff(email.attempts)
+
+    def dispatch_batch(self, now: Optional[datetime] = None) -> int:
+        """Send a batch of due emails, returns how many were attempted"""
+        now = now or datetime.utcnow()
+        with self.session_factory() as session:
+            emails = (
+                session.execute(
+                    select(models.OutboxEmail)
+                    .where(models.OutboxEmail.status == enums.OutboxStatus.PENDING)
+                    .where(models.OutboxEmail.next_attempt_at <= now)
+                    .order_by(models.OutboxEmail.next_attempt_at)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                .scalars()
+                .all()
+            )
+            if not emails:
+                # idle, give the connection back to the server
+                self.close()
+                return 0
+            attempted = 0
+            for email in emails:
+                attempted += 1
+                try:
+                    self.connection().send_message(self.message(email))
+                except MESSAGE_ERRORS as error:
+                    self.failed(email, error, now, is_permanent(error))
+                except OSError as error:
+                    # the rest of the batch waits for the next poll
+                    self.close()
+                    self.failed(email, error, now)
+                    break
+                else:
+                    email.attempts += 1
+                    email.status = enums.OutboxStatus.SENT
+                    email.sent_at = now
+            session.commit()
+        return attempted
+
+    async def run(self):
+        """Dispatch batches until cancelled, waiting when less than one is due"""
+        try:
+            while True:
+                try:
+                    attempted = await run_in_threadpool(self.dispatch_batch)
+                except Exception:
+                    logger.exception("outbox dispatch failed")
+                    attempted = 0
+                if attempted < self.batch_size:
+                    await asyncio.sleep(self.poll_seconds)
+        finally:
+            self.close()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+email_dispatcher = EmailDispatcher(SessionLocal)
+
+
+async def start_email_dispatcher():
+    if config.OUTBOX_DISPATCH:
+        await email_dispatcher.start()
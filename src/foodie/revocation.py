@@ -0,0 +1,153 @@
+"""
+Revocation of access tokens.
+
+Every access token carries the token_epoch of its principal at the time it
+was issued, and is rejected once the principal's stored epoch has moved past
+it. The epoch is bumped in the transaction that changes the principal's
+password or role, or by revoke_tokens, and a deleted principal's tokens are
+all rejected.
+
+RevocationTable keeps the epochs it reads for REVOCATION_CACHE_SECONDS, so
+most requests are still authenticated from their token alone. Bumps
+committed in this process replace the cached epoch right away, other
+processes see them once their entry expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple, Union
+from uuid import UUID
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, sessionmaker
+from foodie import config, enums
+from foodie.dataclasses import Principal
+from foodie.db import models
+from foodie.db.base import SessionLocal
+from foodie.db.mixins import TokenEpochMixin
+from foodie.synced_index import CommitSyncedIndex
+
+
+PRINCIPAL_MODELS = {
+    enums.PrincipalType.USER: models.User,
+    enums.PrincipalType.ADMIN: models.Admin,
+    enums.PrincipalType.VENDOR_USER: models.VendorUser,
+    enums.PrincipalType.COURIER_USER: models.CourierUser,
+}
+
+PRINCIPAL_TYPES = {
+    model: principal_type for principal_type, model in PRINCIPAL_MODELS.items()
+}
+
+# columns whose change revokes the principal's tokens
+REVOKING_ATTRIBUTES = ("hashed_password", "role")
+
+
+def revoke_tokens(principal: TokenEpochMixin):
+    """Invalidate every access token issued so far, once the session commits"""
+    principal.token_epoch = (principal.token_epoch or 0) + 1
+
+
+class RevocationTable(CommitSyncedIndex):
+    """Short lived cache of the principals' token epochs"""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        ttl: float = config.REVOCATION_CACHE_SECONDS,
+        size: int = config.REVOCATION_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.size = size
+        self._clock = clock
+        self._epochs: "OrderedDict[Tuple[str, str], Tuple[float, Optional[int]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        event.listen(Session, "before_flush", self._on_before_flush)
+
+    @staticmethod
+    def _key(
+        principal_type: enums.PrincipalType, principal_id: Union[UUID, str]
+    ) -> Tuple[str, str]:
+        return enums.PrincipalType(principal_type).value, str(principal_id)
+
+    def _on_before_flush(self, session: Session, flush_context, instances):
+        for instance in session.dirty:
+            if not isinstance(instance, TokenEpochMixin):
+                continue
+            attrs = inspect(instance).attrs
+            if any(
+                name in attrs.keys() and attrs[name].history.has_changes()
+                for name in REVOKING_ATTRIBUTES
+            ):
+                revoke_tokens(instance)
+
+    def _on_flush(self, session: Session, flush_context):
+        for instance in session.dirty:
+            if (
+                isinstance(instance, TokenEpochMixin)
+                and inspect(instance).attrs.token_epoch.history.has_changes()
+            ):
+                key = self._key(PRINCIPAL_TYPES[type(instance)], instance.id)
+                self.pending(session)[key] = instance.token_epoch
+        for instance in session.deleted:
+            if isinstance(instance, TokenEpochMixin):
+                key = self._key(PRINCIPAL_TYPES[type(instance)], instance.id)
+                self.pending(session)[key] = None
+
+    def apply(self, pending: dict):
+        for key, epoch in pending.items():
+            self._set(key, epoch)
+
+    def rebuild(self, session: Session):
+        """Epochs are read as they are needed"""
+
+    def _set(self, key: Tuple[str, str], epoch: Optional[int]):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._epochs[key] = (self._clock() + self.ttl, epoch)
+            self._epochs.move_to_end(key)
+            while len(self._epochs) > self.size:
+                self._epochs.popitem(last=False)
+
+    def set_epoch(
+        self,
+        principal_type: enums.PrincipalType,
+        principal_id: Union[UUID, str],
+        epoch: int,
+    ):
+        """Cache the epoch of a principal just read from the database"""
+        self._set(self._key(principal_type, principal_id), epoch)
+
+    def get_epoch(
+        self, principal_type: enums.PrincipalType, principal_id: Union[UUID, str]
+    ) -> Optional[int]:
+        """The principal's token epoch, none when the principal is gone"""
+        key = self._key(principal_type, principal_id)
+        with self._lock:
+            entry = self._epochs.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._epochs.move_to_end(key)
+                return entry[1]
+        model = PRINCIPAL_MODELS[enums.PrincipalType(principal_type)]
+        with self.session_factory() as session:
+            epoch = session.execute(
+                select(model.token_epoch).where(model.id == principal_id)
+            ).scalar_one_or_none()
+        self._set(key, epoch)
+        return epoch
+
+    def is_revoked(self, principal: Principal) -> bool:
+        epoch = self.get_epoch(principal.principal_type, principal.id)
+        return epoch is None or principal.epoch < epoch
+
+    def clear(self):
+        with self._lock:
+            self._epochs.clear()
+
+
+revocation_table = RevocationTable(SessionLocal)
@@ -0,0 +1,208 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from foodie import config
+from foodie.db import models
+from foodie.inverted_index import InvertedIndex
+from foodie.synced_index import CommitSyncedIndex
+
+
+SearchResults = List[Tuple[models.FoodPackage, float]]
+
+
+def food_package_filters(
+    query,
+    vendor_id: Optional[UUID] = None,
+    is_available: Optional[bool] = None,
+    category_id: Optional[UUID] = None,
+):
+    if vendor_id is not None:
+        query = query.where(models.FoodPackage.vendor_id == vendor_id)
+    if is_available is not None:
+        query = query.where(models.FoodPackage.is_available.is_(is_available))
+    if category_id is not None:
+        association = models.food_packages_food_categories_association_table
+        query = query.where(
+            models.FoodPackage.id.in_(
+                select(association.c.food_package_id).where(
+                    association.c.category_id == category_id
+                )
+            )
+        )
+    return query
+
+
+class PostgresSearch:
+    """
+    Searches the trigger maintained food_packages.search_vector through its
+    GIN index, ranked with ts_rank_cd.
+    """
+
+    async def search(
+        self,
+        session: AsyncSession,
+        text: str,
+        limit: int = 20,
+        vendor_id: Optional[UUID] = None,
+        is_available: Optional[bool] = None,
+        category_id: Optional[UUID] = None,
+    ) -> SearchResults:
+        tsquery = func.plainto_tsquery("english", text)
+        rank = func.ts_rank_cd(models.FoodPackage.search_vector, tsquery).label("rank")
+        query = food_package_filters(
+            select(models.FoodPackage, rank).where(
+                models.FoodPackage.search_vector.op("@@")(tsquery)
+            ),
+            vendor_id,
+            is_available,
+            category_id,
+        )
+        query = query.order_by(rank.desc(), models.FoodPackage.id).limit(limit)
+        return [tuple(row) for row in (await session.execute(query)).all()]
+
+    def clear(self):
+        """Nothing is kept in process"""
+
+
+class MemorySearch(CommitSyncedIndex):
+    """Searches an InvertedIndex of the food packages kept in this process"""
+
+    def __init__(self, index: Optional[InvertedIndex] = None):
+        super().__init__()
+        self.index = index or InvertedIndex()
+        self._lock = threading.Lock()
+
+    def new_pending(self) -> dict:
+        return {"packages": {}, "removed": set(), "categories": {}}
+
+    def _on_flush(self, session: Session, flush_context):
+        for instance in (*session.new, *session.dirty):
+            if isinstance(instance, models.FoodPackage):
+                pending = self.pending(session)
+                pending["packages"][instance.id] = self.snapshot(instance)
+                pending["removed"].discard(instance.id)
+            elif isinstance(instance, models.FoodCategory):
+                self.pending(session)["categories"][instance.id] = instance.name
+        for instance in session.deleted:
+            if isinstance(instance, models.FoodPackage):
+                pending = self.pending(session)
+                pending["packages"].pop(instance.id, None)
+                pending["removed"].add(instance.id)
+            elif isinstance(instance, models.FoodCategory):
+                self.pending(session)["categories"][instance.id] = None
+
+    def apply(self, pending: dict):
+        for category_id, name in pending["categories"].items():
+            if name is None:
+                self.index.remove_category(category_id)
+            else:
+                self.index.set_category(category_id, name)
+        for snapshot in pending["packages"].values():
+            self._apply(snapshot)
+        for package_id in pending["removed"]:
+            self.index.remove(package_id)
+
+    @staticmethod
+    def snapshot(food_package: models.FoodPackage) -> dict:
+        return {
+            "id": food_package.id,
+            "vendor_id": food_package.vendor_id,
+            "is_available": food_package.is_available,
+            "name": food_package.name,
+            "description": food_package.description,
+            "items": list(food_package.items),
+            "categories": {
+                category.id: category.name for category in food_package.categories
+            },
+        }
+
+    def _apply(self, snapshot: dict):
+        for category_id, name in snapshot["categories"].items():
+            self.index.set_category(category_id, name)
+        self.index.upsert(
+            snapshot["id"],
+            {
+                "name": snapshot["name"],
+                "items": " ".join(snapshot["items"]),
+                "description": snapshot["description"],
+            },
+            vendor_id=snapshot["vendor_id"],
+            is_available=snapshot["is_available"] is not False,
+            category_ids=snapshot["categories"],
+        )
+
+    def index_packages(self, food_packages: List[models.FoodPackage]):
+        for food_package in food_packages:
+            self._apply(self.snapshot(food_package))
+
+    def remove_packages(self, package_ids: List[UUID]):
+        for package_id in package_ids:
+            self.index.remove(package_id)
+
+    def rebuild(self, session: Session, chunk_size: int = 1000):
+        """Index every food package in the database from scratch"""
+        with self._lock:
+            self.index.clear()
+            query = (
+                select(models.FoodPackage)
+                .options(selectinload(models.FoodPackage.categories))
+                .execution_options(yield_per=chunk_size)
+            )
+            for food_package in session.execute(query).scalars():
+                self._apply(self.snapshot(food_package))
+
+    async def search(
+        self,
+        session: AsyncSession,
+        text: str,
+        limit: int = 20,
+        vendor_id: Optional[UUID] = None,
+        is_available: Optional[bool] = None,
+        category_id: Optional[UUID] = None,
+    ) -> SearchResults:
+        ranked = self.index.search(
+            text,
+            limit=limit,
+            vendor_id=vendor_id,
+            is_available=is_available,
+            category_id=category_id,
+        )
+        if not ranked:
+            return []
+        scores: Dict[UUID, float] = dict(ranked)
+        food_packages = (
+            (
+                await session.execute(
+                    select(models.FoodPackage).where(
+                        models.FoodPackage.id.in_(list(scores))
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        by_id = {food_package.id: food_package for food_package in food_packages}
+        return [
+            (by_id[package_id], score)
+            for package_id, score in ranked
+            if package_id in by_id
+        ]
+
+    def clear(self):
+        self.index.clear()
+
+
+def get_search_backend(backend: str, database_url: str):
+    if backend == "auto":
+        backend = "postgres" if database_url.startswith("postgres") else "memory"
+    if backend == "postgres":
+        return PostgresSearch()
+    if backend == "memory":
+        return MemorySearch()
+    raise ValueError(f"Unknown search backend {backend}")
+
+
+food_package_search = get_search_backend(config.SEARCH_BACKEND, config.DATABASE_URL)
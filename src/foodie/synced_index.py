@@ -0,0 +1,79 @@
+"""
+In-process indexes following the database through session events.
+
+A CommitSyncedIndex records what each flush changed in the flushing
+session's info, applies it once the transaction commits and drops it when
+the transaction rolls back, so the index never shows uncommitted writes.
+Writes that bypass the ORM must update the index themselves.
+
+Each process holds its own copy, filled from the database by
+build_synced_indexes when the app starts, and only sees the writes it
+committed itself: with more than one worker, the others go stale until
+they restart. The indexes built on this are therefore the memory backends,
+for SQLite and tests, deployments on Postgres answer from the database.
+Caches over the database, like the revocation epochs, expire their entries
+instead.
+"""
+from abc import ABC, abstractmethod
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from foodie.db.base import SessionLocal
+
+
+class CommitSyncedIndex(ABC):
+    """
+    Subclasses record a flush's changes in pending(session) from _on_flush,
+    apply them in apply and load the whole index in rebuild.
+    """
+
+    instances: List["CommitSyncedIndex"] = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        event.listen(Session, "after_flush", self._on_flush)
+        event.listen(Session, "after_commit", self._on_commit)
+        event.listen(Session, "after_rollback", self._on_rollback)
+        CommitSyncedIndex.instances.append(self)
+
+    def new_pending(self):
+        """Empty record of a transaction's changes"""
+        return {}
+
+    def pending(self, session: Session):
+        pending = session.info.get(self)
+        if pending is None:
+            pending = session.info[self] = self.new_pending()
+        return pending
+
+    @abstractmethod
+    def _on_flush(self, session: Session, flush_context):
+        """Record the changes of session's flush in pending(session)"""
+
+    def _on_commit(self, session: Session):
+        pending = session.info.pop(self, None)
+        if pending is not None:
+            self.apply(pending)
+
+    def _on_rollback(self, session: Session):
+        session.info.pop(self, None)
+
+    @abstractmethod
+    def apply(self, pending):
+        """Apply the changes of a committed transaction"""
+
+    @abstractmethod
+    def rebuild(self, session: Session):
+        """Load the whole index from the database"""
+
+
+async def build_synced_indexes():
+    """Fill every in-process index from the database, on startup"""
+
+    def rebuild():
+        with SessionLocal() as session:
+            for index in CommitSyncedIndex.instances:
+                index.rebuild(session)
+
+    await run_in_threadpool(rebuild)
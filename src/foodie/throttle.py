@@ -0,0 +1,164 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Deque, List
+from foodie import config
+from foodie.hashing import password_hasher
+
+
+class LoginAttemptStore(ABC):
+    """
+    Storage for recent failed login attempts.
+    Implement this to share attempts between workers, e.g on redis.
+    """
+
+    @abstractmethod
+    def get_failures(self, key: str, since: float) -> List[float]:
+        """Timestamps of failures for key at or after since, oldest first"""
+
+    @abstractmethod
+    def add_failure(self, key: str, at: float, since: float) -> List[float]:
+        """Record a failure and return the failures at or after since"""
+
+    @abstractmethod
+    def reset(self, key: str):
+        """Forget all failures for key"""
+
+    @abstractmethod
+    def clear(self):
+        """Forget all failures"""
+
+
+class InMemoryLoginAttemptStore(LoginAttemptStore):
+    """
+    Per process store, the least recently failed keys are
+    dropped once max_keys is reached.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._failures: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prune(failures: Deque[float], since: float):
+        while failures and failures[0] < since:
+            failures.popleft()
+
+    def get_failures(self, key: str, since: float) -> List[float]:
+        with self._lock:
+            failures = self._failures.get(key)
+            if failures is None:
+                return []
+            self._prune(failures, since)
+            if not failures:
+                del self._failures[key]
+            return list(failures)
+
+    def add_failure(self, key: str, at: float, since: float) -> List[float]:
+        with self._lock:
+            failures = self._failures.pop(key, None) or deque()
+            self._prune(failures, since)
+            failures.append(at)
+            self._failures[key] = failures
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+            return list(failures)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
+
+
+class LoginThrottle:
+    """
+    Sliding window of failed logins per email and client address.
+
+    Once a key has threshold failures within the window, every further
+    attempt is rejected until backoff_base * 2 ** (failures - threshold)
+    seconds, capped at backoff_max, have passed since the last failure.
+    Rejections happen before the account is looked up or a password hash
+    is verified.
+    """
+
+    def __init__(
+        self,
+        store: LoginAttemptStore,
+        window: float = 900,
+        threshold: int = 5,
+        backoff_base: float = 1,
+        backoff_max: float = 900,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.store = store
+        self.window = window
+        self.threshold = threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rejected = 0
+        self._failed = 0
+
+    @staticmethod
+    def key(email: str, client_host: str) -> str:
+        return f"{email.strip().lower()}|{client_host}"
+
+    def _lockout(self, failures: List[float]) -> float:
+        if len(failures) < self.threshold:
+            return 0
+        return min(
+            self.backoff_max,
+            self.backoff_base * 2 ** (len(failures) - self.threshold),
+        )
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until key may attempt a login again, 0 if it may now"""
+        now = self._clock()
+        failures = self.store.get_failures(key, now - self.window)
+        if not failures:
+            return 0
+        return max(0, failures[-1] + self._lockout(failures) - now)
+
+    def record_rejection(self):
+        with self._lock:
+            self._rejected += 1
+
+    def record_failure(self, key: str):
+        now = self._clock()
+        self.store.add_failure(key, now, now - self.window)
+        with self._lock:
+            self._failed += 1
+
+    def record_success(self, key: str):
+        self.store.reset(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rejected, failed = self._rejected, self._failed
+        return {
+            "failed": failed,
+            "rejected": rejected,
+            "bcrypt_seconds_saved": (
+                rejected * password_hasher.stats()["average_latency"]
+            ),
+        }
+
+    def reset(self):
+        self.store.clear()
+        with self._lock:
+            self._rejected = self._failed = 0
+
+
+login_throttle = LoginThrottle(
+    InMemoryLoginAttemptStore(),
+    window=config.LOGIN_FAILURE_WINDOW,
+    threshold=config.LOGIN_FAILURE_THRESHOLD,
+    backoff_base=config.LOGIN_BACKOFF_BASE,
+    backoff_max=config.LOGIN_BACKOFF_MAX,
+)
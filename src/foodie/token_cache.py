@@ -0,0 +1,70 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple, Union
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified token payloads.
+
+    Entries are keyed by a digest of the token so raw tokens are not kept
+    around, and each entry is dropped once the token's exp has passed.
+    A size of 0 disables caching.
+    """
+
+    def __init__(self, size: int = 1024, clock: Callable[[], float] = time.time):
+        self.size = size
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(token: Union[str, bytes], secret: str) -> Hashable:
+        if isinstance(token, str):
+            token = token.encode()
+        return secret, hashlib.sha256(token).digest()
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return dict(payload)
+
+    def set(self, key: Hashable, payload: dict):
+        if self.size <= 0 or "exp" not in payload:
+            return
+        with self._lock:
+            self._entries[key] = (float(payload["exp"]), dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
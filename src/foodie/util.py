@@ -1,11 +1,25 @@
 import jwt
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
+from uuid import UUID
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
-from foodie import config
+from foodie import config, enums
+from foodie.dataclasses import Principal
+from foodie.hashing import password_hasher
+from foodie.revocation import revocation_table
+from foodie.token_cache import TokenCache
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=config.BCRYPT_ROUNDS,
+    # any other cost marks a stored hash as needing an update
+    bcrypt__min_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=config.BCRYPT_ROUNDS,
+)
+
+access_token_cache = TokenCache(size=config.ACCESS_TOKEN_CACHE_SIZE)
 
 
 def create_token(payload: dict, secret: str, expires_delta: timedelta):
@@ -22,15 +36,44 @@ def create_access_token(
     return create_token(data, secret, expire)
 
 
+def create_principal_access_token(
+    principal_type: enums.PrincipalType,
+    principal_id: Union[UUID, str],
+    role: Optional[str] = None,
+    vendor_id: Optional[Union[UUID, str]] = None,
+    courier_id: Optional[Union[UUID, str]] = None,
+    expires_delta: timedelta = None,
+    epoch: int = 0,
+) -> str:
+    """
+    Create an access token carrying everything needed to authorize
+    the principal, i.e type, role and the vendor or courier it belongs to,
+    and its current token epoch.
+    """
+    principal = Principal(
+        id=principal_id,
+        principal_type=principal_type,
+        role=role,
+        vendor_id=vendor_id,
+        courier_id=courier_id,
+        epoch=epoch,
+    )
+    revocation_table.set_epoch(principal_type, principal_id, epoch)
+    return create_access_token(principal.to_claims(), expires_delta=expires_delta)
+
+
 def get_payload_from_token(token: Union[str, bytes], secret) -> Any:
     return jwt.decode(token, secret, algorithms=[config.JWT_ALGORITHM])  # noqa
 
 
-def decode_access_token(token: Union[str, bytes], secret=config.SECRET_KEY) -> str:
+def decode_access_token(token: Union[str, bytes], secret=config.SECRET_KEY) -> dict:
     # scenario token is not valid
-    payload = get_payload_from_token(token, secret)
-    user_id: str = payload.get("sub")  # type: ignore
-    return user_id
+    cache_key = access_token_cache.key(token, secret)
+    payload = access_token_cache.get(cache_key)
+    if payload is None:
+        payload = get_payload_from_token(token, secret)
+        access_token_cache.set(cache_key, payload)
+    return payload
 
 
 def password_is_match(plain_password: str, hashed_password: str):
@@ -41,6 +84,32 @@ def hash_password(plain_password: str):
     return pwd_context.hash(plain_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify the password, also returns a new hash of it if the stored
+    hash was created with different parameters than the current ones.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def password_is_match_async(plain_password: str, hashed_password: str):
+    return await password_hasher.run(password_is_match, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return await password_hasher.run(
+        verify_and_update_password, plain_password, hashed_password
+    )
+
+
+async def hash_password_async(plain_password: str):
+    return await password_hasher.run(hash_password, plain_password)
+
+
 # def send_email(
 #     to: str,
 #     subject: str,
@@ -1,5 +1,6 @@
 import pytest
 import random
+import re
 from datetime import datetime
 from fastapi import FastAPI
 from sqlalchemy import MetaData
@@ -7,10 +8,17 @@ from sqlalchemy.orm.session import Session
 from fastapi.testclient import TestClient
 from foodie.config import DATABASE_URL
 from foodie.db import models
-from foodie.db.base import Base, get_engine, SessionLocal
+from foodie.db.base import Base, get_engine, SessionLocal, write_tracker
 from foodie.main import get_app
 from foodie import util, enums
+from foodie.categories import category_index
+from foodie.locations import vendor_locator
+from foodie.opening_hours import opening_hours
+from foodie.revocation import revocation_table
+from foodie.search import food_package_search
+from foodie.throttle import login_throttle
 from collections import namedtuple
+from typing import List
 
 
 AdminDetails = namedtuple(
@@ -27,6 +35,35 @@ def create_test_database():
     metadata.drop_all(engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    yield
+    revocation_table.clear()
+    util.access_token_cache.clear()
+    login_throttle.reset()
+    write_tracker.clear()
+    food_package_search.clear()
+    category_index.clear()
+    vendor_locator.clear()
+    opening_hours.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Check the statements a response's request ran, as counted in its
+    Server-Timing header, against a budget, so N+1 queries fail the tests
+    """
+
+    def check(response, budget: int) -> int:
+        match = re.search(r'desc="(\d+) queries"', response.headers["server-timing"])
+        count = int(match.group(1))
+        assert count <= budget, f"{count} queries, over the budget of {budget}"
+        return count
+
+    return check
+
+
 @pytest.fixture
 def app() -> FastAPI:
     return get_app()
@@ -67,7 +104,9 @@ def admin(session: Session, admin_details: AdminDetails) -> models.Admin:
 
 @pytest.fixture
 def admin_auth_header(session: Session, admin: models.Admin) -> dict:
-    access_token = util.create_access_token({"sub": str(admin.id)})
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.ADMIN, admin.id
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
@@ -112,6 +151,56 @@ def vendor(restaurant_vendor, home_vendor, food_stand_vendor):
     return random.choice([restaurant_vendor, home_vendor, food_stand_vendor])
 
 
+@pytest.fixture
+def restaurant_food_packages(
+    session: Session, restaurant_vendor: models.Vendor
+) -> List[models.FoodPackage]:
+    food_packages = [
+        models.FoodPackage(
+            name=name,
+            description=description,
+            image_url=f"https://images.test/{name.lower().replace(' ', '-')}.png",
+            items=items,
+            price=price,
+            is_available=is_available,
+            vendor_id=restaurant_vendor.id,
+        )
+        for name, description, items, price, is_available in [
+            (
+                "Jollof Rice Special",
+                "Smoky party jollof with fried plantain",
+                ["jollof rice", "plantain", "chicken"],
+                250000,
+                True,
+            ),
+            (
+                "Pounded Yam Combo",
+                "Pounded yam with egusi soup",
+                ["pounded yam", "egusi soup", "beef"],
+                320000,
+                True,
+            ),
+            (
+                "Suya Wrap",
+                "Spicy beef suya in a flatbread wrap",
+                ["suya", "onions", "flatbread"],
+                150000,
+                True,
+            ),
+            (
+                "Fried Rice Deluxe",
+                "Fried rice with shrimps and chicken",
+                ["fried rice", "shrimps", "chicken"],
+                280000,
+                False,
+            ),
+        ]
+    ]
+    session.add_all(food_packages)
+    session.commit()
+    return food_packages
+
+
 @pytest.fixture
 def courier(session: Session) -> models.Courier:
     courier = models.Courier(name="Courier Delivery", address="courier address")
@@ -267,53 +356,93 @@ def user(session: Session):
 
 @pytest.fixture
 def restaurant_vendor_admin_auth_header(restaurant_vendor_admin: models.VendorUser):
-    access_token = util.create_access_token({"sub": str(restaurant_vendor_admin.id)})
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        restaurant_vendor_admin.id,
+        role=restaurant_vendor_admin.role,
+        vendor_id=restaurant_vendor_admin.vendor_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
 def home_vendor_admin_auth_header(home_vendor_admin: models.VendorUser):
-    access_token = util.create_access_token({"sub": home_vendor_admin.id})
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        home_vendor_admin.id,
+        role=home_vendor_admin.role,
+        vendor_id=home_vendor_admin.vendor_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
 def food_stand_vendor_admin_auth_header(food_stand_vendor_admin: models.VendorUser):
-    access_token = util.create_access_token({"sub": food_stand_vendor_admin.id})
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        food_stand_vendor_admin.id,
+        role=food_stand_vendor_admin.role,
+        vendor_id=food_stand_vendor_admin.vendor_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
 def restaurant_vendor_staff_auth_header(restaurant_vendor_staff: models.VendorUser):
-    access_token = util.create_access_token({"sub": str(restaurant_vendor_staff.id)})
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        restaurant_vendor_staff.id,
+        role=restaurant_vendor_staff.role,
+        vendor_id=restaurant_vendor_staff.vendor_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
 def home_vendor_staff_auth_header(home_vendor_staff: models.VendorUser):
-    access_token = util.create_access_token({"sub": home_vendor_staff.id})
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        home_vendor_staff.id,
+        role=home_vendor_staff.role,
+        vendor_id=home_vendor_staff.vendor_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
 def food_stand_vendor_staff_auth_header(food_stand_vendor_staff: models.VendorUser):
-    access_token = util.create_access_token({"sub": food_stand_vendor_staff.id})
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        food_stand_vendor_staff.id,
+        role=food_stand_vendor_staff.role,
+        vendor_id=food_stand_vendor_staff.vendor_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
-def courier_admin_auth_header(courier_admin: models.Courier):
-    access_token = util.create_access_token({"sub": str(courier_admin.id)})
+def courier_admin_auth_header(courier_admin: models.CourierUser):
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.COURIER_USER,
+        courier_admin.id,
+        role=courier_admin.role,
+        courier_id=courier_admin.courier_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
-def courier_staff_auth_header(courier_staff: models.Courier):
-    access_token = util.create_access_token({"sub": str(courier_staff.id)})
+def courier_staff_auth_header(courier_staff: models.CourierUser):
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.COURIER_USER,
+        courier_staff.id,
+        role=courier_staff.role,
+        courier_id=courier_staff.courier_id,
+    )
     return {"Authorization": f"Bearer {access_token}"}
 
 
 @pytest.fixture
 def user_auth_header(user: models.User):
-    access_token = util.create_access_token({"sub": str(user.id)})
+    access_token = util.create_principal_access_token(enums.PrincipalType.USER, user.id)
     return {"Authorization": f"Bearer {access_token}"}
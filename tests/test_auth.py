@@ -1,10 +1,13 @@
 import pytest
-from foodie import enums
+from passlib.hash import bcrypt
+from foodie import config, enums
 from tests.conftest import AdminDetails
 from sqlalchemy.orm.session import Session
 from starlette.testclient import TestClient
 from foodie import util
 from foodie.db import models
+from foodie.hashing import password_hasher
+from foodie.throttle import InMemoryLoginAttemptStore, LoginThrottle, login_throttle
 
 
 def test_authenticate_admin(
@@ -285,3 +288,90 @@ def test_authenticate_non_user_on_user_platform_fail(client, non_user):
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Invalid login credentials"
+
+
+def test_authenticate_after_too_many_failed_attempts_fail(
+    client: TestClient, admin: models.Admin, admin_details: AdminDetails
+):
+    for _ in range(login_throttle.threshold):
+        response = client.post(
+            "/api/auth/admin",
+            data={"username": admin_details.email, "password": "wrongpassword"},
+        )
+        assert response.status_code == 401
+    completed = password_hasher.stats()["completed"]
+    response = client.post(
+        "/api/auth/admin",
+        data={"username": admin_details.email, "password": admin_details.password},
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert password_hasher.stats()["completed"] == completed
+    assert login_throttle.stats()["rejected"] == 1
+
+
+def test_successful_login_resets_failed_attempts(
+    client: TestClient, admin: models.Admin, admin_details: AdminDetails
+):
+    for _ in range(login_throttle.threshold - 1):
+        client.post(
+            "/api/auth/admin",
+            data={"username": admin_details.email, "password": "wrongpassword"},
+        )
+    response = client.post(
+        "/api/auth/admin",
+        data={"username": admin_details.email, "password": admin_details.password},
+    )
+    assert response.status_code == 200
+    response = client.post(
+        "/api/auth/admin",
+        data={"username": admin_details.email, "password": "wrongpassword"},
+    )
+    assert response.status_code == 401
+
+
+def test_login_throttle_backs_off_exponentially():
+    now = [0.0]
+    throttle = LoginThrottle(
+        InMemoryLoginAttemptStore(),
+        window=100,
+        threshold=2,
+        backoff_base=1,
+        backoff_max=4,
+        clock=lambda: now[0],
+    )
+    key = throttle.key("Test@Admin.com", "127.0.0.1")
+    assert key == throttle.key("test@admin.com", "127.0.0.1")
+    throttle.record_failure(key)
+    assert throttle.retry_after(key) == 0
+    throttle.record_failure(key)
+    assert throttle.retry_after(key) == 1
+    throttle.record_failure(key)
+    assert throttle.retry_after(key) == 2
+    for _ in range(3):
+        throttle.record_failure(key)
+    assert throttle.retry_after(key) == 4
+    now[0] = 101.0
+    assert throttle.retry_after(key) == 0
+
+
+def test_authenticate_rehashes_password_with_outdated_cost(
+    client: TestClient,
+    session: Session,
+    admin: models.Admin,
+    admin_details: AdminDetails,
+):
+    outdated_rounds = config.BCRYPT_ROUNDS + 1
+    admin.hashed_password = bcrypt.using(rounds=outdated_rounds).hash(
+        admin_details.password
+    )
+    session.commit()
+    assert util.pwd_context.needs_update(admin.hashed_password)
+    response = client.post(
+        "/api/auth/admin",
+        data={"username": admin_details.email, "password": admin_details.password},
+    )
+    assert response.status_code == 200
+    session.expire_all()
+    assert not util.pwd_context.needs_update(admin.hashed_password)
+    assert util.password_is_match(admin_details.password, admin.hashed_password)
@@ -0,0 +1,186 @@
+import pytest
+from uuid import uuid4
+from sqlalchemy import update
+from sqlalchemy.orm.session import Session
+from starlette.testclient import TestClient
+from foodie import enums, util
+from foodie.dataclasses import Principal
+from foodie.db import models
+from foodie.revocation import revocation_table
+from foodie.token_cache import TokenCache
+
+
+def test_principal_claims_round_trip(restaurant_vendor_admin: models.VendorUser):
+    token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        restaurant_vendor_admin.id,
+        role=restaurant_vendor_admin.role,
+        vendor_id=restaurant_vendor_admin.vendor_id,
+    )
+    principal = Principal.from_claims(util.decode_access_token(token))
+    assert principal.id == restaurant_vendor_admin.id
+    assert principal.principal_type == enums.PrincipalType.VENDOR_USER
+    assert principal.role == enums.VendorUserRole.ADMIN
+    assert principal.vendor_id == restaurant_vendor_admin.vendor_id
+    assert principal.courier_id is None
+
+
+@pytest.mark.parametrize(
+    "auth_header",
+    [
+        pytest.lazy_fixture("user_auth_header"),
+        pytest.lazy_fixture("restaurant_vendor_admin_auth_header"),
+        pytest.lazy_fixture("courier_admin_auth_header"),
+    ],
+)
+def test_non_admin_token_on_admin_route_fail(client: TestClient, auth_header: dict):
+    response = client.get("/api/admin/vendors/", headers=auth_header)
+    assert response.status_code == 401
+
+
+def test_vendor_staff_token_on_vendor_admin_route_fail(
+    client: TestClient, restaurant_vendor_staff_auth_header: dict
+):
+    response = client.post(
+        "/api/vendor-admin/invites/",
+        params={"email": "vendor_user@test.com"},
+        headers=restaurant_vendor_staff_auth_header,
+    )
+    assert response.status_code == 401
+
+
+def test_token_without_principal_claims_fail(client: TestClient, admin: models.Admin):
+    access_token = util.create_access_token({"sub": str(admin.id)})
+    response = client.get(
+        "/api/admin/vendors/", headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert response.status_code == 401
+
+
+def test_invalid_token_fail(client: TestClient):
+    response = client.get(
+        "/api/admin/vendors/", headers={"Authorization": "Bearer invalid"}
+    )
+    assert response.status_code == 401
+
+
+def test_revoked_token_fail(
+    client: TestClient,
+    admin_auth_header: dict,
+    restaurant_vendor_admin: models.VendorUser,
+    restaurant_vendor_admin_auth_header: dict,
+):
+    path = "/api/vendor-admin/invites/bulk"
+    body = {"emails": ["staff@test.com"]}
+    response = client.post(path, json=body, headers=restaurant_vendor_admin_auth_header)
+    assert response.status_code == 200
+    response = client.post(
+        f"/api/admin/sessions/vendor_user/{restaurant_vendor_admin.id}/revoke",
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 200
+    response = client.post(path, json=body, headers=restaurant_vendor_admin_auth_header)
+    assert response.status_code == 401
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.VENDOR_USER,
+        restaurant_vendor_admin.id,
+        role=restaurant_vendor_admin.role,
+        vendor_id=restaurant_vendor_admin.vendor_id,
+        epoch=1,
+    )
+    response = client.post(
+        path, json=body, headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert response.status_code == 200
+    response = client.post(
+        f"/api/admin/sessions/vendor_user/{uuid4()}/revoke", headers=admin_auth_header
+    )
+    assert response.status_code == 404
+
+
+def test_role_and_password_changes_revoke_tokens(
+    client: TestClient,
+    session: Session,
+    restaurant_vendor_admin: models.VendorUser,
+    restaurant_vendor_admin_auth_header: dict,
+    admin: models.Admin,
+    admin_auth_header: dict,
+):
+    restaurant_vendor_admin.role = enums.VendorUserRole.STAFF
+    session.commit()
+    assert restaurant_vendor_admin.token_epoch == 1
+    response = client.post(
+        "/api/vendor-admin/invites/bulk",
+        json={"emails": ["staff@test.com"]},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 401
+    admin.hashed_password = util.hash_password("new password")
+    session.commit()
+    assert admin.token_epoch == 1
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 401
+
+
+def test_epochs_are_read_from_database(
+    client: TestClient, session: Session, admin: models.Admin, admin_auth_header: dict
+):
+    revocation_table.clear()
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 200
+    session.execute(
+        update(models.Admin)
+        .where(models.Admin.id == admin.id)
+        .values(token_epoch=models.Admin.token_epoch + 1)
+    )
+    session.commit()
+    # still cached in this process
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 200
+    revocation_table.clear()
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 401
+    session.delete(admin)
+    session.commit()
+    assert revocation_table.get_epoch(enums.PrincipalType.ADMIN, admin.id) is None
+
+
+def test_decode_access_token_is_cached(admin: models.Admin):
+    util.access_token_cache.clear()
+    access_token = util.create_principal_access_token(
+        enums.PrincipalType.ADMIN, admin.id
+    )
+    first = util.decode_access_token(access_token)
+    second = util.decode_access_token(access_token)
+    assert first == second
+    stats = util.access_token_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_token_cache_expires_entries_at_exp():
+    now = [1000.0]
+    cache = TokenCache(size=2, clock=lambda: now[0])
+    key = cache.key("token", "secret")
+    cache.set(key, {"sub": "1", "exp": 1010})
+    assert cache.get(key) == {"sub": "1", "exp": 1010}
+    now[0] = 1010.0
+    assert cache.get(key) is None
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(size=2, clock=lambda: 0)
+    first, second, third = (cache.key(t, "secret") for t in ("a", "b", "c"))
+    cache.set(first, {"exp": 10})
+    cache.set(second, {"exp": 10})
+    assert cache.get(first) is not None
+    cache.set(third, {"exp": 10})
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_token_cache_is_keyed_by_secret():
+    cache = TokenCache(size=2, clock=lambda: 0)
+    cache.set(cache.key("token", "secret"), {"exp": 10})
+    assert cache.get(cache.key("token", "other secret")) is None
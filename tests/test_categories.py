@@ -0,0 +1,209 @@
+import random
+import uuid
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie.bitmap import Bitmap
+from foodie.categories import CategoryIndex, PostgresCategoryIndex, category_index
+from foodie.db import models
+
+
+@pytest.fixture
+def food_categories(
+    session: Session, restaurant_food_packages: List[models.FoodPackage]
+) -> List[models.FoodCategory]:
+    jollof, pounded_yam, suya, fried_rice = restaurant_food_packages
+    rice = models.FoodCategory(name="Rice")
+    swallow = models.FoodCategory(name="Swallow")
+    spicy = models.FoodCategory(name="Spicy")
+    jollof.categories.extend([rice, spicy])
+    pounded_yam.categories.append(swallow)
+    suya.categories.append(spicy)
+    fried_rice.categories.append(rice)
+    session.commit()
+    return [rice, swallow, spicy]
+
+
+def names(client: TestClient, **params) -> List[str]:
+    response = client.get("/api/food-packages", params=params)
+    assert response.status_code == 200
+    return [package["name"] for package in response.json()]
+
+
+def facets(client: TestClient, **params) -> dict:
+    response = client.get("/api/food-categories/facets", params=params)
+    assert response.status_code == 200
+    data = response.json()
+    return {
+        "total": data["total"],
+        **{facet["name"]: facet["count"] for facet in data["categories"]},
+    }
+
+
+@pytest.mark.parametrize("size", [0, 10, 5000, 70000])
+def test_bitmap_matches_set(size: int):
+    rng = random.Random(size)
+    values = set(rng.sample(range(200000), size))
+    others = set(rng.sample(range(200000), 6000))
+    bitmap, other = Bitmap(values), Bitmap(others)
+    assert list(bitmap) == sorted(values)
+    assert len(bitmap) == len(values)
+    assert list(bitmap & other) == sorted(values & others)
+    assert list(bitmap | other) == sorted(values | others)
+    assert list(bitmap - other) == sorted(values - others)
+    assert bitmap.intersection_len(other) == len(values & others)
+    for value in rng.sample(range(200000), 500):
+        bitmap.add(value)
+        values.add(value)
+    for value in rng.sample(range(200000), 5000):
+        bitmap.discard(value)
+        values.discard(value)
+    assert list(bitmap) == sorted(values)
+    assert all((value in bitmap) == (value in values) for value in range(0, 200000, 7))
+
+
+def test_category_index_filters_and_facets():
+    index = CategoryIndex()
+    index.set_category("rice", "Rice")
+    index.set_category("spicy", "Spicy")
+    index.set_package("jollof", ["rice", "spicy"])
+    index.set_package("fried rice", ["rice"], is_available=False)
+    index.set_package("suya", ["spicy"])
+    index.set_package("salad", [])
+
+    def ids(bitmap):
+        return sorted(index.package_ids(bitmap))
+
+    assert ids(index.match(["rice", "spicy"])) == ["jollof"]
+    assert ids(index.match(any_of=["rice", "spicy"])) == [
+        "fried rice",
+        "jollof",
+        "suya",
+    ]
+    assert ids(index.match(["rice"], is_available=True)) == ["jollof"]
+    assert ids(index.match(is_available=False)) == ["fried rice"]
+    assert ids(index.match(["unknown"])) == []
+    assert len(index.match()) == 4
+    assert index.facets(index.match(["spicy"])) == [
+        ("spicy", "Spicy", 2),
+        ("rice", "Rice", 1),
+    ]
+
+
+def test_category_index_updates_and_reuses_ordinals():
+    index = CategoryIndex()
+    index.set_package("jollof", ["rice", "spicy"])
+    index.set_package("jollof", ["rice"])
+    assert index.package_ids(index.match(["spicy"])) == []
+    index.remove_package("jollof")
+    assert index.package_ids(index.match(["rice"])) == []
+    index.set_package("suya", ["spicy"])
+    assert index.stats() == {"packages": 1, "categories": 2, "free_ordinals": 0}
+    index.remove_category("spicy")
+    assert index.package_ids(index.match(["spicy"])) == []
+    assert index.package_ids(index.match(any_of=["spicy", "rice"])) == []
+
+
+@pytest.mark.parametrize("backend", ["memory", "memory over the IN limit", "sql"])
+def test_fetch_food_packages_by_category(
+    client: TestClient,
+    food_categories: List[models.FoodCategory],
+    backend: str,
+    monkeypatch,
+):
+    if backend == "sql":
+        monkeypatch.setattr(
+            "foodie.api.menu.router.category_index", PostgresCategoryIndex()
+        )
+        category_index.clear()
+    elif backend == "memory over the IN limit":
+        monkeypatch.setattr("foodie.categories.MATCH_IN_LIMIT", 0)
+    rice, swallow, spicy = food_categories
+    assert names(client, category=rice.id) == ["Jollof Rice Special"]
+    assert names(client, category=[rice.id, spicy.id]) == ["Jollof Rice Special"]
+    assert names(client, any_category=[swallow.id, spicy.id]) == [
+        "Suya Wrap",
+        "Jollof Rice Special",
+        "Pounded Yam Combo",
+    ]
+    assert names(client, category=spicy.id, item="suya") == ["Suya Wrap"]
+    assert names(client, category=uuid.uuid4()) == []
+
+
+def test_fetch_food_packages_requires_filter(client: TestClient):
+    response = client.get("/api/food-packages")
+    assert response.status_code == 400
+
+
+def test_food_category_facets(
+    client: TestClient, food_categories: List[models.FoodCategory]
+):
+    rice, swallow, spicy = food_categories
+    assert facets(client) == {"total": 3, "Spicy": 2, "Rice": 1, "Swallow": 1}
+    assert facets(client, available=False) == {"total": 1, "Rice": 1}
+    assert facets(client, category=spicy.id) == {"total": 2, "Spicy": 2, "Rice": 1}
+    assert facets(client, any_category=[rice.id, swallow.id]) == {
+        "total": 2,
+        "Rice": 1,
+        "Spicy": 1,
+        "Swallow": 1,
+    }
+
+
+def test_food_category_facets_counted_in_sql(
+    client: TestClient,
+    session: Session,
+    food_categories: List[models.FoodCategory],
+    monkeypatch,
+):
+    rice, swallow, spicy = food_categories
+    monkeypatch.setattr(
+        "foodie.api.menu.router.category_index", PostgresCategoryIndex()
+    )
+    category_index.clear()
+    assert facets(client) == {"total": 3, "Spicy": 2, "Rice": 1, "Swallow": 1}
+    assert facets(client, available=False) == {"total": 1, "Rice": 1}
+    assert facets(client, category=spicy.id) == {"total": 2, "Spicy": 2, "Rice": 1}
+    assert facets(client, any_category=[rice.id, swallow.id]) == {
+        "total": 2,
+        "Rice": 1,
+        "Spicy": 1,
+        "Swallow": 1,
+    }
+    assert facets(client, category=uuid.uuid4()) == {"total": 0}
+
+
+def test_category_index_follows_commits(
+    client: TestClient,
+    session: Session,
+    food_categories: List[models.FoodCategory],
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    rice, swallow, spicy = food_categories
+    pounded_yam = restaurant_food_packages[1]
+    pounded_yam.categories.append(spicy)
+    session.flush()
+    session.rollback()
+    assert facets(client, category=spicy.id)["total"] == 2
+    pounded_yam.categories.append(spicy)
+    swallow.name = "Swallows"
+    session.commit()
+    assert facets(client, category=spicy.id) == {
+        "total": 3,
+        "Spicy": 3,
+        "Rice": 1,
+        "Swallows": 1,
+    }
+    session.delete(restaurant_food_packages[0])
+    session.commit()
+    assert facets(client, category=spicy.id) == {"total": 2, "Spicy": 2, "Swallows": 1}
+
+
+def test_category_index_rebuild(
+    client: TestClient, food_categories: List[models.FoodCategory]
+):
+    category_index.clear()
+    assert facets(client) == {"total": 0}
+    with client:
+        assert facets(client) == {"total": 3, "Spicy": 2, "Rice": 1, "Swallow": 1}
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+from foodie import config
+from foodie.db.base import get_async_database_url, get_engine
+from foodie.db.pool import pool_metrics
+from foodie.db.session import SessionSlots
+
+
+@pytest.mark.parametrize(
+    "database_url,expected",
+    [
+        (
+            "postgresql://postgres:pass@db:5432/foodie",
+            "postgresql+asyncpg://postgres:pass@db:5432/foodie",
+        ),
+        (
+            "postgresql+psycopg2://postgres:pass@db:5432/foodie",
+            "postgresql+asyncpg://postgres:pass@db:5432/foodie",
+        ),
+        ("sqlite:////tmp/foodie.db", "sqlite+aiosqlite:////tmp/foodie.db"),
+        ("mysql://root@db/foodie", "mysql://root@db/foodie"),
+    ],
+)
+def test_get_async_database_url(database_url, expected):
+    assert get_async_database_url(database_url) == expected
+
+
+def test_pool_metrics_count_checkouts_and_waits(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path}/pool.db", name="test_pool")
+    try:
+        metrics = pool_metrics["test_pool"]
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            assert metrics.stats()["checked_out"] == 1
+        stats = metrics.stats()
+        assert stats["pool_class"] == "InstrumentedQueuePool"
+        assert stats["pool_size"] == config.DATABASE_POOL_SIZE
+        assert stats["checked_out"] == 0
+        assert stats["checkouts"] == 1
+        assert stats["connects"] == 1
+        assert stats["max_wait"] > 0
+    finally:
+        pool_metrics.pop("test_pool")
+        engine.dispose()
+
+
+def test_pool_metrics_count_timeouts_and_invalidations(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATABASE_POOL_SIZE", 1)
+    monkeypatch.setattr(config, "DATABASE_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(config, "DATABASE_POOL_TIMEOUT", 0.01)
+    engine = get_engine(f"sqlite:///{tmp_path}/pool.db", name="test_pool")
+    try:
+        metrics = pool_metrics["test_pool"]
+        with engine.connect() as connection:
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+            connection.invalidate()
+        engine.dispose()
+        with engine.connect():
+            pass
+        stats = metrics.stats()
+        assert stats["timeouts"] == 1
+        assert stats["invalidations"] == 1
+        assert stats["checkouts"] == 2
+        assert stats["pool_size"] == 1
+    finally:
+        pool_metrics.pop("test_pool")
+        engine.dispose()
+
+
+def test_get_database_pool_metrics(client: TestClient, admin_auth_header: dict):
+    response = client.get("/api/admin/metrics/database-pool", headers=admin_auth_header)
+    assert response.status_code == 200
+    primary = next(pool for pool in response.json() if pool["name"] == "primary")
+    assert primary["checkouts"] > 0
+    assert primary["checked_out"] >= 0
+
+
+def test_get_database_pool_metrics_as_user_fail(
+    client: TestClient, user_auth_header: dict
+):
+    response = client.get("/api/admin/metrics/database-pool", headers=user_auth_header)
+    assert response.status_code == 401
+
+
+def test_session_slots_wait_for_a_free_slot():
+    slots = SessionSlots(1)
+    entered = []
+
+    async def open_session(name: str):
+        async with slots:
+            entered.append(name)
+            await asyncio.sleep(0.01)
+            entered.append(f"{name} done")
+
+    async def main():
+        await asyncio.gather(open_session("first"), open_session("second"))
+
+    asyncio.run(main())
+    assert entered == ["first", "first done", "second", "second done"]
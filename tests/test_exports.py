@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie import enums
+from foodie.db import models
+from foodie.db.base import SessionLocal
+from foodie.exports import export_table
+
+
+@pytest.fixture
+def order(
+    session: Session, user: models.User, restaurant_vendor: models.Vendor
+) -> models.Order:
+    order = models.Order(user_id=user.id, vendor_id=restaurant_vendor.id)
+    session.add(order)
+    session.flush()
+    session.add(
+        models.OrderEvent(
+            order_id=order.id,
+            event_type=enums.OrderEventType.ORDER_PLACED,
+            payload={"items": ["jollof rice"], "note": 'no "pepper", please'},
+        )
+    )
+    session.commit()
+    return order
+
+
+def ndjson(text: str) -> List[dict]:
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_export_vendors_ndjson(
+    client: TestClient,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+):
+    response = client.get("/api/admin/exports/vendors", headers=admin_auth_header)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "vendors.ndjson" in response.headers["content-disposition"]
+    rows = ndjson(response.text)
+    assert sorted(row["name"] for row in rows) == ["Home Vendor", "Restaurant Vendor"]
+    row = next(row for row in rows if row["name"] == "Restaurant Vendor")
+    assert row["id"] == str(restaurant_vendor.id)
+    assert row["type"] == "restaurant"
+    assert row["created_at"] == restaurant_vendor.created_at.isoformat()
+
+
+def test_export_order_events_csv(
+    client: TestClient, admin_auth_header: dict, order: models.Order
+):
+    response = client.get(
+        "/api/admin/exports/order-events",
+        params={"format": "csv"},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["order_id"] == str(order.id)
+    assert rows[0]["event_type"] == "order_placed"
+    assert json.loads(rows[0]["payload"])["note"] == 'no "pepper", please'
+    assert rows[0]["updated_at"] == ""
+
+
+def test_export_gzip(client: TestClient, admin_auth_header: dict, order: models.Order):
+    response = client.get(
+        "/api/admin/exports/orders",
+        params={"gzip": True},
+        headers=admin_auth_header,
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    # decompressed by the client
+    rows = ndjson(response.text)
+    assert [row["id"] for row in rows] == [str(order.id)]
+    assert rows[0]["vendor_accepted"] is None
+
+
+def test_export_streams_chunks(
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+    food_stand_vendor: models.Vendor,
+):
+    chunks = list(
+        export_table(
+            SessionLocal,
+            enums.ExportTable.VENDORS,
+            enums.ExportFormat.CSV,
+            chunk_size=2,
+        )
+    )
+    # the header, then a chunk of two vendors and one of one
+    assert [chunk.count(b"\n") for chunk in chunks] == [1, 2, 1]
+    compressed = export_table(
+        SessionLocal, enums.ExportTable.VENDORS, enums.ExportFormat.CSV, compress=True
+    )
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)
+
+
+def test_export_requires_admin(client: TestClient, user_auth_header: dict):
+    response = client.get("/api/admin/exports/vendors", headers=user_auth_header)
+    assert response.status_code == 401
+    response = client.get("/api/admin/exports/users")
+    assert response.status_code == 401
@@ -0,0 +1,285 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import Pool
+from foodie.db import feedback, models
+from foodie.db.base import SessionLocal
+from foodie.db.feedback import feedback_upsert
+
+
+@pytest.fixture
+def users(session: Session) -> List[models.User]:
+    now = datetime.utcnow()
+    users = [
+        models.User(
+            email=f"rater{index}@test.com",
+            email_verified_on=now,
+            hashed_password="not a real hash",
+            first_name="Rater",
+            last_name=str(index),
+            phone_number="08012345678",
+            phone_number_verified_on=now,
+        )
+        for index in range(3)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+@pytest.fixture
+def foreign_keys():
+    """Enforce foreign keys on SQLite connections, as Postgres always does"""
+
+    def enable(dbapi_connection, connection_record, connection_proxy):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.close()
+
+    event.listen(Pool, "checkout", enable)
+    yield
+    event.remove(Pool, "checkout", enable)
+
+
+def feedback_rows(session: Session, model) -> list:
+    return session.execute(
+        select(model.rating, model.feedback).order_by(model.rating)
+    ).all()
+
+
+def test_submit_feedback_replaces_earlier_feedback(
+    client: TestClient,
+    session: Session,
+    user_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+):
+    url = f"/api/vendors/{restaurant_vendor.id}/feedback"
+    response = client.put(
+        url, json={"rating": 4, "feedback": "Tasty"}, headers=user_auth_header
+    )
+    assert response.status_code == 204
+    response = client.put(url, json={"rating": 2}, headers=user_auth_header)
+    assert response.status_code == 204
+    assert feedback_rows(session, models.UserVendorFeedback) == [(2, None)]
+    session.refresh(restaurant_vendor)
+    assert restaurant_vendor.rating_count == 1
+    assert restaurant_vendor.rating_histogram == {1: 0, 2: 1, 3: 0, 4: 0, 5: 0}
+
+
+def test_submit_courier_and_food_package_feedback(
+    client: TestClient,
+    session: Session,
+    user_auth_header: dict,
+    courier: models.Courier,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    package = restaurant_food_packages[0]
+    for url in (
+        f"/api/couriers/{courier.id}/feedback",
+        f"/api/food-packages/{package.id}/feedback",
+    ):
+        response = client.put(url, json={"rating": 5}, headers=user_auth_header)
+        assert response.status_code == 204
+    session.refresh(courier)
+    session.refresh(package)
+    assert (courier.rating, package.rating) == (5, 5)
+
+
+@pytest.mark.parametrize("target", ["vendors", "couriers", "food-packages"])
+def test_submit_feedback_for_unknown_target(
+    client: TestClient, session: Session, user_auth_header: dict, target: str
+):
+    response = client.put(
+        f"/api/{target}/{uuid.uuid4()}/feedback",
+        json={"rating": 3},
+        headers=user_auth_header,
+    )
+    assert response.status_code == 404
+    for model in (
+        models.UserVendorFeedback,
+        models.UserCourierFeedback,
+        models.UserFoodPackageFeedback,
+    ):
+        assert feedback_rows(session, model) == []
+
+
+def test_submit_feedback_from_deleted_user(
+    client: TestClient,
+    session: Session,
+    user: models.User,
+    user_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    foreign_keys,
+):
+    # deleted after the token was checked, as by another process
+    session.execute(delete(models.User).where(models.User.id == user.id))
+    session.commit()
+    response = client.put(
+        f"/api/vendors/{restaurant_vendor.id}/feedback",
+        json={"rating": 3},
+        headers=user_auth_header,
+    )
+    assert response.status_code == 401
+    assert feedback_rows(session, models.UserVendorFeedback) == []
+
+
+def test_submit_feedback_validation(
+    client: TestClient,
+    user_auth_header: dict,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+):
+    url = f"/api/vendors/{restaurant_vendor.id}/feedback"
+    assert client.put(url, json={"rating": 5}).status_code == 401
+    assert (
+        client.put(url, json={"rating": 5}, headers=admin_auth_header).status_code
+        == 401
+    )
+    for rating in (0.5, 5.5):
+        response = client.put(url, json={"rating": rating}, headers=user_auth_header)
+        assert response.status_code == 422
+
+
+def test_concurrent_first_feedback_keeps_one_row(
+    session: Session, user: models.User, restaurant_vendor: models.Vendor
+):
+    def submit(rating: int):
+        with SessionLocal() as worker_session:
+            worker_session.execute(
+                feedback_upsert(
+                    models.UserVendorFeedback, restaurant_vendor.id, user.id, rating
+                )
+            )
+            worker_session.commit()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(submit, [1, 2, 3, 4, 5, 3, 2, 4]))
+    assert (
+        session.execute(
+            select(func.count()).select_from(models.UserVendorFeedback)
+        ).scalar()
+        == 1
+    )
+    session.refresh(restaurant_vendor)
+    assert restaurant_vendor.rating_count == 1
+    assert sum(restaurant_vendor.rating_histogram.values()) == 1
+
+
+def test_import_feedback(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    users: List[models.User],
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+):
+    session.add(
+        models.UserVendorFeedback(
+            user_id=users[0].id,
+            vendor_id=restaurant_vendor.id,
+            rating=5,
+            feedback="Live",
+        )
+    )
+    session.commit()
+    last_year = datetime.utcnow() - timedelta(days=365)
+
+    def row(user, vendor_id, rating, days=0, **extra):
+        return {
+            "userId": str(user.id),
+            "targetId": str(vendor_id),
+            "rating": rating,
+            "createdAt": (last_year + timedelta(days=days)).isoformat(),
+            **extra,
+        }
+
+    payload = [
+        row(users[0], restaurant_vendor.id, 1, feedback="Old"),
+        row(users[1], restaurant_vendor.id, 2),
+        row(users[1], restaurant_vendor.id, 4, days=3),
+        row(users[1], restaurant_vendor.id, 3, days=1),
+        row(users[2], home_vendor.id, 3),
+        row(users[2], uuid.uuid4(), 3),
+    ]
+    payload.append({**payload[0], "userId": str(uuid.uuid4())})
+
+    def import_feedback():
+        response = client.post(
+            "/api/admin/feedback/vendors/import",
+            json=payload,
+            headers=admin_auth_header,
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    report = import_feedback()
+    assert report == {
+        "imported": 3,
+        "rejected": [
+            {"index": 5, "reason": "Unknown target"},
+            {"index": 6, "reason": "Unknown user"},
+        ],
+    }
+    assert import_feedback()["imported"] == 3
+    assert feedback_rows(session, models.UserVendorFeedback) == [
+        (3, None),
+        (4, None),
+        (5, "Live"),
+    ]
+    session.refresh(restaurant_vendor)
+    session.refresh(home_vendor)
+    assert (restaurant_vendor.rating_count, restaurant_vendor.rating) == (2, 4.5)
+    assert (home_vendor.rating_count, home_vendor.rating) == (1, 3)
+
+
+def test_import_feedback_of_user_deleted_during_import(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    users: List[models.User],
+    restaurant_vendor: models.Vendor,
+    foreign_keys,
+    monkeypatch,
+):
+    existing_ids = feedback.existing_ids
+    checks = []
+
+    def existing_before_delete(session, model, ids):
+        # the first import's checks run before the user is deleted
+        checks.append(model)
+        if len(checks) <= 2:
+            return set(ids)
+        return existing_ids(session, model, ids)
+
+    monkeypatch.setattr(feedback, "existing_ids", existing_before_delete)
+    created_at = datetime.utcnow().isoformat()
+    payload = [
+        {
+            "userId": str(user_id),
+            "targetId": str(restaurant_vendor.id),
+            "rating": 4,
+            "createdAt": created_at,
+        }
+        for user_id in (users[0].id, uuid.uuid4())
+    ]
+    response = client.post(
+        "/api/admin/feedback/vendors/import", json=payload, headers=admin_auth_header
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "imported": 1,
+        "rejected": [{"index": 1, "reason": "Unknown user"}],
+    }
+    assert feedback_rows(session, models.UserVendorFeedback) == [(4, None)]
+
+
+def test_import_feedback_requires_admin(client: TestClient, user_auth_header: dict):
+    response = client.post(
+        "/api/admin/feedback/couriers/import", json=[], headers=user_auth_header
+    )
+    assert response.status_code == 401
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import pytest
+from starlette.testclient import TestClient
+from foodie import util
+from foodie.db import models
+from foodie.hashing import PasswordHasher, PasswordHasherBusy, password_hasher
+from tests.conftest import AdminDetails
+
+
+def test_password_hasher_verifies_on_process_pool():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    hashed_password = util.hash_password("password")
+    try:
+        assert asyncio.run(
+            hasher.run(util.password_is_match, "password", hashed_password)
+        )
+        stats = hasher.stats()
+        assert stats["completed"] == 1
+        assert stats["pending"] == 0
+    finally:
+        hasher.shutdown()
+
+
+def kill_worker(password: str):
+    os._exit(1)
+
+
+def test_password_hasher_replaces_broken_pool():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            asyncio.run(hasher.run(kill_worker, "password"))
+        hashed_password = asyncio.run(hasher.run(util.hash_password, "password"))
+        assert util.password_is_match("password", hashed_password)
+        stats = hasher.stats()
+        assert (stats["completed"], stats["failed"], stats["pending"]) == (1, 1, 0)
+    finally:
+        hasher.shutdown()
+
+
+def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+    with pytest.raises(PasswordHasherBusy):
+        asyncio.run(hasher.run(util.hash_password, "password"))
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_authenticate_when_password_hasher_is_saturated_fail(
+    client: TestClient,
+    admin: models.Admin,
+    admin_details: AdminDetails,
+    monkeypatch,
+):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post(
+        "/api/auth/admin",
+        data={"username": admin_details.email, "password": admin_details.password},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_get_password_hasher_metrics(
+    client: TestClient,
+    admin_details: AdminDetails,
+    admin_auth_header: dict,
+):
+    completed = password_hasher.stats()["completed"]
+    client.post(
+        "/api/auth/admin",
+        data={"username": admin_details.email, "password": admin_details.password},
+    )
+    response = client.get(
+        "/api/admin/metrics/password-hasher", headers=admin_auth_header
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["completed"] == completed + 1
+    assert data["queue_depth"] == 0
+    assert "average_latency" in data
@@ -0,0 +1,45 @@
+import time
+import uuid
+from sqlalchemy.orm.session import Session
+from foodie import config, enums
+from foodie.db import models
+from foodie.ids import new_id, uuid7, uuid7_timestamp
+
+
+def test_uuid7_layout():
+    before = time.time()
+    value = uuid7()
+    after = time.time()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert before - 0.001 <= uuid7_timestamp(value) <= after + 0.001
+
+
+def test_uuid7_is_strictly_increasing():
+    values = [uuid7() for _ in range(20_000)]
+    assert values == sorted(values)
+    assert [value.hex for value in values] == sorted(value.hex for value in values)
+    assert len(set(values)) == len(values)
+
+
+def test_new_id_follows_config(monkeypatch):
+    assert new_id().version == 4
+    monkeypatch.setattr(config, "TIME_ORDERED_IDS", True)
+    assert new_id().version == 7
+
+
+def test_entity_with_time_ordered_id(session: Session, monkeypatch):
+    monkeypatch.setattr(config, "TIME_ORDERED_IDS", True)
+    vendors = [
+        models.Vendor(
+            name=f"Vendor {index}", type=enums.VendorType.HOME, address="address"
+        )
+        for index in range(3)
+    ]
+    for vendor in vendors:
+        session.add(vendor)
+        session.flush()
+    session.commit()
+    stored = session.query(models.Vendor).order_by(models.Vendor.id).all()
+    assert [vendor.name for vendor in stored] == ["Vendor 0", "Vendor 1", "Vendor 2"]
+    assert all(vendor.id.version == 7 for vendor in stored)
@@ -0,0 +1,120 @@
+import uuid
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm.session import Session
+from foodie import enums
+from foodie.db import models
+
+
+def explain(session: Session, statement) -> str:
+    """
+    Return the query plan of statement. Sequential scans are disabled on
+    Postgres so the planner picks an index even for the tiny test tables
+    whenever one applies.
+    """
+    connection = session.connection()
+    dialect = connection.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    if dialect == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    def explain_statement(conn, cursor, statement, parameters, context, many):
+        return prefix + statement, parameters
+
+    event.listen(connection, "before_cursor_execute", explain_statement, retval=True)
+    try:
+        # the plan's columns do not match the statement's, skip result processing
+        rows = connection.execute(statement).cursor.fetchall()
+    finally:
+        event.remove(connection, "before_cursor_execute", explain_statement)
+    return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+
+@pytest.mark.parametrize(
+    "statement,index",
+    [
+        (
+            select(models.VendorUser).where(models.VendorUser.email == "a@b.com"),
+            "ix_vendor_users_email",
+        ),
+        (
+            select(models.VendorUser)
+            .where(models.VendorUser.email == "a@b.com")
+            .where(models.VendorUser.role == enums.VendorUserRole.ADMIN),
+            "ix_vendor_users_email",
+        ),
+        (
+            select(models.VendorUser)
+            .where(models.VendorUser.vendor_id == uuid.uuid4())
+            .where(models.VendorUser.email == "a@b.com"),
+            "ix_vendor_users_vendor_id_email",
+        ),
+        (
+            select(models.CourierUser).where(models.CourierUser.email == "a@b.com"),
+            "ix_courier_users_email",
+        ),
+        (
+            select(models.CourierUser)
+            .where(models.CourierUser.email == "a@b.com")
+            .where(models.CourierUser.role == enums.CourierUserRole.ADMIN),
+            "ix_courier_users_email",
+        ),
+        (
+            select(models.CourierUser)
+            .where(models.CourierUser.courier_id == uuid.uuid4())
+            .where(models.CourierUser.email == "a@b.com"),
+            "ix_courier_users_courier_id_email",
+        ),
+        (
+            select(models.Order).where(models.Order.user_id == uuid.uuid4()),
+            "ix_orders_user_id",
+        ),
+        (
+            select(models.Order).where(models.Order.vendor_id == uuid.uuid4()),
+            "ix_orders_vendor_id",
+        ),
+        (
+            select(models.OrderEvent).where(models.OrderEvent.order_id == uuid.uuid4()),
+            "ix_order_events_order_id",
+        ),
+        (
+            select(models.FoodPackageItem.food_package_id).where(
+                models.FoodPackageItem.key == "jollof rice"
+            ),
+            "ix_food_package_items_key_food_package_id",
+        ),
+        (
+            select(models.FoodPackage).where(
+                models.FoodPackage.vendor_id == uuid.uuid4()
+            ),
+            "ix_food_packages_vendor_id_is_available_price",
+        ),
+        (
+            select(
+                models.food_packages_food_categories_association_table.c.food_package_id
+            ).where(
+                models.food_packages_food_categories_association_table.c.category_id
+                == uuid.uuid4()
+            ),
+            "ix_food_packages_food_categories_association_category_id",
+        ),
+    ],
+)
+def test_lookup_uses_index(session: Session, statement, index: str):
+    assert index in explain(session, statement)
+
+
+def test_menu_query_filters_and_sorts_through_index(session: Session):
+    statement = (
+        select(models.FoodPackage)
+        .where(models.FoodPackage.vendor_id == uuid.uuid4())
+        .where(models.FoodPackage.is_available)
+        .where(models.FoodPackage.price >= 1000)
+        .where(models.FoodPackage.price <= 5000)
+        .order_by(models.FoodPackage.price.desc())
+    )
+    plan = explain(session, statement)
+    assert "ix_food_packages_vendor_id_is_available_price" in plan
+    # rows come out of the index in price order, no separate sort step
+    assert "TEMP B-TREE" not in plan
+    assert "Sort" not in plan
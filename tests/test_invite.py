@@ -4,6 +4,7 @@ from datetime import timedelta
 from sqlalchemy.orm.session import Session
 from starlette.testclient import TestClient
 from foodie.db import models
+from foodie.db.base import SessionLocal
 from foodie import util, enums, config
 
 
@@ -162,6 +163,52 @@ def test_vendor_admin_accept_invite(
     assert vendor_user.phone_number == "08012345678"
 
 
+def test_concurrent_accept_invite_fail(
+    vendor_admin_invitation_token: str,
+    restaurant_vendor: models.Vendor,
+    session: Session,
+    client: TestClient,
+    monkeypatch,
+):
+    hash_password_async = util.hash_password_async
+
+    async def accepted_meanwhile(password: str) -> str:
+        # the other accept of the token commits while this one hashes
+        with SessionLocal() as other_session:
+            other_session.add(
+                models.VendorUser(
+                    vendor_id=restaurant_vendor.id,
+                    email="vendor_admin@test.com",
+                    role=enums.VendorUserRole.ADMIN,
+                    first_name="Jane",
+                    last_name="Doe",
+                    phone_number="08012345678",
+                    hashed_password="not a real hash",
+                )
+            )
+            other_session.commit()
+        return await hash_password_async(password)
+
+    monkeypatch.setattr(util, "hash_password_async", accepted_meanwhile)
+    response = client.post(
+        "/api/invites/accept",
+        json={
+            "firstName": "John",
+            "lastName": "Doe",
+            "password": "xpassword",
+            "phoneNumber": "08012345678",
+        },
+        params={"token": vendor_admin_invitation_token},
+    )
+    assert response.status_code == 400
+    assert [
+        vendor_user.first_name
+        for vendor_user in session.query(models.VendorUser).filter_by(
+            vendor_id=restaurant_vendor.id
+        )
+    ] == ["Jane"]
+
+
 def test_courier_admin_accept_invite(
     courier_admin_invitation_token: str,
     courier: models.Courier,
@@ -375,3 +422,293 @@ def test_get_invitation_token_details_for_invalid_token_fail(client: TestClient)
     assert response.status_code == 400
     data = response.json()
     assert "Invalid" in data["detail"]
+
+
+def test_vendor_admin_invite_token_can_be_accepted(
+    client: TestClient,
+    session: Session,
+    restaurant_vendor: models.Vendor,
+    restaurant_vendor_admin_auth_header: dict,
+):
+    response = client.post(
+        "/api/vendor-admin/invites/",
+        params={"email": "vendor_user@test.com"},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 200
+    email = session.query(models.OutboxEmail).one()
+    assert email.recipient == "vendor_user@test.com"
+    assert "Restaurant Vendor as staff" in email.body
+    token = email.body.split("?token=")[1].split()[0]
+    response = client.post(
+        "/api/invites/accept",
+        json={
+            "firstName": "John",
+            "lastName": "Doe",
+            "password": "xpassword",
+            "phoneNumber": "08012345678",
+        },
+        params={"token": token},
+    )
+    assert response.status_code == 201
+    vendor_user = (
+        session.query(models.VendorUser)
+        .filter(models.VendorUser.email == "vendor_user@test.com")
+        .one()
+    )
+    assert vendor_user.vendor_id == restaurant_vendor.id
+    assert vendor_user.role == enums.VendorUserRole.STAFF
+
+
+def test_invitation_token_used_or_for_missing_vendor_fail(
+    vendor_admin_invitation_token: str, client: TestClient
+):
+    accept = {
+        "firstName": "John",
+        "lastName": "Doe",
+        "password": "xpassword",
+        "phoneNumber": "08012345678",
+    }
+    response = client.post(
+        "/api/invites/accept",
+        json=accept,
+        params={"token": vendor_admin_invitation_token},
+    )
+    assert response.status_code == 201
+    response = client.get(
+        "/api/invites/details", params={"token": vendor_admin_invitation_token}
+    )
+    assert response.status_code == 400
+    response = client.post(
+        "/api/invites/accept",
+        json=accept,
+        params={"token": vendor_admin_invitation_token},
+    )
+    assert response.status_code == 400
+
+    for token_id in (str(uuid4()), "not a uuid"):
+        token = util.create_token(
+            {
+                "id": token_id,
+                "email": "vendor_admin@test.com",
+                "token_type": enums.ActivityTokenType.VENDOR_ADMIN_INVITE,
+            },
+            config.ACTIVITY_TOKEN_SECRET_KEY,
+            timedelta(hours=1),
+        )
+        response = client.get("/api/invites/details", params={"token": token})
+        assert response.status_code == 400
+
+
+def test_vendor_admin_bulk_invite(
+    client: TestClient,
+    session: Session,
+    restaurant_vendor: models.Vendor,
+    restaurant_vendor_admin: models.VendorUser,
+    restaurant_vendor_admin_auth_header: dict,
+):
+    response = client.post(
+        "/api/vendor-admin/invites/bulk",
+        json={
+            "emails": [
+                "staff1@test.com",
+                " staff2@Test.com ",
+                "not an email",
+                "staff1@test.com",
+                restaurant_vendor_admin.email,
+            ]
+        },
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["invited"] == 2
+    assert [(result["email"], result["status"]) for result in data["results"]] == [
+        ("staff1@test.com", "invited"),
+        ("staff2@test.com", "invited"),
+        ("not an email", "invalid_email"),
+        ("staff1@test.com", "duplicate"),
+        (restaurant_vendor_admin.email, "existing_member"),
+    ]
+    emails = session.query(models.OutboxEmail).order_by(models.OutboxEmail.recipient)
+    assert [email.recipient for email in emails] == [
+        "staff1@test.com",
+        "staff2@test.com",
+    ]
+    token = emails[0].body.split("?token=")[1].split()[0]
+    payload = util.get_payload_from_token(token, config.ACTIVITY_TOKEN_SECRET_KEY)
+    assert payload["id"] == str(restaurant_vendor.id)
+    assert payload["email"] == "staff1@test.com"
+    assert payload["token_type"] == enums.ActivityTokenType.VENDOR_USER_INVITE
+    assert "Restaurant Vendor as staff" in emails[0].body
+
+
+def test_vendor_admin_bulk_invite_csv(
+    client: TestClient,
+    session: Session,
+    restaurant_vendor_admin: models.VendorUser,
+    restaurant_vendor_admin_auth_header: dict,
+    query_budget,
+):
+    rows = "\n".join(f"Staff {index},staff{index}@test.com" for index in range(1200))
+    response = client.post(
+        "/api/vendor-admin/invites/bulk/csv",
+        files={"file": ("staff.csv", f"name,Email\n{rows}\n", "text/csv")},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 200
+    assert response.json()["invited"] == 1200
+    assert session.query(models.OutboxEmail).count() == 1200
+    # the vendor, IN lists and inserts of 500 emails
+    query_budget(response, 1 + 3 + 3)
+
+    response = client.post(
+        "/api/vendor-admin/invites/bulk/csv",
+        files={
+            "file": ("staff.csv", f"{restaurant_vendor_admin.email}\nstaff0@test.com\n")
+        },
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert [result["status"] for result in response.json()["results"]] == [
+        "existing_member",
+        "invited",
+    ]
+
+
+def test_courier_admin_bulk_invite(
+    client: TestClient,
+    session: Session,
+    courier_admin: models.CourierUser,
+    courier_admin_auth_header: dict,
+):
+    response = client.post(
+        "/api/courier-admin/invites/bulk",
+        json={"emails": ["rider@test.com", courier_admin.email]},
+        headers=courier_admin_auth_header,
+    )
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == [
+        "invited",
+        "existing_member",
+    ]
+    (email,) = session.query(models.OutboxEmail)
+    assert "Courier Delivery as staff" in email.body
+
+
+def test_admin_bulk_invite_vendor_admins(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    restaurant_vendor_admin: models.VendorUser,
+):
+    response = client.post(
+        f"/api/admin/invites/vendors/{restaurant_vendor.id}/bulk",
+        json={"emails": ["boss@test.com", restaurant_vendor_admin.email]},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == [
+        "invited",
+        "existing_member",
+    ]
+    response = client.post(
+        f"/api/admin/invites/vendors/{restaurant_vendor.id}/bulk/csv",
+        files={"file": ("admins.csv", "email\nboss2@test.com\n", "text/csv")},
+        headers=admin_auth_header,
+    )
+    assert response.json()["invited"] == 1
+    emails = session.query(models.OutboxEmail).order_by(models.OutboxEmail.recipient)
+    assert [email.recipient for email in emails] == ["boss2@test.com", "boss@test.com"]
+    token = emails[0].body.split("?token=")[1].split()[0]
+    payload = util.get_payload_from_token(token, config.ACTIVITY_TOKEN_SECRET_KEY)
+    assert payload["token_type"] == enums.ActivityTokenType.VENDOR_ADMIN_INVITE
+    assert "Restaurant Vendor as admin" in emails[0].body
+    response = client.post(
+        f"/api/admin/invites/vendors/{uuid4()}/bulk",
+        json={"emails": ["boss3@test.com"]},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 404
+
+
+def test_admin_bulk_invite_courier_admins(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    courier: models.Courier,
+    courier_admin: models.CourierUser,
+):
+    response = client.post(
+        f"/api/admin/invites/couriers/{courier.id}/bulk",
+        json={"emails": ["lead@test.com", courier_admin.email]},
+        headers=admin_auth_header,
+    )
+    assert [result["status"] for result in response.json()["results"]] == [
+        "invited",
+        "existing_member",
+    ]
+    response = client.post(
+        f"/api/admin/invites/couriers/{courier.id}/bulk/csv",
+        files={"file": ("admins.csv", "lead2@test.com\n", "text/csv")},
+        headers=admin_auth_header,
+    )
+    assert response.json()["invited"] == 1
+    email = session.query(models.OutboxEmail).filter_by(recipient="lead2@test.com")
+    token = email.one().body.split("?token=")[1].split()[0]
+    payload = util.get_payload_from_token(token, config.ACTIVITY_TOKEN_SECRET_KEY)
+    assert payload["token_type"] == enums.ActivityTokenType.COURIER_ADMIN_INVITE
+    response = client.post(
+        f"/api/admin/invites/couriers/{courier.id}/bulk",
+        json={"emails": ["lead3@test.com"]},
+    )
+    assert response.status_code == 401
+
+
+def test_bulk_invite_fail(
+    client: TestClient,
+    restaurant_vendor_admin: models.VendorUser,
+    restaurant_vendor_admin_auth_header: dict,
+    monkeypatch,
+):
+    response = client.post(
+        "/api/vendor-admin/invites/bulk",
+        json={"emails": []},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/api/vendor-admin/invites/bulk/csv",
+        files={"file": ("staff.csv", b"\xff\xfe\x00")},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 400
+    monkeypatch.setattr(config, "BULK_INVITE_MAX_EMAILS", 2)
+    response = client.post(
+        "/api/vendor-admin/invites/bulk/csv",
+        files={"file": ("staff.csv", "a@test.com\nb@test.com\nc@test.com\n")},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 400
+    response = client.post(
+        "/api/vendor-admin/invites/bulk",
+        json={"emails": ["a@test.com"]},
+    )
+    assert response.status_code == 401
+
+
+def test_bulk_invite_to_deleted_vendor_fail(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    home_vendor: models.Vendor,
+):
+    session.delete(home_vendor)
+    session.commit()
+    response = client.post(
+        f"/api/admin/invites/vendors/{home_vendor.id}/bulk",
+        json={"emails": ["a@test.com"]},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 404
+    assert session.query(models.OutboxEmail).count() == 0
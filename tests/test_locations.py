@@ -0,0 +1,169 @@
+import random
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie.db import models
+from foodie.geo import GridIndex, bounding_boxes, haversine_km
+from foodie.locations import vendor_locator
+
+# from Victoria Island, Lagos: Ikoyi is 3km away, Ikeja 21km and Ibadan 120km
+VICTORIA_ISLAND = (6.4281, 3.4219)
+IKOYI = (6.4549, 3.4337)
+IKEJA = (6.6018, 3.3515)
+IBADAN = (7.3775, 3.947)
+
+
+@pytest.fixture
+def located_vendors(
+    session: Session,
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+    food_stand_vendor: models.Vendor,
+) -> List[models.Vendor]:
+    for vendor, (latitude, longitude) in [
+        (restaurant_vendor, IKOYI),
+        (home_vendor, IKEJA),
+        (food_stand_vendor, IBADAN),
+    ]:
+        vendor.latitude, vendor.longitude = latitude, longitude
+    session.commit()
+    return [restaurant_vendor, home_vendor, food_stand_vendor]
+
+
+def nearby(client: TestClient, point=VICTORIA_ISLAND, **params) -> list:
+    latitude, longitude = point
+    response = client.get(
+        "/api/vendors/nearby",
+        params={"latitude": latitude, "longitude": longitude, **params},
+    )
+    assert response.status_code == 200
+    return [(vendor["name"], round(vendor["distanceKm"])) for vendor in response.json()]
+
+
+@pytest.mark.parametrize("cell_degrees", [0.01, 1, 7])
+def test_grid_index_matches_brute_force(cell_degrees: float):
+    rng = random.Random(cell_degrees)
+    index = GridIndex(cell_degrees)
+    points = {}
+    for key in range(3000):
+        if key % 3:
+            point = (rng.uniform(6, 7), rng.uniform(3, 4))
+        else:
+            point = (rng.uniform(-90, 90), rng.uniform(-180, 180))
+        points[key] = point
+        index.set(key, *point)
+    for key in range(0, 3000, 10):
+        index.remove(key)
+        del points[key]
+    queries = [(6.5, 3.5), (0, 179.99), (89.9, -179.9), (-30, 20)]
+    for latitude, longitude in queries:
+        for radius_km, limit in [(2, 5), (30, 20), (2000, 10), (20000, 3)]:
+            expected = sorted(
+                haversine_km(latitude, longitude, *point)
+                for point in points.values()
+                if haversine_km(latitude, longitude, *point) <= radius_km
+            )[:limit]
+            found = index.nearest(latitude, longitude, radius_km, limit)
+            assert [distance for _, distance in found] == pytest.approx(expected)
+
+
+def test_grid_index_filters_and_moves_points():
+    index = GridIndex()
+    index.set("ikoyi", *IKOYI)
+    index.set("ikeja", *IKEJA)
+    assert [key for key, _ in index.nearest(*VICTORIA_ISLAND, 50, 5)] == [
+        "ikoyi",
+        "ikeja",
+    ]
+    found = index.nearest(*VICTORIA_ISLAND, 50, 5, accept=lambda key: key != "ikoyi")
+    assert [key for key, _ in found] == ["ikeja"]
+    index.set("ikoyi", *IBADAN)
+    assert [key for key, _ in index.nearest(*VICTORIA_ISLAND, 50, 5)] == ["ikeja"]
+    index.remove("ikeja")
+    assert index.nearest(*VICTORIA_ISLAND, 50, 5) == []
+    assert len(index) == 1
+
+
+def test_bounding_boxes_split_at_antimeridian():
+    boxes = bounding_boxes(0, 179.99, 10)
+    assert len(boxes) == 2
+    assert boxes[0][1] > 179.8 and boxes[0][3] == 180
+    assert boxes[1][1] == -180 and boxes[1][3] < -179.8
+    assert bounding_boxes(89.99, 0, 10) == [(pytest.approx(89.9), -180, 90, 180)]
+
+
+def test_fetch_nearby_vendors(client: TestClient, located_vendors: List[models.Vendor]):
+    assert nearby(client) == [("Restaurant Vendor", 3)]
+    assert nearby(client, radius_km=25) == [
+        ("Restaurant Vendor", 3),
+        ("Home Vendor", 21),
+    ]
+    assert nearby(client, radius_km=25, limit=1) == [("Restaurant Vendor", 3)]
+    assert nearby(client, radius_km=25, type="home") == [("Home Vendor", 21)]
+    assert nearby(client, point=IBADAN, radius_km=1) == [("Food Stand Vendor", 0)]
+    response = client.get(
+        "/api/vendors/nearby",
+        params={"latitude": 6.5, "longitude": 3.4, "radius_km": 500},
+    )
+    assert response.status_code == 422
+
+
+def test_nearby_vendors_follow_location_changes(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    located_vendors: List[models.Vendor],
+):
+    restaurant_vendor, home_vendor, _ = located_vendors
+    response = client.put(
+        f"/api/admin/vendors/{home_vendor.id}/location",
+        json={"latitude": VICTORIA_ISLAND[0], "longitude": VICTORIA_ISLAND[1]},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 200
+    assert response.json()["latitude"] == VICTORIA_ISLAND[0]
+    assert nearby(client) == [("Home Vendor", 0), ("Restaurant Vendor", 3)]
+    response = client.put(
+        f"/api/admin/vendors/{restaurant_vendor.id}/location",
+        json={},
+        headers=admin_auth_header,
+    )
+    assert response.json()["latitude"] is None
+    assert nearby(client) == [("Home Vendor", 0)]
+    session.delete(home_vendor)
+    session.commit()
+    assert nearby(client) == []
+
+
+def test_vendor_location_requires_both_coordinates(
+    client: TestClient, admin_auth_header: dict
+):
+    response = client.post(
+        "/api/admin/vendors/",
+        json={"name": "Mama Put", "type": "home", "address": "Yaba", "latitude": 6.5},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/api/admin/vendors/",
+        json={
+            "name": "Mama Put",
+            "type": "home",
+            "address": "Yaba",
+            "latitude": IKOYI[0],
+            "longitude": IKOYI[1],
+        },
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 201
+    assert nearby(client) == [("Mama Put", 3)]
+
+
+def test_vendor_locations_rebuild(
+    client: TestClient, located_vendors: List[models.Vendor]
+):
+    vendor_locator.clear()
+    assert nearby(client) == []
+    with client:
+        assert nearby(client) == [("Restaurant Vendor", 3)]
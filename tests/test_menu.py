@@ -0,0 +1,277 @@
+import uuid
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie.db import models
+
+
+def test_fetch_vendor_menu(
+    client: TestClient,
+    restaurant_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    response = client.get(f"/api/vendors/{restaurant_vendor.id}/menu")
+    assert response.status_code == 200
+    data = response.json()
+    assert [package["name"] for package in data] == [
+        "Suya Wrap",
+        "Jollof Rice Special",
+        "Pounded Yam Combo",
+    ]
+    assert data[0]["price"] == 150000
+    assert data[0]["currency"] == "NGN"
+
+
+@pytest.mark.parametrize(
+    "params,names",
+    [
+        ({"sort": "-price"}, ["Pounded Yam Combo", "Jollof Rice Special", "Suya Wrap"]),
+        ({"min_price": 200000}, ["Jollof Rice Special", "Pounded Yam Combo"]),
+        ({"min_price": 200000, "max_price": 300000}, ["Jollof Rice Special"]),
+        ({"max_price": 100000}, []),
+    ],
+)
+def test_fetch_vendor_menu_filter_and_sort(
+    client: TestClient,
+    restaurant_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+    params: dict,
+    names: List[str],
+):
+    response = client.get(f"/api/vendors/{restaurant_vendor.id}/menu", params=params)
+    assert response.status_code == 200
+    assert [package["name"] for package in response.json()] == names
+
+
+def test_fetch_vendor_menu_unknown_vendor_fail(client: TestClient):
+    response = client.get(f"/api/vendors/{uuid.uuid4()}/menu")
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "items,names",
+    [
+        (["chicken"], ["Jollof Rice Special"]),
+        (["Jollof  RICE", "plantain"], ["Jollof Rice Special"]),
+        (["jollof rice", "beef"], []),
+    ],
+)
+def test_fetch_vendor_menu_with_items(
+    client: TestClient,
+    restaurant_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+    items: List[str],
+    names: List[str],
+):
+    response = client.get(
+        f"/api/vendors/{restaurant_vendor.id}/menu", params={"item": items}
+    )
+    assert response.status_code == 200
+    assert [package["name"] for package in response.json()] == names
+
+
+def test_fetch_food_packages_with_items(
+    client: TestClient,
+    session: Session,
+    home_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    session.add(
+        models.FoodPackage(
+            name="Beef Stew Bowl",
+            description="Rice and beef stew",
+            image_url="https://images.test/beef-stew-bowl.png",
+            items=["white rice", "beef", "stew"],
+            price=120000,
+            vendor_id=home_vendor.id,
+        )
+    )
+    session.commit()
+    response = client.get("/api/food-packages", params={"item": "beef"})
+    assert response.status_code == 200
+    assert [package["name"] for package in response.json()] == [
+        "Beef Stew Bowl",
+        "Pounded Yam Combo",
+    ]
+    assert response.json()[0]["items"] == ["white rice", "beef", "stew"]
+
+
+def test_food_package_items_keep_commas_and_order(
+    session: Session, restaurant_vendor: models.Vendor
+):
+    items = ["rice, fried", "chicken", "rice, fried"]
+    session.add(
+        models.FoodPackage(
+            name="Double Fried Rice",
+            description="Two portions of fried rice",
+            image_url="https://images.test/double-fried-rice.png",
+            items=items,
+            price=300000,
+            vendor_id=restaurant_vendor.id,
+        )
+    )
+    session.commit()
+    session.expire_all()
+    food_package = session.query(models.FoodPackage).one()
+    assert list(food_package.items) == items
+    food_package.items = ["chicken"]
+    session.commit()
+    session.expire_all()
+    assert list(session.query(models.FoodPackage).one().items) == ["chicken"]
+    assert session.query(models.FoodPackageItem).count() == 1
+
+
+def menu_entry(food_package: models.FoodPackage, **changes) -> dict:
+    return {
+        "name": food_package.name,
+        "description": food_package.description,
+        "imageUrl": food_package.image_url,
+        "items": list(food_package.items),
+        "price": food_package.price,
+        "isAvailable": food_package.is_available,
+        **changes,
+    }
+
+
+def test_sync_vendor_menu(
+    client: TestClient,
+    session: Session,
+    user: models.User,
+    restaurant_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+    restaurant_vendor_admin_auth_header: dict,
+):
+    jollof, pounded_yam, suya, fried_rice = restaurant_food_packages
+    rice = models.FoodCategory(name="Rice")
+    session.add(rice)
+    session.add(
+        models.UserFoodPackageFeedback(
+            user_id=user.id, food_package_id=suya.id, rating=4
+        )
+    )
+    session.commit()
+    menu = [
+        menu_entry(jollof),
+        menu_entry(pounded_yam, price=330000, items=["pounded yam", "egusi soup"]),
+        menu_entry(fried_rice, categories=[str(rice.id)]),
+        {
+            "name": "Moi Moi",
+            "description": "Steamed bean pudding",
+            "imageUrl": "https://images.test/moi-moi.png",
+            "items": ["moi moi", "egg"],
+            "price": 80000,
+        },
+    ]
+    response = client.put(
+        "/api/vendor/menu/",
+        json={"packages": menu},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "created": 1,
+        "updated": 2,
+        "deleted": 0,
+        "withdrawn": 1,
+        "unchanged": 1,
+    }
+
+    response = client.get(f"/api/vendors/{restaurant_vendor.id}/menu")
+    assert [(p["name"], p["price"], p["items"]) for p in response.json()] == [
+        ("Moi Moi", 80000, ["moi moi", "egg"]),
+        ("Jollof Rice Special", 250000, ["jollof rice", "plantain", "chicken"]),
+        ("Pounded Yam Combo", 330000, ["pounded yam", "egusi soup"]),
+    ]
+    # left out of the menu, suya is only withdrawn and keeps its feedback
+    session.refresh(suya)
+    assert suya.is_available is False
+    assert session.query(models.UserFoodPackageFeedback).count() == 1
+    # the in-process indexes follow writes made outside the orm
+    response = client.get("/api/search/food-packages", params={"q": "bean pudding"})
+    assert [package["name"] for package in response.json()] == ["Moi Moi"]
+    response = client.get("/api/search/food-packages", params={"q": "suya"})
+    assert response.json() == []
+    response = client.get("/api/food-categories/facets", params={"available": False})
+    assert response.json()["categories"] == [
+        {"id": str(rice.id), "name": "Rice", "count": 1}
+    ]
+
+    response = client.put(
+        "/api/vendor/menu/",
+        json={"packages": menu},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.json() == {
+        "created": 0,
+        "updated": 0,
+        "deleted": 0,
+        "withdrawn": 0,
+        "unchanged": 5,
+    }
+    menu[2] = menu_entry(fried_rice)
+    response = client.put(
+        "/api/vendor/menu/",
+        json={"packages": menu},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.json() == {
+        "created": 0,
+        "updated": 1,
+        "deleted": 0,
+        "withdrawn": 0,
+        "unchanged": 4,
+    }
+    response = client.get("/api/food-categories/facets", params={"available": False})
+    assert response.json()["categories"] == []
+
+    # only unrated packages are deleted, suya's feedback stays
+    response = client.put(
+        "/api/vendor/menu/",
+        json={"packages": menu[:3], "deleteMissing": True},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.json() == {
+        "created": 0,
+        "updated": 0,
+        "deleted": 1,
+        "withdrawn": 0,
+        "unchanged": 4,
+    }
+    assert session.query(models.FoodPackage).filter_by(name="Moi Moi").count() == 0
+    assert session.get(models.FoodPackage, suya.id) is not None
+    assert session.query(models.UserFoodPackageFeedback).count() == 1
+    response = client.get("/api/search/food-packages", params={"q": "bean pudding"})
+    assert response.json() == []
+
+
+def test_sync_vendor_menu_fail(
+    client: TestClient,
+    restaurant_food_packages: List[models.FoodPackage],
+    restaurant_vendor_admin_auth_header: dict,
+    restaurant_vendor_staff_auth_header: dict,
+):
+    jollof = restaurant_food_packages[0]
+    response = client.put(
+        "/api/vendor/menu/",
+        json={"packages": [menu_entry(jollof)]},
+        headers=restaurant_vendor_staff_auth_header,
+    )
+    assert response.status_code == 401
+    response = client.put(
+        "/api/vendor/menu/",
+        json={"packages": [menu_entry(jollof, categories=[str(uuid.uuid4())])]},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 404
+    response = client.put(
+        "/api/vendor/menu/",
+        json={
+            "packages": [
+                menu_entry(jollof),
+                menu_entry(jollof, name=" JOLLOF rice special"),
+            ]
+        },
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 422
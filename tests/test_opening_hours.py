@@ -0,0 +1,241 @@
+from datetime import datetime, time, timedelta, timezone
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie import enums
+from foodie.db import models
+from foodie.db.opening_hours import week_words
+from foodie.opening_hours import (
+    SLOTS_PER_DAY,
+    WEEK_SLOTS,
+    OpeningHoursIndex,
+    PostgresOpeningHours,
+    day_bits,
+    opening_hours,
+    week_slot,
+)
+
+# 2021-06-07 is a Monday, Lagos is an hour ahead of UTC
+MONDAY = datetime(2021, 6, 7)
+
+
+def lagos(days: int, hour: int, minute: int = 0) -> str:
+    """UTC time of hour:minute in Lagos, days after Monday"""
+    moment = MONDAY + timedelta(days=days, hours=hour - 1, minutes=minute)
+    return moment.replace(tzinfo=timezone.utc).isoformat()
+
+
+def slots(bits: int) -> List[int]:
+    return [slot for slot in range(WEEK_SLOTS) if bits >> slot & 1]
+
+
+def set_hours(client: TestClient, vendor: models.Vendor, header: dict, days: list):
+    return client.put(
+        f"/api/admin/vendors/{vendor.id}/opening-hours",
+        json={"days": days},
+        headers=header,
+    )
+
+
+def open_vendors(client: TestClient, header: dict, **params) -> List[str]:
+    response = client.get("/api/admin/vendors/", params=params, headers=header)
+    assert response.status_code == 200
+    return sorted(vendor["name"] for vendor in response.json()["items"])
+
+
+def test_day_bits():
+    monday, sunday = enums.DaysOfTheWeek.MONDAY, enums.DaysOfTheWeek.SUNDAY
+    assert slots(day_bits(monday, time(9), time(10))) == [36, 37, 38, 39]
+    # partly open slots are left out
+    assert slots(day_bits(monday, time(9, 5), time(10, 10))) == [37, 38, 39]
+    assert day_bits(monday, time(9, 5), time(9, 20)) == 0
+    # closed, until midnight and round the clock
+    assert day_bits(monday, None, time(10)) == 0
+    assert slots(day_bits(monday, time(23), None)) == [92, 93, 94, 95]
+    assert slots(day_bits(monday, time(6), time(6))) == list(range(24, 120))
+    # past midnight into tuesday, and sunday night into monday
+    assert slots(day_bits(monday, time(23), time(1))) == list(range(92, 100))
+    assert slots(day_bits(sunday, time(23, 30), time(0, 30))) == [0, 1, 670, 671]
+
+
+def test_week_slot():
+    assert week_slot(MONDAY) == 4
+    assert week_slot(MONDAY.replace(tzinfo=timezone(timedelta(hours=1)))) == 0
+    assert week_slot(MONDAY - timedelta(minutes=61)) == WEEK_SLOTS - 1
+    assert week_slot(datetime(2021, 6, 9, 11, 14)) == 2 * SLOTS_PER_DAY + 48
+
+
+def test_opening_hours_index():
+    index = OpeningHoursIndex()
+    index.set_vendor(
+        "vendor",
+        [
+            (enums.DaysOfTheWeek.MONDAY, time(9), time(17)),
+            (enums.DaysOfTheWeek.FRIDAY, time(18), time(2)),
+        ],
+    )
+    assert index.is_open("vendor", 40)
+    assert not index.is_open("vendor", 17 * 4)
+    assert index.is_open("vendor", 5 * SLOTS_PER_DAY + 4)
+    index.set_day("vendor", enums.DaysOfTheWeek.MONDAY, None, None)
+    assert not index.is_open("vendor", 40)
+    index.remove_day("vendor", enums.DaysOfTheWeek.FRIDAY)
+    assert len(index) == 0 and index.week("vendor") == 0
+    assert not index.is_open("unknown", 40)
+
+
+def test_week_words():
+    assert week_words(0) == {}
+    assert week_words(1 << 47 | 1 << 48 | 1 << 671) == {0: 1 << 47, 1: 1, 13: 1 << 47}
+
+
+@pytest.mark.parametrize("backend", ["memory", "postgres"])
+def test_filter_vendors_open_at(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+    monkeypatch,
+    backend: str,
+):
+    if backend == "postgres":
+        # the bit test on vendor_open_slots runs on any database
+        monkeypatch.setattr(
+            "foodie.api.vendor.admin_router.opening_hours", PostgresOpeningHours()
+        )
+    response = set_hours(
+        client,
+        restaurant_vendor,
+        admin_auth_header,
+        [
+            {"day": "monday", "openFrom": "09:00:00", "openTo": "17:00:00"},
+            {"day": "friday", "openFrom": "18:00:00", "openTo": "02:00:00"},
+        ],
+    )
+    assert response.status_code == 200
+    assert response.json()[1] == {
+        "day": "friday",
+        "openFrom": "18:00:00",
+        "openTo": "02:00:00",
+    }
+    set_hours(
+        client,
+        home_vendor,
+        admin_auth_header,
+        [{"day": "monday", "openFrom": "16:00:00", "openTo": None}],
+    )
+    stored = dict(
+        session.query(models.VendorOpenSlots.word, models.VendorOpenSlots.bits)
+        .filter_by(vendor_id=restaurant_vendor.id)
+        .all()
+    )
+    assert stored == week_words(opening_hours.week(restaurant_vendor.id))
+    if backend == "postgres":
+        opening_hours.clear()
+    assert open_vendors(client, admin_auth_header) == [
+        "Home Vendor",
+        "Restaurant Vendor",
+    ]
+    for at, expected in [
+        (lagos(0, 9), ["Restaurant Vendor"]),
+        (lagos(0, 16, 30), ["Home Vendor", "Restaurant Vendor"]),
+        (lagos(0, 17), ["Home Vendor"]),
+        (lagos(1, 0), []),
+        (lagos(4, 23), ["Restaurant Vendor"]),
+        (lagos(5, 1, 45), ["Restaurant Vendor"]),
+        (lagos(5, 2), []),
+    ]:
+        assert open_vendors(client, admin_auth_header, open_at=at) == expected
+
+
+def test_opening_hours_follow_updates(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+):
+    days = [
+        {"day": "monday", "openFrom": "09:00:00", "openTo": "17:00:00"},
+        {"day": "tuesday", "openFrom": "09:00:00", "openTo": "17:00:00"},
+    ]
+    set_hours(client, restaurant_vendor, admin_auth_header, days)
+    days = [
+        {"day": "tuesday", "openFrom": "12:00:00", "openTo": "13:00:00"},
+        {"day": "wednesday", "openFrom": "12:00:00", "openTo": "13:00:00"},
+    ]
+    set_hours(client, restaurant_vendor, admin_auth_header, days)
+    response = client.get(
+        f"/api/admin/vendors/{restaurant_vendor.id}/opening-hours",
+        headers=admin_auth_header,
+    )
+    assert sorted(hours["day"] for hours in response.json()) == [
+        "tuesday",
+        "wednesday",
+    ]
+    assert open_vendors(client, admin_auth_header, open_at=lagos(0, 10)) == []
+    assert open_vendors(client, admin_auth_header, open_at=lagos(1, 10)) == []
+    assert open_vendors(client, admin_auth_header, open_at=lagos(2, 12)) == [
+        "Restaurant Vendor"
+    ]
+
+    # rows changed through the orm are followed too, rolled back ones are not
+    hours = (
+        session.query(models.OpenInformation)
+        .filter_by(day=enums.DaysOfTheWeek.WEDNESDAY)
+        .one()
+    )
+    hours.day = enums.DaysOfTheWeek.THURSDAY
+    session.commit()
+    assert open_vendors(client, admin_auth_header, open_at=lagos(2, 12)) == []
+    assert open_vendors(client, admin_auth_header, open_at=lagos(3, 12)) == [
+        "Restaurant Vendor"
+    ]
+    hours.open_to = time(12, 30)
+    session.flush()
+    session.rollback()
+    assert opening_hours.is_open(restaurant_vendor.id, 3 * SLOTS_PER_DAY + 50)
+
+    # and rebuilt on startup
+    opening_hours.clear()
+    with client:
+        assert open_vendors(client, admin_auth_header, open_at=lagos(3, 12)) == [
+            "Restaurant Vendor"
+        ]
+
+
+def test_opening_hours_validation(
+    client: TestClient, admin_auth_header: dict, restaurant_vendor: models.Vendor
+):
+    day = {"day": "monday", "openFrom": "09:00:00", "openTo": "17:00:00"}
+    response = set_hours(client, restaurant_vendor, admin_auth_header, [day, day])
+    assert response.status_code == 422
+    response = set_hours(
+        client, restaurant_vendor, admin_auth_header, [{**day, "day": "someday"}]
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("open_now", [True, False])
+def test_nearby_vendors_open_now(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    open_now: bool,
+):
+    restaurant_vendor.latitude, restaurant_vendor.longitude = 6.4549, 3.4337
+    session.commit()
+    now = week_slot(datetime.utcnow())
+    day = list(enums.DaysOfTheWeek)[now // SLOTS_PER_DAY]
+    if open_now:
+        hours = {"openFrom": "00:00:00", "openTo": "00:00:00"}
+    else:
+        hours = {"openFrom": None, "openTo": None}
+    set_hours(client, restaurant_vendor, admin_auth_header, [{"day": day, **hours}])
+    response = client.get(
+        "/api/vendors/nearby",
+        params={"latitude": 6.4281, "longitude": 3.4219, "open_now": True},
+    )
+    assert len(response.json()) == (1 if open_now else 0)
@@ -0,0 +1,206 @@
+import asyncio
+import socket
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie import config, enums
+from foodie.db import models
+from foodie.db.base import SessionLocal
+from foodie.outbox import EmailDispatcher, queue_email
+
+controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class Sink:
+    """SMTP handler keeping the messages it receives"""
+
+    def __init__(self):
+        self.envelopes = []
+        self.connections = 0
+        self.refused = set()
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return "550 no such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_port() -> int:
+    return free_port()
+
+
+@pytest.fixture
+def sink(smtp_port: int) -> Sink:
+    sink = Sink()
+    server = controller.Controller(sink, hostname="127.0.0.1", port=smtp_port)
+    server.start()
+    yield sink
+    server.stop()
+
+
+@pytest.fixture
+def dispatcher(smtp_port: int) -> EmailDispatcher:
+    dispatcher = EmailDispatcher(
+        SessionLocal, host="127.0.0.1", port=smtp_port, batch_size=2
+    )
+    yield dispatcher
+    dispatcher.close()
+
+
+@pytest.fixture
+def emails(session: Session) -> List[models.OutboxEmail]:
+    for index in range(3):
+        queue_email(session, f"user{index}@test.com", f"Subject {index}", "Hello")
+    session.commit()
+    return session.query(models.OutboxEmail).all()
+
+
+def outbox(session: Session) -> List[models.OutboxEmail]:
+    session.expire_all()
+    return session.query(models.OutboxEmail).order_by(models.OutboxEmail.recipient)
+
+
+def test_invite_queues_email(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+):
+    response = client.post(
+        f"/api/admin/invites/vendors/{restaurant_vendor.id}",
+        params={"email": "vendor_admin@test.com"},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 200
+    (email,) = outbox(session)
+    assert email.recipient == "vendor_admin@test.com"
+    assert email.status == enums.OutboxStatus.PENDING
+    assert email.attempts == 0
+    assert "Restaurant Vendor as admin" in email.body
+    assert f"{config.CLIENT_HOST}/invites/accept?token=" in email.body
+
+
+def test_dispatch_batches_over_one_connection(
+    sink: Sink,
+    dispatcher: EmailDispatcher,
+    session: Session,
+    emails: List[models.OutboxEmail],
+):
+    assert dispatcher.dispatch_batch() == 2
+    assert dispatcher.dispatch_batch() == 1
+    assert dispatcher.dispatch_batch() == 0
+    assert sink.connections == 1
+    assert sorted(envelope.rcpt_tos[0] for envelope in sink.envelopes) == [
+        "user0@test.com",
+        "user1@test.com",
+        "user2@test.com",
+    ]
+    assert b"Subject: Subject 0" in sink.envelopes[0].content
+    for email in outbox(session):
+        assert email.status == enums.OutboxStatus.SENT
+        assert email.attempts == 1
+        assert email.sent_at is not None
+
+
+def test_dispatch_retries_with_backoff(
+    smtp_port: int,
+    dispatcher: EmailDispatcher,
+    session: Session,
+    emails: List[models.OutboxEmail],
+):
+    now = datetime.utcnow()
+    # nothing listens on the port yet, the rest of a batch is left for the
+    # next one once the connection fails
+    assert dispatcher.dispatch_batch(now) == 1
+    assert sorted(email.attempts for email in outbox(session)) == [0, 0, 1]
+    (failed,) = [email for email in outbox(session) if email.attempts]
+    assert failed.status == enums.OutboxStatus.PENDING
+    assert failed.next_attempt_at == now + timedelta(seconds=30)
+    assert "ConnectionRefusedError" in failed.last_error
+    assert dispatcher.dispatch_batch(now) == 1
+    assert dispatcher.dispatch_batch(now) == 1
+    assert dispatcher.dispatch_batch(now) == 0
+    later = now + timedelta(seconds=31)
+    assert dispatcher.dispatch_batch(later) == 1
+    assert sorted(email.attempts for email in outbox(session)) == [1, 1, 2]
+    (failed,) = [email for email in outbox(session) if email.attempts == 2]
+    assert failed.next_attempt_at == later + timedelta(seconds=60)
+
+    sink = Sink()
+    server = controller.Controller(sink, hostname="127.0.0.1", port=smtp_port)
+    server.start()
+    try:
+        assert dispatcher.dispatch_batch(now + timedelta(minutes=5)) == 2
+        assert dispatcher.dispatch_batch(now + timedelta(minutes=5)) == 1
+    finally:
+        server.stop()
+    assert len(sink.envelopes) == 3
+    assert [email.status for email in outbox(session)] == [enums.OutboxStatus.SENT] * 3
+
+
+def test_dispatch_fails_refused_recipient(
+    sink: Sink,
+    dispatcher: EmailDispatcher,
+    session: Session,
+    emails: List[models.OutboxEmail],
+):
+    sink.refused.add("user0@test.com")
+    while dispatcher.dispatch_batch():
+        pass
+    refused, *sent = outbox(session)
+    assert refused.status == enums.OutboxStatus.FAILED
+    assert refused.attempts == 1
+    assert "550" in refused.last_error
+    assert [email.status for email in sent] == [enums.OutboxStatus.SENT] * 2
+    assert sink.connections == 1
+
+
+def test_dispatch_gives_up_after_max_attempts(
+    dispatcher: EmailDispatcher, session: Session
+):
+    queue_email(session, "user@test.com", "Subject", "Hello")
+    session.commit()
+    dispatcher.max_attempts = 2
+    now = datetime.utcnow()
+    dispatcher.dispatch_batch(now)
+    dispatcher.dispatch_batch(now + timedelta(seconds=30))
+    (email,) = outbox(session)
+    assert email.status == enums.OutboxStatus.FAILED
+    assert email.attempts == 2
+    assert dispatcher.dispatch_batch(now + timedelta(days=1)) == 0
+
+
+def test_dispatcher_runs_in_background(
+    sink: Sink, dispatcher: EmailDispatcher, emails: List[models.OutboxEmail]
+):
+    dispatcher.poll_seconds = 0.05
+
+    async def dispatch():
+        await dispatcher.start()
+        for _ in range(100):
+            if len(sink.envelopes) == 3:
+                break
+            await asyncio.sleep(0.05)
+        await dispatcher.stop()
+
+    asyncio.run(dispatch())
+    assert len(sink.envelopes) == 3
@@ -0,0 +1,137 @@
+from datetime import datetime, time
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie import enums
+from foodie.db import keyset, models
+from foodie.opening_hours import opening_hours
+
+
+@pytest.fixture
+def many_vendors(session: Session) -> List[models.Vendor]:
+    # several vendors per timestamp, with and without microseconds, so
+    # pages have to break ties on id
+    vendors = [
+        models.Vendor(
+            name=f"{vendor_type.value.title()} Vendor {index}",
+            type=vendor_type,
+            address="address",
+            created_at=datetime(2021, 6, 1, 12, 0, index // 3, 500 * (index % 2)),
+        )
+        for index, vendor_type in enumerate(
+            [enums.VendorType.RESTAURANT, enums.VendorType.HOME] * 6
+        )
+    ]
+    session.add_all(vendors)
+    session.commit()
+    return sorted(vendors, key=lambda vendor: (vendor.created_at, vendor.id))
+
+
+def fetch_pages(client: TestClient, url: str, header: dict, **params) -> List[list]:
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, "cursor": cursor}, headers=header)
+        assert response.status_code == 200
+        data = response.json()
+        pages.append([item["name"] for item in data["items"]])
+        cursor = data["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+def test_fetch_vendors_in_pages(
+    client: TestClient, admin_auth_header: dict, many_vendors: List[models.Vendor]
+):
+    pages = fetch_pages(client, "/api/admin/vendors/", admin_auth_header, page_size=5)
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert sum(pages, []) == [vendor.name for vendor in many_vendors]
+    pages = fetch_pages(client, "/api/admin/vendors/", admin_auth_header, page_size=6)
+    assert [len(page) for page in pages] == [6, 6]
+
+
+def test_fetch_vendors_filtered_in_pages(
+    client: TestClient, admin_auth_header: dict, many_vendors: List[models.Vendor]
+):
+    pages = fetch_pages(
+        client, "/api/admin/vendors/", admin_auth_header, page_size=4, type="home"
+    )
+    assert sum(pages, []) == [
+        vendor.name for vendor in many_vendors if vendor.type == enums.VendorType.HOME
+    ]
+    pages = fetch_pages(
+        client, "/api/admin/vendors/", admin_auth_header, name="restaurant vendor 1"
+    )
+    assert pages == [["Restaurant Vendor 10"]]
+    pages = fetch_pages(client, "/api/admin/vendors/", admin_auth_header, name="%")
+    assert pages == [[]]
+
+
+def test_fetch_open_vendors_in_pages(
+    client: TestClient, admin_auth_header: dict, many_vendors: List[models.Vendor]
+):
+    for vendor in many_vendors[::3]:
+        opening_hours.set_day(vendor.id, enums.DaysOfTheWeek.MONDAY, time(9), time(17))
+    # 2021-06-07 was a Monday, 10am in Lagos
+    pages = fetch_pages(
+        client,
+        "/api/admin/vendors/",
+        admin_auth_header,
+        page_size=3,
+        open_at="2021-06-07T09:00:00Z",
+    )
+    assert sum(pages, []) == [vendor.name for vendor in many_vendors[::3]]
+
+
+def test_fetch_vendors_by_rating_in_pages(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    many_vendors: List[models.Vendor],
+):
+    for index, vendor in enumerate(many_vendors[:6]):
+        vendor.rating_count, vendor.rating_sum = 2, 2 * (1 + index % 3)
+    session.commit()
+    for sort in ("-rating", "rating"):
+        response = client.get(
+            "/api/admin/vendors/",
+            params={"sort": sort, "page_size": 100},
+            headers=admin_auth_header,
+        )
+        expected = [vendor["name"] for vendor in response.json()["items"]]
+        assert len(expected) == 12
+        pages = fetch_pages(
+            client, "/api/admin/vendors/", admin_auth_header, page_size=4, sort=sort
+        )
+        assert sum(pages, []) == expected
+    ratings = [vendor["rating"] for vendor in response.json()["items"]]
+    assert ratings == [1, 1, 2, 2, 3, 3] + [None] * 6
+
+
+def test_fetch_couriers_in_pages(
+    client: TestClient, session: Session, admin_auth_header: dict
+):
+    session.add_all(
+        [
+            models.Courier(name=f"Courier {index}", address="address")
+            for index in range(5)
+        ]
+    )
+    session.commit()
+    pages = fetch_pages(client, "/api/admin/couriers/", admin_auth_header, page_size=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sorted(sum(pages, [])) == [f"Courier {index}" for index in range(5)]
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "W10", keyset.encode_cursor([1])])
+def test_fetch_vendors_invalid_cursor_fail(
+    client: TestClient, admin_auth_header: dict, cursor: str
+):
+    response = client.get(
+        "/api/admin/vendors/", params={"cursor": cursor}, headers=admin_auth_header
+    )
+    assert response.status_code == 400
+    response = client.get(
+        "/api/admin/vendors/", params={"page_size": 0}, headers=admin_auth_header
+    )
+    assert response.status_code == 422
@@ -0,0 +1,110 @@
+import logging
+from datetime import timedelta
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from foodie import config, enums, util
+from foodie.api.middleware import QueryStatsMiddleware
+from foodie.db import models
+from foodie.db.base import SessionLocal
+from foodie.db.query_stats import track_queries
+
+
+def test_track_queries():
+    with SessionLocal() as session:
+        session.execute(text("select 1"))
+        with track_queries() as stats:
+            session.execute(text("select 2"))
+            session.execute(text("select 3"))
+        session.execute(text("select 4"))
+    assert stats.count == 2
+    assert stats.slowest_statement in ("select 2", "select 3")
+    assert 0 < stats.slowest_seconds <= stats.seconds
+    assert stats.server_timing().startswith("db;dur=")
+    assert 'desc="2 queries"' in stats.server_timing()
+
+
+def test_server_timing_and_log_fields(
+    client: TestClient,
+    caplog,
+    restaurant_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+    query_budget,
+):
+    with caplog.at_level(logging.INFO, logger="foodie.requests"):
+        response = client.get(f"/api/vendors/{restaurant_vendor.id}/menu")
+    assert response.status_code == 200
+    assert "db-slowest;dur=" in response.headers["server-timing"]
+    (record,) = caplog.records
+    assert record.method == "GET"
+    assert record.path == f"/api/vendors/{restaurant_vendor.id}/menu"
+    assert record.status == 200
+    assert record.db_queries == query_budget(response, 3)
+    assert record.db_slowest_statement is not None
+    assert record.duration_ms >= record.db_ms
+
+
+def test_query_budgets(
+    client: TestClient,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+    restaurant_vendor_admin_auth_header: dict,
+    query_budget,
+):
+    token = util.create_token(
+        {
+            "id": str(restaurant_vendor.id),
+            "email": "vendor_admin@test.com",
+            "token_type": enums.ActivityTokenType.VENDOR_ADMIN_INVITE,
+        },
+        config.ACTIVITY_TOKEN_SECRET_KEY,
+        timedelta(hours=1),
+    )
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 200
+    query_budget(response, 1)
+    response = client.get(
+        "/api/vendors/nearby", params={"latitude": 6.43, "longitude": 3.42}
+    )
+    assert response.status_code == 200
+    # answered from the in-process location index
+    assert query_budget(response, 0) == 0
+    response = client.get("/api/invites/details", params={"token": token})
+    assert response.status_code == 200
+    # the vendor and any existing user of the email, in one query
+    query_budget(response, 1)
+    response = client.post(
+        "/api/invites/accept",
+        json={
+            "firstName": "John",
+            "lastName": "Doe",
+            "password": "xpassword",
+            "phoneNumber": "08012345678",
+        },
+        params={"token": token},
+    )
+    assert response.status_code == 201
+    query_budget(response, 2)
+    response = client.post(
+        "/api/vendor-admin/invites/",
+        params={"email": "vendor_user@test.com"},
+        headers=restaurant_vendor_admin_auth_header,
+    )
+    assert response.status_code == 200
+    # the vendor and any existing user of the email, then the outbox insert
+    query_budget(response, 2)
+
+
+def test_server_timing_disabled():
+    app = FastAPI()
+
+    @app.get("/")
+    def index():
+        return {}
+
+    client = TestClient(QueryStatsMiddleware(app, server_timing=False))
+    response = client.get("/")
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
@@ -0,0 +1,192 @@
+import uuid
+from datetime import datetime
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm.session import Session
+from foodie.db import models
+from foodie.db.ratings import repair_ratings
+
+
+@pytest.fixture
+def users(session: Session) -> List[models.User]:
+    now = datetime.utcnow()
+    users = [
+        models.User(
+            email=f"rater{index}@test.com",
+            email_verified_on=now,
+            hashed_password="not a real hash",
+            first_name="Rater",
+            last_name=str(index),
+            phone_number="08012345678",
+            phone_number_verified_on=now,
+        )
+        for index in range(4)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def rate_vendor(session: Session, users, vendor, ratings):
+    feedbacks = [
+        models.UserVendorFeedback(user_id=user.id, vendor_id=vendor.id, rating=rating)
+        for user, rating in zip(users, ratings)
+    ]
+    session.add_all(feedbacks)
+    session.commit()
+    return feedbacks
+
+
+def test_feedback_updates_rating_aggregates(
+    session: Session, users: List[models.User], restaurant_vendor: models.Vendor
+):
+    assert restaurant_vendor.rating is None
+    assert restaurant_vendor.rating_histogram == {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+    feedbacks = rate_vendor(session, users, restaurant_vendor, [5, 4.6, 3.4, 1])
+    assert restaurant_vendor.rating_count == 4
+    assert restaurant_vendor.rating == pytest.approx(3.5)
+    assert restaurant_vendor.rating_histogram == {1: 1, 2: 0, 3: 1, 4: 0, 5: 2}
+
+    feedbacks[0].rating = 2
+    session.commit()
+    assert restaurant_vendor.rating_sum == pytest.approx(11)
+    assert restaurant_vendor.rating_histogram == {1: 1, 2: 1, 3: 1, 4: 0, 5: 1}
+
+    session.delete(feedbacks[3])
+    session.commit()
+    assert restaurant_vendor.rating_count == 3
+    assert restaurant_vendor.rating_histogram == {1: 0, 2: 1, 3: 1, 4: 0, 5: 1}
+
+
+def test_feedback_written_without_orm_updates_rating_aggregates(
+    session: Session,
+    users: List[models.User],
+    courier: models.Courier,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    session.execute(
+        models.UserCourierFeedback.__table__.insert(),
+        [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user.id,
+                "courier_id": courier.id,
+                "rating": 4,
+                "created_at": datetime.utcnow(),
+            }
+            for user in users
+        ],
+    )
+    session.add(
+        models.UserFoodPackageFeedback(
+            user_id=users[0].id,
+            food_package_id=restaurant_food_packages[0].id,
+            rating=5,
+        )
+    )
+    session.commit()
+    assert (courier.rating_count, courier.rating_4) == (4, 4)
+    assert restaurant_food_packages[0].rating == 5
+    assert restaurant_food_packages[1].rating is None
+
+
+def test_repair_ratings(
+    session: Session,
+    users: List[models.User],
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+):
+    rate_vendor(session, users, restaurant_vendor, [5, 4, 4])
+    assert repair_ratings(session) == {
+        "vendors": 0,
+        "couriers": 0,
+        "food_packages": 0,
+    }
+    session.execute(
+        update(models.Vendor)
+        .where(models.Vendor.id == restaurant_vendor.id)
+        .values(rating_count=0, rating_sum=0, rating_4=0)
+    )
+    session.execute(
+        update(models.Vendor)
+        .where(models.Vendor.id == home_vendor.id)
+        .values(rating_count=7, rating_5=7)
+    )
+    session.commit()
+    assert repair_ratings(session, chunk_size=1)["vendors"] == 2
+    session.expire_all()
+    assert restaurant_vendor.rating_count == 3
+    assert restaurant_vendor.rating_histogram == {1: 0, 2: 0, 3: 0, 4: 2, 5: 1}
+    assert home_vendor.rating_count == 0
+    assert home_vendor.rating is None
+
+
+def test_fetch_vendors_sorted_by_rating(
+    client: TestClient,
+    session: Session,
+    admin_auth_header: dict,
+    users: List[models.User],
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+    food_stand_vendor: models.Vendor,
+):
+    rate_vendor(session, users, restaurant_vendor, [3, 4])
+    rate_vendor(session, users, home_vendor, [5])
+
+    def names(sort):
+        response = client.get(
+            "/api/admin/vendors/", params={"sort": sort}, headers=admin_auth_header
+        )
+        assert response.status_code == 200
+        return [vendor["name"] for vendor in response.json()["items"]]
+
+    assert names("-rating") == [
+        home_vendor.name,
+        restaurant_vendor.name,
+        food_stand_vendor.name,
+    ]
+    assert names("rating") == [
+        restaurant_vendor.name,
+        home_vendor.name,
+        food_stand_vendor.name,
+    ]
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    vendors = response.json()["items"]
+    vendor = next(v for v in vendors if v["name"] == restaurant_vendor.name)
+    assert vendor["rating"] == 3.5
+    assert vendor["ratingCount"] == 2
+    assert vendor["ratingHistogram"] == {"1": 0, "2": 0, "3": 1, "4": 1, "5": 0}
+
+
+def test_fetch_vendor_menu_sorted_by_rating(
+    client: TestClient,
+    session: Session,
+    users: List[models.User],
+    restaurant_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    jollof, pounded_yam, suya, _ = restaurant_food_packages
+    session.add_all(
+        [
+            models.UserFoodPackageFeedback(
+                user_id=user.id, food_package_id=package.id, rating=rating
+            )
+            for user, package, rating in [
+                (users[0], suya, 5),
+                (users[1], suya, 4),
+                (users[0], jollof, 4),
+            ]
+        ]
+    )
+    session.commit()
+    response = client.get(
+        f"/api/vendors/{restaurant_vendor.id}/menu", params={"sort": "-rating"}
+    )
+    assert [package["name"] for package in response.json()] == [
+        "Suya Wrap",
+        "Jollof Rice Special",
+        "Pounded Yam Combo",
+    ]
+    assert response.json()[0]["rating"] == 4.5
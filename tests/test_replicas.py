@@ -0,0 +1,182 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+from sqlalchemy.orm.session import Session
+from foodie import config, enums
+from foodie.api import deps
+from foodie.db import models
+from foodie.db.base import (
+    Base,
+    get_async_session_factory,
+    get_pool_capacity,
+    get_session_factory,
+)
+from foodie.db.pool import pool_metrics
+from foodie.db.replicas import Replica, ReplicaSet, WriteTracker
+from foodie.db.session import SessionSlots
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_replica(database_url: str, name: str) -> Replica:
+    return Replica(
+        name,
+        get_session_factory(database_url, name),
+        get_async_session_factory(database_url, name)
+        if config.DATABASE_ASYNC
+        else None,
+        SessionSlots(get_pool_capacity(database_url)),
+    )
+
+
+@pytest.fixture
+def replica(tmp_path) -> Replica:
+    replica = make_replica(f"sqlite:///{tmp_path}/replica.db", "test_replica")
+    engine = replica.session_factory.kw["bind"]
+    Base.metadata.create_all(engine)
+    session: Session = replica.session_factory()
+    session.add(
+        models.Vendor(
+            name="Replica Vendor",
+            type=enums.VendorType.RESTAURANT,
+            address="replica vendor address",
+        )
+    )
+    session.commit()
+    session.close()
+    yield replica
+    for name in ("test_replica", "test_replica_async"):
+        pool_metrics.pop(name, None)
+    engine.dispose()
+
+
+@pytest.fixture
+def replica_set(monkeypatch, replica: Replica) -> ReplicaSet:
+    replica_set = ReplicaSet([replica])
+    monkeypatch.setattr(deps, "replica_set", replica_set)
+    return replica_set
+
+
+@pytest.fixture
+def replica_pair(tmp_path) -> tuple:
+    replicas = tuple(
+        make_replica(f"sqlite:///{tmp_path}/{name}.db", name)
+        for name in ("first", "second")
+    )
+    yield replicas
+    for name in ("first", "first_async", "second", "second_async"):
+        pool_metrics.pop(name, None)
+
+
+def test_replica_set_round_robin(replica_pair: tuple):
+    first, second = replica_pair
+    replica_set = ReplicaSet([first, second])
+    assert [replica_set.choose().name for _ in range(4)] == [
+        "first",
+        "second",
+        "first",
+        "second",
+    ]
+
+
+def test_replica_set_skips_ejected_replicas(replica_pair: tuple):
+    clock = FakeClock()
+    first, second = replica_pair
+    replica_set = ReplicaSet([first, second], eject_seconds=30, clock=clock)
+    replica_set.eject(first)
+    assert [replica_set.choose().name for _ in range(2)] == ["second", "second"]
+    replica_set.eject(second)
+    assert replica_set.choose() is None
+    clock.now += 31
+    assert {replica_set.choose().name for _ in range(2)} == {"first", "second"}
+    stats = replica_set.stats()
+    assert stats["primary_fallbacks"] == 1
+    assert [replica["ejections"] for replica in stats["replicas"]] == [1, 1]
+
+
+def test_replica_connection_error_ejects_replica(tmp_path):
+    replica = make_replica(f"sqlite:///{tmp_path}/missing/replica.db", "test_replica")
+    replica_set = ReplicaSet([replica])
+    try:
+        assert replica_set.choose() is replica
+        session: Session = replica.session_factory()
+        with pytest.raises(exc.OperationalError):
+            session.execute(text("SELECT 1"))
+        session.close()
+        assert replica_set.choose() is None
+        assert replica_set.stats()["replicas"][0]["healthy"] is False
+    finally:
+        for name in ("test_replica", "test_replica_async"):
+            pool_metrics.pop(name, None)
+
+
+def test_write_tracker_window(session: Session):
+    clock = FakeClock()
+    write_tracker = WriteTracker(window=5, clock=clock)
+    write_tracker.track(session, "client")
+    session.execute(text("SELECT 1"))
+    session.commit()
+    assert write_tracker.wrote_recently("client") is False
+    session.add(
+        models.Vendor(name="Vendor", type=enums.VendorType.HOME, address="address")
+    )
+    session.commit()
+    assert write_tracker.wrote_recently("client") is True
+    clock.now += 6
+    assert write_tracker.wrote_recently("client") is False
+
+
+def test_fetch_vendors_from_replica(
+    client: TestClient,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    replica_set: ReplicaSet,
+):
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 200
+    assert [vendor["name"] for vendor in response.json()["items"]] == ["Replica Vendor"]
+    assert replica_set.stats()["replicas"][0]["reads"] == 1
+
+
+def test_fetch_vendors_after_write_from_primary(
+    client: TestClient,
+    admin_auth_header: dict,
+    replica_set: ReplicaSet,
+):
+    response = client.post(
+        "/api/admin/vendors/",
+        json={"name": "New Vendor", "type": "home", "address": "new vendor address"},
+        headers=admin_auth_header,
+    )
+    assert response.status_code == 201
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 200
+    assert [vendor["name"] for vendor in response.json()["items"]] == ["New Vendor"]
+    assert replica_set.stats()["replicas"][0]["reads"] == 0
+
+
+def test_fetch_vendors_without_healthy_replica_from_primary(
+    client: TestClient,
+    admin_auth_header: dict,
+    restaurant_vendor: models.Vendor,
+    replica: Replica,
+    replica_set: ReplicaSet,
+):
+    replica_set.eject(replica)
+    response = client.get("/api/admin/vendors/", headers=admin_auth_header)
+    assert response.status_code == 200
+    assert [vendor["name"] for vendor in response.json()["items"]] == [
+        "Restaurant Vendor"
+    ]
+
+
+def test_get_replica_metrics(client: TestClient, admin_auth_header: dict):
+    response = client.get("/api/admin/metrics/replicas", headers=admin_auth_header)
+    assert response.status_code == 200
+    assert response.json() == {"replicas": [], "primary_fallbacks": 0}
@@ -0,0 +1,158 @@
+import uuid
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm.session import Session
+from foodie.db import models
+from foodie.inverted_index import InvertedIndex, tokenize
+from foodie.search import food_package_search
+
+
+def names(client: TestClient, **params) -> List[str]:
+    response = client.get("/api/search/food-packages", params=params)
+    assert response.status_code == 200
+    return [package["name"] for package in response.json()]
+
+
+def test_tokenize():
+    assert tokenize("Rice and Beans, with Plantains!") == ["rice", "bean", "plantain"]
+    assert tokenize("Egusi GLASS") == ["egusi", "glass"]
+
+
+def test_inverted_index_ranks_name_above_description():
+    index = InvertedIndex()
+    index.upsert(1, {"name": "Beef Stew", "description": "rich tomato stew"})
+    index.upsert(2, {"name": "Tomato Stew", "description": "with beef"})
+    index.upsert(3, {"name": "Fish Stew", "description": "tomato base"})
+    assert [doc_id for doc_id, _ in index.search("beef")] == [1, 2]
+    assert [doc_id for doc_id, _ in index.search("tomato stew")][0] == 2
+    assert index.search("beef fish") == []
+    assert index.search("the") == []
+
+
+def test_inverted_index_update_and_remove():
+    index = InvertedIndex()
+    for doc_id in range(3000):
+        index.upsert(doc_id, {"name": f"meal {doc_id}"})
+    index.upsert(7, {"name": "jollof"})
+    assert [doc_id for doc_id, _ in index.search("jollof")] == [7]
+    assert 7 not in [doc_id for doc_id, _ in index.search("meal", limit=5000)]
+    for doc_id in range(2500):
+        index.remove(doc_id)
+    assert len(index) == 500
+    assert index.stats()["tombstones"] < 1024
+    assert index.search("jollof") == []
+    assert len(index.search("meal", limit=5000)) == 500
+
+
+def test_inverted_index_categories():
+    index = InvertedIndex()
+    index.set_category("c", "Swallow")
+    index.upsert(1, {"name": "Pounded Yam"}, category_ids=["c"])
+    index.upsert(2, {"name": "Amala"})
+    assert [doc_id for doc_id, _ in index.search("swallow")] == [1]
+    assert [doc_id for doc_id, _ in index.search("yam", category_id="c")] == [1]
+    assert index.search("amala", category_id="c") == []
+    index.set_category("c", "Staple")
+    assert index.search("swallow") == []
+    assert [doc_id for doc_id, _ in index.search("staple")] == [1]
+
+
+@pytest.mark.parametrize(
+    "q,expected",
+    [
+        ("rice", ["Jollof Rice Special"]),
+        ("beef", ["Pounded Yam Combo", "Suya Wrap"]),
+        ("spicy wraps", ["Suya Wrap"]),
+        ("egusi", ["Pounded Yam Combo"]),
+        ("shrimps", []),
+        ("pizza", []),
+    ],
+)
+def test_search_food_packages(
+    client: TestClient,
+    restaurant_food_packages: List[models.FoodPackage],
+    q: str,
+    expected: List[str],
+):
+    assert names(client, q=q) == expected
+
+
+def test_search_food_packages_filters(
+    client: TestClient,
+    session: Session,
+    restaurant_vendor: models.Vendor,
+    home_vendor: models.Vendor,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    session.add(
+        models.FoodPackage(
+            name="Home Jollof",
+            description="Jollof rice",
+            image_url="https://images.test/home-jollof.png",
+            items=["jollof rice"],
+            price=200000,
+            vendor_id=home_vendor.id,
+        )
+    )
+    session.commit()
+    assert names(client, q="rice") == ["Jollof Rice Special", "Home Jollof"]
+    assert names(client, q="rice", vendor_id=restaurant_vendor.id) == [
+        "Jollof Rice Special"
+    ]
+    assert names(client, q="shrimps", available=False) == ["Fried Rice Deluxe"]
+    assert names(client, q="rice", limit=1) == ["Jollof Rice Special"]
+    response = client.get("/api/search/food-packages", params={"q": "rice"})
+    assert response.json()[0]["rank"] > response.json()[1]["rank"]
+
+
+def test_search_food_packages_category(
+    client: TestClient,
+    session: Session,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    category = models.FoodCategory(name="Swallow")
+    restaurant_food_packages[1].categories.append(category)
+    session.commit()
+    assert names(client, q="swallow") == ["Pounded Yam Combo"]
+    assert names(client, q="beef", category_id=category.id) == ["Pounded Yam Combo"]
+    assert names(client, q="beef", category_id=uuid.uuid4()) == []
+    category.name = "Staple"
+    session.commit()
+    assert names(client, q="swallow") == []
+    assert names(client, q="staple") == ["Pounded Yam Combo"]
+
+
+def test_search_index_follows_commits(
+    client: TestClient,
+    session: Session,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    suya_wrap = restaurant_food_packages[2]
+    suya_wrap.name = "Suya Shawarma"
+    session.flush()
+    session.rollback()
+    assert names(client, q="shawarma") == []
+    suya_wrap.name = "Suya Shawarma"
+    suya_wrap.items.append("cabbage")
+    session.commit()
+    assert names(client, q="shawarma cabbage") == ["Suya Shawarma"]
+    session.delete(suya_wrap)
+    session.commit()
+    assert names(client, q="suya") == []
+
+
+def test_search_index_rebuild(
+    client: TestClient,
+    session: Session,
+    restaurant_food_packages: List[models.FoodPackage],
+):
+    food_package_search.clear()
+    assert names(client, q="rice") == []
+    with client:
+        assert names(client, q="rice") == ["Jollof Rice Special"]
+
+
+def test_search_food_packages_requires_query(client: TestClient):
+    response = client.get("/api/search/food-packages")
+    assert response.status_code == 422